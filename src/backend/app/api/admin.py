@@ -0,0 +1,205 @@
+"""
+Admin API endpoints (require the X-Admin-Token header)
+"""
+
+import asyncio
+import hmac
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.config import ADMIN_TOKEN, AUDIO_RETENTION_DAYS
+from app.database import SessionLocal
+from app.services.audio_store import storage_stats, apply_retention
+from app.services.profiler import profile_gate, load_report, list_reports
+from app.services.rescore import start_rescore, get_rescore
+from app.services.predictor import model_registry
+from app.services.resources import thread_report
+from app.schemas.song import RescoreRequest, ModelLoadRequest, TrafficSplitRequest
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against ADMIN_TOKEN (always False when admin is disabled)"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency rejecting requests without a valid admin token
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.post("/profiling/arm")
+async def arm_profiling():
+    """
+    Profile the next upload (subject to the profiling rate limit)
+    """
+    profile_gate.arm()
+    return {"armed": True}
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """
+    List song IDs with a stored profile report, newest first
+    """
+    return {"song_ids": list_reports(), "armed": profile_gate.armed}
+
+
+@router.get("/profiles/{song_id}")
+async def get_profile(
+    song_id: int,
+    format: str = Query("json", pattern="^(json|collapsed)$")
+):
+    """
+    Get the profile report for a song
+    
+    format=collapsed returns folded stacks for flamegraph.pl or speedscope.
+    """
+    report = load_report(song_id)
+    
+    if not report:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "collapsed":
+        return PlainTextResponse(report["collapsed"])
+    
+    return report
+
+
+@router.post("/rescore", status_code=202)
+async def rescore_library(request: RescoreRequest):
+    """
+    Re-score every song from its stored segment features in the background
+    
+    Uses the model package at model_path if given, otherwise the serving model.
+    Poll GET /rescore for progress.
+    """
+    job = start_rescore(request.model_path)
+    
+    if job is None:
+        raise HTTPException(status_code=409, detail="A re-score is already running")
+    
+    return job.to_dict()
+
+
+@router.get("/rescore")
+async def get_rescore_status():
+    """
+    Get progress of the current or most recent re-score
+    """
+    job = get_rescore()
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="No re-score has been started")
+    
+    return job.to_dict()
+
+
+@router.get("/models")
+async def get_models():
+    """
+    Active and candidate model versions, traffic split and background load state
+    """
+    return model_registry.status()
+
+
+@router.post("/models/load", status_code=202)
+async def load_model(request: ModelLoadRequest):
+    """
+    Load and warm a model package in the background, then switch to it
+    (traffic_split 1.0) or serve it to a share of traffic as the candidate
+    
+    Poll GET /models for the load state.
+    """
+    if not Path(request.model_path).is_file():
+        raise HTTPException(status_code=400, detail="Model file not found")
+    
+    if not model_registry.load(Path(request.model_path), request.traffic_split):
+        raise HTTPException(status_code=409, detail="A model is already loading")
+    
+    return model_registry.status()
+
+
+@router.post("/models/split")
+async def set_traffic_split(request: TrafficSplitRequest):
+    """
+    Change the candidate model's share of traffic
+    """
+    try:
+        model_registry.set_split(request.traffic_split)
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return model_registry.status()
+
+
+@router.post("/models/promote")
+async def promote_model():
+    """
+    Make the candidate model active for all traffic
+    """
+    try:
+        model_registry.promote()
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return model_registry.status()
+
+
+@router.post("/models/rollback")
+async def rollback_model():
+    """
+    Drop the candidate model, or return to the previously active model
+    """
+    try:
+        model_registry.rollback()
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return model_registry.status()
+
+
+@router.get("/resources")
+async def get_resources():
+    """
+    CPU budget and effective thread settings of the worker answering the request
+    (torch, numba, BLAS thread pools and worker pool sizes)
+    """
+    return thread_report()
+
+
+@router.get("/storage")
+async def get_storage():
+    """
+    Audio store usage: blobs and bytes on disk, referencing songs, retention setting
+    """
+    return await asyncio.to_thread(_with_session, storage_stats)
+
+
+@router.post("/storage/retention")
+async def run_retention(days: int = Query(AUDIO_RETENTION_DAYS, ge=1)):
+    """
+    Drop the audio of songs older than `days` now (features are kept for re-scoring)
+    """
+    return await asyncio.to_thread(_with_session, apply_retention, days)
+
+
+def _with_session(fn, *args):
+    """Run fn(db, *args) with a new sync session"""
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
@@ -2,53 +2,48 @@
 Cluster visualization API endpoints
 """
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models.song import Song
-from app.schemas.song import SongResponse, ClusterDataResponse, Vertex
-from app.services.cluster_calculator import get_vertex_positions
+from app.database import get_async_db
+from app.schemas.song import ClusterDataResponse
+from app.services.song_serializer import cluster_data_response
 
 router = APIRouter()
 
 
 @router.get("/cluster-data", response_model=ClusterDataResponse)
-async def get_cluster_data(db: Session = Depends(get_db)):
+async def get_cluster_data(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Get all data needed for cluster visualization
-    """
-    # Get all songs
-    songs = db.query(Song).order_by(Song.created_at.desc()).all()
-    song_responses = [SongResponse.from_orm(song) for song in songs]
-    
-    # Get vertex positions
-    vertices = get_vertex_positions()
-    vertex_responses = [Vertex(**v) for v in vertices]
     
-    return ClusterDataResponse(
-        vertices=vertex_responses,
-        songs=song_responses
-    )
+    The encoded (and compressed) body is cached until the library changes;
+    send If-None-Match with the returned ETag to get a 304 when nothing changed.
+    """
+    return await cluster_data_response(request, db)
 
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """
     Health check endpoint
     """
-    from app.services.predictor import get_predictor
+    from app.services.predictor import model_registry
     
     # Check if model is loaded
     try:
-        predictor = get_predictor()
+        predictor = model_registry.active
+        model_registry.sync()
         model_loaded = predictor.model is not None
+        model_version = predictor.version
     except:
         model_loaded = False
+        model_version = None
     
     # Check database connection
     try:
-        db.execute("SELECT 1")
+        await db.execute(text("SELECT 1"))
         db_connected = True
     except:
         db_connected = False
@@ -56,5 +51,6 @@ async def health_check(db: Session = Depends(get_db)):
     return {
         "status": "ok" if (model_loaded and db_connected) else "degraded",
         "model_loaded": model_loaded,
+        "model_version": model_version,
         "db_connected": db_connected
     }
\ No newline at end of file
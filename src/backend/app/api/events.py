@@ -0,0 +1,69 @@
+"""
+Song event feed API endpoint (server-sent events)
+"""
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+
+from app.config import SONG_EVENT_KEEPALIVE
+from app.services.song_events import song_events
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_events(
+    last_event_id: Optional[int] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream library changes as server-sent events
+    
+    Events:
+    - song_added: id, title, source, genre, confidence, x, y
+    - song_deleted: id
+    - status: source, key (file name or video ID), status, song_id, error
+    - reset: the library changed too much to describe (or events were missed);
+      reload /cluster-data
+    
+    Browsers' EventSource resends the last received ID as Last-Event-ID when it
+    reconnects (or pass ?last_event_id=); buffered events after it are replayed
+    first. If they are no longer buffered, a 'reset' event comes first. Event IDs
+    are shared by all server processes, so any worker can resume the feed.
+    """
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    
+    subscription, replay, complete = song_events.subscribe(last_event_id)
+    
+    async def stream():
+        try:
+            yield f"retry: 3000\n: connected at event {song_events.last_id}\n\n"
+            if not complete:
+                yield f"id: {song_events.last_id}\nevent: reset\ndata: {{\"reason\":\"missed_events\"}}\n\n"
+            for event in replay:
+                yield event.to_sse()
+            
+            last_sent = replay[-1].id if replay else (last_event_id if complete and last_event_id else 0)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), SONG_EVENT_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                if event is None or subscription.overflowed:
+                    return  # Too slow: the client reconnects and replays from its last ID
+                if event.id > last_sent:
+                    last_sent = event.id
+                    yield event.to_sse()
+        finally:
+            song_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
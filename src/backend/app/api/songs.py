@@ -2,61 +2,60 @@
 Song management API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-import os
+import asyncio
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.song import Song
-from app.schemas.song import SongResponse, SongListResponse, ClusterDataResponse, Vertex
-from app.services.cluster_calculator import get_vertex_positions
+from app.models.song_features import SongFeatures
+from app.schemas.song import SongResponse, SongListResponse, ClusterDataResponse
+from app.services.song_matrix import song_matrix
+from app.services.song_serializer import songs_json, dumps, json_response, cluster_data_response
+from app.services.song_events import publish_song_deleted
+from app.services.audio_store import release, release_legacy_file
+from app.services.feature_store import forget_song_features
 
 router = APIRouter()
 
 
 @router.get("", response_model=SongListResponse)
 async def get_songs(
+    request: Request,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
     genre: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get paginated list of songs with optional genre filter
+    Get paginated list of songs with optional genre filter (served from the song matrix)
     """
-    query = db.query(Song)
+    await song_matrix.ensure_current(db)
     
-    # Apply genre filter if provided
-    if genre:
-        query = query.filter(Song.predicted_genre == genre)
+    # Filter newest-first rows by genre if provided
+    rows = song_matrix.select(genre=genre or None)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination and ordering
-    songs = query.order_by(Song.created_at.desc()).offset(offset).limit(limit).all()
-    
-    # Convert to response format
-    song_responses = [SongResponse.from_orm(song) for song in songs]
-    
-    return SongListResponse(
-        songs=song_responses,
-        total=total,
-        limit=limit,
-        offset=offset
-    )
+    # Encode the page directly (same shape as SongListResponse)
+    body = dumps({
+        'songs': songs_json(song_matrix.rows(rows[offset:offset + limit])),
+        'total': len(rows),
+        'limit': limit,
+        'offset': offset
+    })
+    return json_response(request, body)
 
 
 @router.get("/{song_id}", response_model=SongResponse)
 async def get_song(
     song_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get specific song by ID
     """
-    song = db.query(Song).filter(Song.id == song_id).first()
+    song = await db.get(Song, song_id)
     
     if not song:
         raise HTTPException(status_code=404, detail="Song not found")
@@ -67,45 +66,41 @@ async def get_song(
 @router.delete("/{song_id}")
 async def delete_song(
     song_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a song by ID
     """
-    song = db.query(Song).filter(Song.id == song_id).first()
+    song = await db.get(Song, song_id)
     
     if not song:
         raise HTTPException(status_code=404, detail="Song not found")
     
-    # Delete audio file if it exists
-    if song.file_path and os.path.exists(song.file_path):
-        try:
-            os.remove(song.file_path)
-        except:
-            pass  # Continue even if file deletion fails
+    audio_hash, file_path = song.audio_hash, song.file_path
     
-    # Delete from database
-    db.delete(song)
-    db.commit()
+    # Delete from database (with its stored segment features)
+    await db.execute(delete(SongFeatures).where(SongFeatures.song_id == song_id))
+    await db.delete(song)
+    await db.commit()
+    publish_song_deleted(song_id)
+    await asyncio.to_thread(forget_song_features, song_id)
+    
+    # Free the audio once no other song references it
+    try:
+        if audio_hash:
+            await asyncio.to_thread(release, audio_hash)
+        else:
+            await asyncio.to_thread(release_legacy_file, file_path)
+    except Exception as e:
+        print(f"⚠️  Could not free audio of song {song_id}: {e}")  # Continue even if file deletion fails
     
     return {"success": True, "message": "Song deleted successfully"}
 
 
 @router.get("/cluster-data", response_model=ClusterDataResponse, include_in_schema=False)
-async def get_cluster_data(db: Session = Depends(get_db)):
+async def get_cluster_data(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Get all data needed for cluster visualization
     (This endpoint is at /api/songs/cluster-data due to prefix)
     """
-    # Get all songs
-    songs = db.query(Song).order_by(Song.created_at.desc()).all()
-    song_responses = [SongResponse.from_orm(song) for song in songs]
-    
-    # Get vertex positions
-    vertices = get_vertex_positions()
-    vertex_responses = [Vertex(**v) for v in vertices]
-    
-    return ClusterDataResponse(
-        vertices=vertex_responses,
-        songs=song_responses
-    )
\ No newline at end of file
+    return await cluster_data_response(request, db)
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Library statistics API endpoint
+"""
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.schemas.song import StatsResponse
+from app.services.song_matrix import song_matrix
+from app.services.song_serializer import EncodedBodyCache, dumps, json_response
+
+router = APIRouter()
+
+stats_cache = EncodedBodyCache('stats')
+
+
+@router.get("", response_model=StatsResponse)
+async def get_stats(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Genre distribution and confidence statistics of the library
+    
+    Served from running aggregates kept with the song matrix (updated as songs
+    are added and deleted, not recomputed per request). Daily buckets are UTC
+    days of song creation. Send If-None-Match with the returned ETag to get a
+    304 when nothing changed.
+    """
+    await song_matrix.ensure_current(db)
+    cached = stats_cache.get(song_matrix.version)
+    if cached is None:
+        cached = stats_cache.put(dumps(song_matrix.stats.to_dict()), song_matrix.version)
+    
+    body, etag, encoded = cached
+    return json_response(request, body, etag=etag, encoded=encoded)
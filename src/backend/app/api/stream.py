@@ -0,0 +1,166 @@
+"""
+Live stream API endpoint: real-time genre classification over WebSocket
+"""
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Optional
+import asyncio
+
+from app.config import SAMPLE_RATE, STREAM_MAX_CONNECTIONS, STREAM_MAX_MESSAGE_BYTES
+from app.services.live_stream import (
+    LiveClassifier,
+    FFmpegStreamDecoder,
+    SAMPLE_FORMATS,
+    classify_window,
+    stream_started_message
+)
+from app.services.predictor import model_registry
+from app.services.metrics import LIVE_STREAMS, LIVE_UPDATES, run_tracked
+from app.services.youtube_ingest import classify_executor
+
+router = APIRouter()
+
+_open_streams = 0
+
+
+class _StreamSession:
+    """Feeds one connection's classifier and sends at most one prediction at a time"""
+    
+    def __init__(self, websocket: WebSocket, classifier: LiveClassifier):
+        self.websocket = websocket
+        self.classifier = classifier
+        self.predictor = model_registry.choose(record=False)  # one model per stream; not a stored track
+        self.pending: Optional[asyncio.Task] = None
+    
+    def feed(self, pcm: bytes):
+        """Add PCM and start a prediction if one is due"""
+        self.classifier.feed_pcm(pcm)
+        if not self.classifier.update_due():
+            return
+        
+        if self.pending is not None and not self.pending.done():
+            # Previous window still running: drop this one rather than queue behind it
+            self.classifier.last_update = self.classifier.total
+            LIVE_UPDATES.inc(status="skipped")
+            return
+        
+        self.pending = asyncio.create_task(self._predict(self.classifier.snapshot()))
+    
+    async def _predict(self, window):
+        """Classify a snapshot on the classify pool and send the result"""
+        message = await run_tracked(classify_executor, "stream", classify_window, self.predictor, window)
+        await self.websocket.send_json(message)
+        LIVE_UPDATES.inc(status="sent")
+    
+    async def finish(self):
+        """Wait for the last prediction (errors surface here)"""
+        if self.pending is not None:
+            await self.pending
+    
+    def cancel(self):
+        """Abandon the running prediction (client gone)"""
+        if self.pending is not None:
+            self.pending.cancel()
+
+
+async def _pump_decoder(decoder: FFmpegStreamDecoder, session: _StreamSession):
+    """Feed FFmpeg's decoded output to the session until it ends"""
+    while True:
+        data = await decoder.read()
+        if not data:
+            return
+        session.feed(data)
+
+
+@router.websocket("/live")
+async def live_stream(
+    websocket: WebSocket,
+    format: str = 'f32le',
+    sample_rate: int = SAMPLE_RATE,
+    channels: int = 1
+):
+    """
+    Classify a live audio stream
+    
+    Send audio as binary messages:
+    - format=f32le or s16le: raw interleaved PCM at sample_rate with channels
+    - format=encoded: any FFmpeg-readable container/codec stream (e.g. WebM/Opus
+      from MediaRecorder, MP3)
+    
+    The server replies with a 'started' message, then a 'prediction' message
+    (genre, confidence, probabilities, decagon x/y and stream time) for the
+    latest 3 seconds each STREAM_UPDATE_INTERVAL seconds of audio. Send the
+    text message 'end' to have the server deliver the running prediction and close.
+    """
+    global _open_streams
+    await websocket.accept()
+    
+    if _open_streams >= STREAM_MAX_CONNECTIONS:
+        await websocket.close(code=1013, reason="Too many live streams, try again later")
+        return
+    
+    try:
+        if format == 'encoded':
+            classifier = LiveClassifier(SAMPLE_RATE, 1, 'f32le')
+        elif format in SAMPLE_FORMATS:
+            classifier = LiveClassifier(sample_rate, channels, format)
+        else:
+            raise Exception(f"Unsupported format: {format}")
+        session = _StreamSession(websocket, classifier)
+    except Exception as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+    
+    _open_streams += 1
+    LIVE_STREAMS.inc()
+    decoder = None
+    pump = None
+    try:
+        if format == 'encoded':
+            decoder = FFmpegStreamDecoder()
+            await decoder.start()
+            pump = asyncio.create_task(_pump_decoder(decoder, session))
+        
+        await websocket.send_json(stream_started_message(classifier, format))
+        
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            data = message.get("bytes")
+            if data is None:
+                if message.get("text") == "end":
+                    break
+                continue
+            if len(data) > STREAM_MAX_MESSAGE_BYTES:
+                await websocket.close(code=1009, reason="Audio chunk too large")
+                return
+            
+            if decoder is not None:
+                await decoder.write(data)
+            else:
+                session.feed(data)
+        
+        if decoder is not None:
+            await decoder.close()
+            await pump
+        await session.finish()
+        await websocket.close()
+    
+    except WebSocketDisconnect:
+        session.cancel()
+    except Exception as e:
+        print(f"❌ Live stream error: {str(e)}")
+        session.cancel()
+        try:
+            await websocket.close(code=1011, reason=str(e)[:120])
+        except Exception:
+            pass
+    finally:
+        if pump is not None:
+            pump.cancel()
+        if decoder is not None:
+            await decoder.kill()
+        _open_streams -= 1
+        LIVE_STREAMS.dec()
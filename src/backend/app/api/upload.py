@@ -2,32 +2,71 @@
 Upload API endpoints for MP3 files and YouTube URLs
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
-import shutil
-import os
+from typing import Callable, Optional
+import asyncio
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.song import Song
-from app.schemas.song import SongResponse, YouTubeUploadRequest
+from app.schemas.song import SongResponse, YouTubeUploadRequest, YouTubeBatchRequest, BatchStatusResponse
 from app.services.audio_processor import extract_features, get_audio_duration
 from app.services.predictor import get_predictor
-from app.services.cluster_calculator import calculate_decagon_position
-from app.services.youtube_downloader import download_youtube_audio, validate_youtube_url
-from app.config import UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS
+from app.services.song_store import build_song, select_youtube_song
+from app.services.segment_features import build_song_features
+from app.services.feature_store import record_song_features
+from app.services.metrics import SONGS_PROCESSED, stage_timer, run_tracked
+from app.services.profiler import profile_gate
+from app.services.song_events import publish_song_added, publish_status
+from app.services.audio_store import store_stream, unpin, release
+from app.api.admin import is_admin_token
+from app.services.youtube_ingest import ingest_youtube_video, start_batch, get_batch, classify_executor
+from app.services.youtube_downloader import (
+    validate_youtube_url,
+    extract_video_id,
+    expand_playlist,
+    get_stream_provider,
+    get_playlist_provider
+)
+from app.config import MAX_FILE_SIZE, ALLOWED_EXTENSIONS, BATCH_MAX_URLS, STORE_SEGMENT_FEATURES
 
 router = APIRouter()
 
 
+def start_profiling(response: Response, x_profile: Optional[str], x_admin_token: Optional[str]):
+    """
+    Start the sampling profiler for this upload if requested (X-Profile with a
+    valid X-Admin-Token) or armed by an admin, reporting the outcome in the
+    X-Profile response header
+    
+    Returns:
+        Running SamplingProfiler, or None
+    """
+    requested = (x_profile or '').lower() in ('1', 'true', 'yes') and is_admin_token(x_admin_token)
+    profiler, status = profile_gate.begin(requested)
+    if status != 'off':
+        response.headers["X-Profile"] = status
+    return profiler
+
+
 @router.post("/mp3", response_model=SongResponse)
 async def upload_mp3(
+    response: Response,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
 ):
     """
     Upload and process an MP3 file
+    
+    Send `X-Profile: 1` with a valid `X-Admin-Token` to run the upload under
+    the sampling profiler; the report is stored under the new song's ID.
     """
+    profiler = None
+    song = None
+    stored = None
     try:
         # Validate file extension
         file_ext = Path(file.filename).suffix.lower()
@@ -48,76 +87,107 @@ async def upload_mp3(
                 detail=f"File too large. Max size: {MAX_FILE_SIZE / 1024 / 1024}MB"
             )
         
-        # Save uploaded file
-        file_path = UPLOAD_DIR / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get audio duration
-        try:
-            duration = get_audio_duration(str(file_path))
-        except:
-            duration = None
+        # Store the audio once per distinct content (pinned until the song is committed)
+        stored = await asyncio.to_thread(store_stream, file.file, file_ext)
+        file_path = stored.path
         
-        # Predict genre using multi-segment analysis (10 segments for better accuracy)
+        # Run duration probe and prediction off the event loop
+        publish_status('upload', file.filename, 'classifying')
         predictor = get_predictor()
-        predicted_genre, confidence, probabilities = predictor.predict_multi_segment(
-            str(file_path),
-            num_segments=5
+        profiler = start_profiling(response, x_profile, x_admin_token)
+        job = profiler.wrap(classify_file) if profiler else classify_file
+        duration, (predicted_genre, confidence, probabilities), segments = await run_tracked(
+            classify_executor, "classify", job, str(file_path), predictor
         )
         
-        # Calculate position
-        cluster_x, cluster_y = calculate_decagon_position(probabilities)
-        
-        # Get probability dict
-        prob_dict = predictor.get_probabilities_dict(probabilities)
-        
         # Create database entry
-        song = Song(
+        song = build_song(
+            predictor,
+            predicted_genre,
+            confidence,
+            probabilities,
             title=Path(file.filename).stem,
             source='upload',
-            file_path=str(file_path),
-            duration=duration,
-            predicted_genre=predicted_genre,
-            confidence=confidence,
-            prob_blues=prob_dict['blues'],
-            prob_classical=prob_dict['classical'],
-            prob_country=prob_dict['country'],
-            prob_disco=prob_dict['disco'],
-            prob_hiphop=prob_dict['hiphop'],
-            prob_jazz=prob_dict['jazz'],
-            prob_metal=prob_dict['metal'],
-            prob_pop=prob_dict['pop'],
-            prob_reggae=prob_dict['reggae'],
-            prob_rock=prob_dict['rock'],
-            cluster_x=cluster_x,
-            cluster_y=cluster_y,
-            processing_status='completed'
+            file_path=file_path,
+            audio_hash=stored.digest,
+            duration=duration
         )
         
         db.add(song)
-        db.commit()
-        db.refresh(song)
+        with stage_timer("db_commit"):
+            if STORE_SEGMENT_FEATURES and segments:
+                await db.flush()
+                db.add(build_song_features(song.id, segments))
+            await db.commit()
+        await db.refresh(song)
+        await asyncio.to_thread(record_song_features, song, segments)
         
+        SONGS_PROCESSED.inc(source='upload', status='completed')
+        publish_status('upload', file.filename, 'completed', song_id=song.id)
+        publish_song_added(song)
         return SongResponse.from_orm(song)
     
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up file if processing failed
-        if file_path.exists():
-            os.remove(file_path)
+        SONGS_PROCESSED.inc(source='upload', status='failed')
+        publish_status('upload', file.filename, 'failed', error=str(e))
+        # Free the audio if processing failed and no other song uses it
+        if stored is not None:
+            await asyncio.to_thread(unpin, stored.digest)
+            await asyncio.to_thread(release, stored.digest)
+            stored = None
         raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        if stored is not None:
+            await asyncio.to_thread(unpin, stored.digest)
+        if profiler is not None:
+            await asyncio.to_thread(profile_gate.finish, profiler, song.id if song is not None else None)
+
+
+def classify_file(file_path: str, predictor):
+    """
+    Get duration and multi-segment prediction for a stored file (runs in a worker thread)
+    
+    Args:
+        file_path: Stored upload
+        predictor: GenrePredictor chosen for this upload
+    
+    Returns:
+        Tuple of (duration, (predicted_genre, confidence, probabilities), segments)
+    """
+    # Get audio duration
+    try:
+        duration = get_audio_duration(file_path)
+    except:
+        duration = None
+    
+    # Predict genre from multiple segments (adaptive or fixed count, see SEGMENT_SAMPLING)
+    segments = []
+    prediction = predictor.predict_track(file_path, segments=segments)
+    
+    return duration, prediction, segments
 
 
 @router.post("/youtube", response_model=SongResponse)
 async def upload_youtube(
     request: YouTubeUploadRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    provider: Callable = Depends(get_stream_provider),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
 ):
     """
     Download and process audio from YouTube URL
+    
+    Videos that were already processed are returned from the database without
+    touching the network, and concurrent requests for the same video share one job.
+    Profiling works as for /mp3 (only when this request starts the job).
     """
+    profiler = None
+    song_id = None
     try:
         # Validate YouTube URL
         if not validate_youtube_url(request.url):
@@ -126,62 +196,82 @@ async def upload_youtube(
                 detail="Invalid YouTube URL"
             )
         
-        # Download audio
-        audio_path, video_title = download_youtube_audio(request.url)
-        
-        # Get audio duration
-        try:
-            duration = get_audio_duration(audio_path)
-        except:
-            duration = None
-        
-        # Predict genre using multi-segment analysis (10 segments for better accuracy)
-        predictor = get_predictor()
-        predicted_genre, confidence, probabilities = predictor.predict_multi_segment(
-            audio_path,
-            num_segments=5
-        )
-        
-        # Calculate position
-        cluster_x, cluster_y = calculate_decagon_position(probabilities)
+        video_id = extract_video_id(request.url)
+        if video_id is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Could not determine YouTube video ID from URL"
+            )
         
-        # Get probability dict
-        prob_dict = predictor.get_probabilities_dict(probabilities)
+        # Return the existing result if this video was already processed
+        result = await db.execute(select_youtube_song(video_id))
+        song = result.scalars().first()
         
-        # Create database entry
-        song = Song(
-            title=video_title,
-            source='youtube',
-            source_url=request.url,
-            file_path=audio_path,
-            duration=duration,
-            predicted_genre=predicted_genre,
-            confidence=confidence,
-            prob_blues=prob_dict['blues'],
-            prob_classical=prob_dict['classical'],
-            prob_country=prob_dict['country'],
-            prob_disco=prob_dict['disco'],
-            prob_hiphop=prob_dict['hiphop'],
-            prob_jazz=prob_dict['jazz'],
-            prob_metal=prob_dict['metal'],
-            prob_pop=prob_dict['pop'],
-            prob_reggae=prob_dict['reggae'],
-            prob_rock=prob_dict['rock'],
-            cluster_x=cluster_x,
-            cluster_y=cluster_y,
-            processing_status='completed'
-        )
-        
-        db.add(song)
-        db.commit()
-        db.refresh(song)
+        if song is not None:
+            SONGS_PROCESSED.inc(source='youtube', status='cached')
+        else:
+            def start_profiler():
+                # Only called if this request starts the job (not when joining one in flight)
+                nonlocal profiler
+                profiler = start_profiling(response, x_profile, x_admin_token)
+                return profiler
+            
+            song_id = await ingest_youtube_video(request.url, video_id, provider, start_profiler=start_profiler)
+            song = await db.get(Song, song_id)
         
         return SongResponse.from_orm(song)
     
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up file if processing failed
-        if 'audio_path' in locals() and Path(audio_path).exists():
-            os.remove(audio_path)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        if profiler is not None:
+            await asyncio.to_thread(profile_gate.finish, profiler, song_id)
+
+
+@router.post("/youtube/batch", response_model=BatchStatusResponse, status_code=202)
+async def upload_youtube_batch(
+    request: YouTubeBatchRequest,
+    provider: Callable = Depends(get_stream_provider),
+    playlist_provider: Callable = Depends(get_playlist_provider)
+):
+    """
+    Queue many YouTube URLs and/or a playlist for background processing
+    
+    Poll GET /youtube/batch/{batch_id} for per-item progress and song IDs.
+    """
+    urls = list(request.urls)
+    
+    # Expand playlist
+    if request.playlist_url:
+        try:
+            urls.extend(await asyncio.to_thread(expand_playlist, request.playlist_url, playlist_provider))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs provided")
+    
+    if len(urls) > BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs. Max per batch: {BATCH_MAX_URLS}"
+        )
+    
+    job = await start_batch(urls, provider)
+    return BatchStatusResponse.from_job(job)
+
+
+@router.get("/youtube/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_youtube_batch(batch_id: str):
+    """
+    Get progress and results of a batch YouTube upload
+    """
+    job = await get_batch(batch_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return BatchStatusResponse.from_job(job)
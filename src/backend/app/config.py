@@ -8,13 +8,23 @@ from pathlib import Path
 # Base directories
 BASE_DIR = Path(__file__).resolve().parent.parent
 ML_MODELS_DIR = BASE_DIR / "ml_models"
-UPLOAD_DIR = BASE_DIR / "uploads"
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", str(BASE_DIR / "uploads")))
 
 # Ensure upload directory exists
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Content-addressed audio store (see app.services.audio_store)
+AUDIO_STORE_DIR = Path(os.getenv("AUDIO_STORE_DIR", str(UPLOAD_DIR / "objects")))
+# Drop the audio (keeping extracted features) of songs older than this many days (0 = keep forever)
+AUDIO_RETENTION_DAYS = int(os.getenv("AUDIO_RETENTION_DAYS", "0"))
+AUDIO_RETENTION_INTERVAL = 6 * 3600  # seconds between retention sweeps
+
 # Model settings
 MODEL_PATH = ML_MODELS_DIR / "pytorch_genre_classifier_best.pkl"
+# Model swaps made through the admin API are written here and picked up by every
+# server process (and after a restart); delete the file to return to MODEL_PATH
+MODEL_STATE_PATH = Path(os.getenv("MODEL_STATE_PATH", str(BASE_DIR / "model_state.json")))
+MODEL_SYNC_INTERVAL = 2.0  # seconds between checks of MODEL_STATE_PATH
 
 # File upload settings
 MAX_FILE_SIZE = 52428800  # 50MB in bytes
@@ -24,8 +34,114 @@ ALLOWED_EXTENSIONS = {".mp3", ".wav"}
 AUDIO_DURATION = 3  # seconds
 SAMPLE_RATE = 22050  # Hz
 
+# Audio decoding: 'soundfile' (libsndfile + soxr, falls back to FFmpeg for other formats),
+# 'ffmpeg' (decode, downmix and resample in one FFmpeg pass) or 'librosa' (librosa.load)
+AUDIO_DECODER = os.getenv("AUDIO_DECODER", "soundfile")
+RESAMPLE_QUALITY = os.getenv("RESAMPLE_QUALITY", "hq")  # vhq, hq (as librosa.load), mq or lq
+
+# HPSS features: 'exact' gives the same values as librosa.effects.hpss (as in training),
+# 'fast' uses shorter median filters, which is quicker but shifts the values
+# (validate with `python -m benchmarks.validate_hpss` before switching)
+HPSS_MODE = os.getenv("HPSS_MODE", "exact")
+HPSS_FAST_KERNEL = int(os.getenv("HPSS_FAST_KERNEL", "17"))  # median filter length in fast mode (exact: 31)
+
+# Tempo feature: 'segment' estimates each segment's tempo on its own (as in training),
+# 'song' estimates one tempo over all analyzed segments of a track and gives it to each
+TEMPO_SCOPE = os.getenv("TEMPO_SCOPE", "segment")
+
+# Segment sampling: 'adaptive' stops once the averaged prediction is settled,
+# 'fixed' always analyzes FIXED_SEGMENTS evenly spaced segments
+SEGMENT_SAMPLING = os.getenv("SEGMENT_SAMPLING", "adaptive")
+FIXED_SEGMENTS = 5
+ADAPTIVE_MIN_SEGMENTS = 3  # always analyze at least this many
+ADAPTIVE_MAX_SEGMENTS = 12  # cap for ambiguous tracks
+ADAPTIVE_MIN_MARGIN = 0.15  # top genre must lead the runner-up by this much (averaged probabilities)
+ADAPTIVE_LEAD_Z = 2.0  # ...and by this many standard errors of the per-segment lead
+
+# Store per-segment feature vectors so songs can be re-scored by a new model without re-decoding
+STORE_SEGMENT_FEATURES = os.getenv("STORE_SEGMENT_FEATURES", "true").lower() == "true"
+RESCORE_BATCH_SONGS = 500  # songs loaded and scored per re-score step
+
+# Library-wide memory-mapped feature store for offline analysis (see app/services/feature_store.py)
+FEATURE_STORE_ENABLED = os.getenv("FEATURE_STORE", "true").lower() == "true"
+FEATURE_STORE_DIR = Path(os.getenv("FEATURE_STORE_DIR", str(BASE_DIR / "feature_store")))
+FEATURE_STORE_COMPACT_RATIO = 0.25  # compact once this fraction of stored segments belongs to deleted songs
+
+# YouTube settings
+# Keep an MP3 copy of downloaded YouTube audio (encoded in the background)
+YOUTUBE_ARCHIVE_MP3 = os.getenv("YOUTUBE_ARCHIVE_MP3", "true").lower() == "true"
+YOUTUBE_DOWNLOAD_CONCURRENCY = int(os.getenv("YOUTUBE_DOWNLOAD_CONCURRENCY", "4"))  # parallel downloads
+CLASSIFY_WORKERS = int(os.getenv("CLASSIFY_WORKERS", "2"))  # parallel decode + classify jobs
+
+# Live stream settings (WebSocket /api/stream/live)
+STREAM_UPDATE_INTERVAL = float(os.getenv("STREAM_UPDATE_INTERVAL", "1.0"))  # seconds of audio between predictions
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "64"))  # concurrent streams per server process
+STREAM_MAX_MESSAGE_BYTES = 1048576  # largest audio chunk accepted in one message (1MB)
+
+# Song event feed settings (server-sent events at /api/events)
+SONG_EVENT_BUFFER = int(os.getenv("SONG_EVENT_BUFFER", "1000"))  # recent events kept for replay on reconnect
+SONG_EVENT_QUEUE_SIZE = 256  # undelivered events per client before it is disconnected to catch up by replay
+SONG_EVENT_KEEPALIVE = 15.0  # seconds between keepalive comments on an idle feed
+# Event log shared by all server processes (gives events one global ID order)
+SONG_EVENT_LOG = Path(os.getenv("SONG_EVENT_LOG", str(BASE_DIR / "song_events.log")))
+SONG_EVENT_POLL = 0.25  # seconds between checks for events published by other processes
+
+# CPU budget settings (see app.services.resources)
+WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))  # server processes sharing this machine's CPUs (gunicorn.conf.py exports its default)
+CPU_LIMIT = os.getenv("CPU_LIMIT")  # override the detected CPU count (affinity / cgroup quota)
+THREADS_PER_JOB = os.getenv("THREADS_PER_JOB")  # override threads per classify job (torch, BLAS, numba)
+
+# Response encoding settings (see app.services.song_serializer)
+COMPRESS_MIN_BYTES = 1024  # smaller JSON bodies are sent uncompressed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # used when the optional brotli package is installed
+
+# In-memory song matrix (see app.services.song_matrix)
+# With several server processes, each compares its song count and newest ID
+# with the database at most every SONG_MATRIX_CHECK seconds and reloads when
+# another process added or deleted songs; a full reload every
+# SONG_MATRIX_REFRESH seconds also picks up re-scores (0 = never, for a single process)
+SONG_MATRIX_CHECK = float(os.getenv("SONG_MATRIX_CHECK", "0" if WEB_WORKERS == 1 else "1"))
+SONG_MATRIX_REFRESH = float(os.getenv("SONG_MATRIX_REFRESH", "0" if WEB_WORKERS == 1 else "60"))
+STATS_CONFIDENCE_BINS = 20  # confidence histogram bins of /api/stats
+
+# Batch ingestion settings
+BATCH_MAX_URLS = 1000  # max URLs (after playlist expansion) per batch
+BATCH_HISTORY_SIZE = 50  # finished batches kept for status polling
+# Batch progress, one JSON file per batch, readable by every server process
+BATCH_DIR = Path(os.getenv("BATCH_DIR", str(UPLOAD_DIR / "batches")))
+BATCH_SAVE_INTERVAL = 1.0  # seconds between progress writes of a running batch
+
 # Database settings
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./soundscape.db")
+# Async driver URL used by the API routers (derived from DATABASE_URL if unset)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+# 'development' keeps driver defaults, 'production' enables the tuning below
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "development")
+
+# Production profile: connection pool sizing
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+
+# Production profile: SQLite pragmas applied on every new connection
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # readers don't block the writer and vice versa
+    "synchronous": "NORMAL",  # durable at checkpoints, safe with WAL
+    "cache_size": -65536,  # 64 MB page cache (negative = KiB)
+    "mmap_size": 268435456,  # 256 MB memory-mapped reads
+    "busy_timeout": 5000,  # wait up to 5s for the write lock instead of failing
+    "temp_store": "MEMORY",
+}
+
+# Admin settings
+# Token required in the X-Admin-Token header for /api/admin endpoints (unset = admin disabled)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Profiling settings
+PROFILE_DIR = BASE_DIR / "profiles"  # stored reports, one JSON file per song ID
+PROFILE_MIN_INTERVAL = 60  # seconds between profiled uploads
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
 
 # API settings
 API_V1_PREFIX = "/api"
@@ -2,20 +2,126 @@
 Database setup and connection
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL
-
-# Create SQLAlchemy engine
-engine = create_engine(
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.config import (
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    ASYNC_DATABASE_URL,
+    DATABASE_PROFILE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    SQLITE_PRAGMAS
 )
 
-# Create SessionLocal class
+# Async drivers for the sync URL schemes we support
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a sync database URL to its async-driver equivalent
+    
+    Args:
+        url: SQLAlchemy URL, e.g. sqlite:///./soundscape.db
+    
+    Returns:
+        URL using the async driver, e.g. sqlite+aiosqlite:///./soundscape.db
+    """
+    scheme, sep, rest = url.partition("://")
+    if scheme not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database URL scheme '{scheme}'")
+    return f"{ASYNC_DRIVERS[scheme]}{sep}{rest}"
+
+
+def _is_sqlite(url: str) -> bool:
+    """Whether the URL points at SQLite"""
+    return url.startswith("sqlite")
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    """Whether the URL is an in-memory SQLite database"""
+    return _is_sqlite(url) and (":memory:" in url or url.split("://", 1)[1] in ("", "/"))
+
+
+def _pool_options(url: str, profile: str, poolclass) -> dict:
+    """Pool sizing for the production profile (in-memory SQLite keeps its single connection)"""
+    if profile != "production" or _is_sqlite_memory(url):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+def _configure_sqlite(sync_engine, url: str, profile: str):
+    """Apply SQLITE_PRAGMAS to every new connection for the production profile"""
+    if profile != "production" or not _is_sqlite(url):
+        return
+    
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def build_engine(url: str, profile: str = DATABASE_PROFILE):
+    """
+    Create a sync engine for a database URL
+    
+    Args:
+        url: SQLAlchemy URL
+        profile: 'development' (driver defaults) or 'production' (pragmas + pool sizing)
+    
+    Returns:
+        SQLAlchemy Engine
+    """
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if _is_sqlite(url) else {},
+        **_pool_options(url, profile, QueuePool)
+    )
+    _configure_sqlite(new_engine, url, profile)
+    return new_engine
+
+
+def build_async_engine(url: str, profile: str = DATABASE_PROFILE):
+    """
+    Create an async engine for an async-driver database URL
+    
+    Args:
+        url: SQLAlchemy URL using an async driver
+        profile: 'development' (driver defaults) or 'production' (pragmas + pool sizing)
+    
+    Returns:
+        SQLAlchemy AsyncEngine
+    """
+    new_engine = create_async_engine(url, **_pool_options(url, profile, AsyncAdaptedQueuePool))
+    _configure_sqlite(new_engine.sync_engine, url, profile)
+    return new_engine
+
+
+# Create SQLAlchemy engine
+engine = build_engine(DATABASE_URL)
+
+# Create SessionLocal class (used by background worker threads)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine and session class (used by the API routers)
+async_engine = build_async_engine(ASYNC_DATABASE_URL or to_async_url(DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -31,8 +137,37 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency to get async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables():
     """
     Create all tables in the database
     """
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+
+def _add_missing_columns():
+    """
+    Add nullable columns (and their indexes) that were introduced after a
+    table was first created, since create_all() never alters existing tables
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
\ No newline at end of file
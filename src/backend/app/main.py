@@ -2,13 +2,21 @@
 FastAPI Main Application
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import time
 
-from app.config import API_V1_PREFIX, CORS_ORIGINS
-from app.database import create_tables
-from app.api import upload, songs, cluster
+from app.config import API_V1_PREFIX, CORS_ORIGINS, AUDIO_RETENTION_DAYS
+
+# Thread limits must be in the environment before numpy/torch/numba load
+from app.services.resources import apply_thread_budget
+apply_thread_budget()
+
+from app.database import create_tables, async_engine
+from app.api import upload, songs, cluster, metrics, admin, stream, events, stats
+from app.services.metrics import HTTP_REQUEST_SECONDS
 
 
 @asynccontextmanager
@@ -23,10 +31,26 @@ async def lifespan(app: FastAPI):
     print("📊 Creating database tables...")
     create_tables()
     
+    # Load the in-memory song matrix
+    from app.database import SessionLocal
+    from app.services.song_matrix import song_matrix
+    db = SessionLocal()
+    try:
+        print(f"🧮 Song matrix loaded: {song_matrix.load_sync(db)} songs")
+    finally:
+        db.close()
+    
     # Load ML model
     print("🤖 Loading ML model...")
-    from app.services.predictor import get_predictor
-    get_predictor()  # This will load the model
+    from app.services.predictor import model_registry
+    model_registry.active  # This will load the model
+    
+    # Start the audio retention sweep
+    retention_task = None
+    if AUDIO_RETENTION_DAYS > 0:
+        from app.services.audio_store import retention_loop
+        retention_task = asyncio.create_task(retention_loop())
+        print(f"🧹 Audio retention: {AUDIO_RETENTION_DAYS} days")
     
     print("✓ Backend ready!")
     
@@ -34,6 +58,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("👋 Shutting down...")
+    if retention_task is not None:
+        retention_task.cancel()
+    await async_engine.dispose()
 
 
 # Create FastAPI app
@@ -53,10 +80,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record request latency per route for /metrics"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=str(response.status_code)
+    )
+    return response
+
+
 # Include routers
 app.include_router(upload.router, prefix=f"{API_V1_PREFIX}/upload", tags=["Upload"])
 app.include_router(songs.router, prefix=f"{API_V1_PREFIX}/songs", tags=["Songs"])
 app.include_router(cluster.router, prefix=f"{API_V1_PREFIX}", tags=["Cluster"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(admin.router, prefix=f"{API_V1_PREFIX}/admin", tags=["Admin"])
+app.include_router(stream.router, prefix=f"{API_V1_PREFIX}/stream", tags=["Stream"])
+app.include_router(events.router, prefix=f"{API_V1_PREFIX}/events", tags=["Events"])
+app.include_router(stats.router, prefix=f"{API_V1_PREFIX}/stats", tags=["Stats"])
 
 
 @app.get("/")
@@ -3,5 +3,6 @@ Models package
 """
 
 from app.models.song import Song
+from app.models.song_features import SongFeatures
 
-__all__ = ['Song']
\ No newline at end of file
+__all__ = ['Song', 'SongFeatures']
\ No newline at end of file
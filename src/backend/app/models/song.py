@@ -12,7 +12,7 @@ class Song(Base):
     Song model for storing uploaded songs and their predictions
     """
     __tablename__ = "songs"
-
+    
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
     
@@ -20,13 +20,16 @@ class Song(Base):
     title = Column(String(255), nullable=False)
     source = Column(String(20), nullable=False)  # 'upload' or 'youtube'
     source_url = Column(Text, nullable=True)  # YouTube URL if applicable
-    file_path = Column(Text, nullable=True)  # Path to stored audio file
+    video_id = Column(String(20), nullable=True, index=True)  # Normalized YouTube video ID
+    file_path = Column(Text, nullable=True)  # Path to stored audio file (None once expired by retention)
+    audio_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the audio blob in the audio store
     duration = Column(Float, nullable=True)  # Song duration in seconds
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Model Predictions
     predicted_genre = Column(String(50), nullable=False)
     confidence = Column(Float, nullable=False)
+    model_version = Column(String(64), nullable=True, index=True)  # GenrePredictor.version that scored the song
     
     # Genre Probabilities (0.0 to 1.0)
     prob_blues = Column(Float, nullable=False)
@@ -0,0 +1,23 @@
+"""
+Per-segment feature storage for re-scoring songs without re-decoding audio
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SongFeatures(Base):
+    """
+    Raw 58-d feature vectors of every analyzed segment of a song
+    
+    Arrays are stored as little-endian float32 bytes (see app.services.segment_features).
+    """
+    __tablename__ = "song_features"
+    
+    song_id = Column(Integer, ForeignKey("songs.id", ondelete="CASCADE"), primary_key=True)
+    layout = Column(String(20), nullable=False)  # feature column order, see FEATURE_LAYOUT
+    num_segments = Column(Integer, nullable=False)
+    offsets = Column(LargeBinary, nullable=False)  # (num_segments,) segment start times in seconds
+    features = Column(LargeBinary, nullable=False)  # (num_segments, 58) raw (unscaled) features
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -6,6 +6,12 @@ from app.schemas.song import (
     SongResponse,
     SongListResponse,
     YouTubeUploadRequest,
+    YouTubeBatchRequest,
+    RescoreRequest,
+    ModelLoadRequest,
+    TrafficSplitRequest,
+    BatchItemResponse,
+    BatchStatusResponse,
     ClusterDataResponse,
     HealthResponse,
     GenreProbabilities,
@@ -17,6 +23,12 @@ __all__ = [
     'SongResponse',
     'SongListResponse',
     'YouTubeUploadRequest',
+    'YouTubeBatchRequest',
+    'RescoreRequest',
+    'ModelLoadRequest',
+    'TrafficSplitRequest',
+    'BatchItemResponse',
+    'BatchStatusResponse',
     'ClusterDataResponse',
     'HealthResponse',
     'GenreProbabilities',
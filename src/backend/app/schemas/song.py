@@ -44,6 +44,34 @@ class YouTubeUploadRequest(BaseModel):
     url: str = Field(..., description="YouTube video URL")
 
 
+class YouTubeBatchRequest(BaseModel):
+    """Schema for batch YouTube upload (list of URLs and/or a playlist)"""
+    urls: list[str] = Field(default_factory=list, description="YouTube video URLs")
+    playlist_url: Optional[str] = Field(None, description="YouTube playlist URL to expand")
+
+
+class ModelLoadRequest(BaseModel):
+    """Schema for loading a new model version"""
+    model_path: str = Field(..., description="Model package to load")
+    traffic_split: float = Field(1.0, ge=0.0, le=1.0, description="Share of traffic once warm (1.0 = switch fully)")
+    
+    class Config:
+        protected_namespaces = ()
+
+
+class TrafficSplitRequest(BaseModel):
+    """Schema for changing the candidate model's share of traffic"""
+    traffic_split: float = Field(..., ge=0.0, le=1.0)
+
+
+class RescoreRequest(BaseModel):
+    """Schema for re-scoring the library with a model"""
+    model_path: Optional[str] = Field(None, description="Model package to score with (default: serving model)")
+    
+    class Config:
+        protected_namespaces = ()
+
+
 class SongResponse(BaseModel):
     """Schema for song response"""
     id: int
@@ -52,6 +80,7 @@ class SongResponse(BaseModel):
     source_url: Optional[str] = None
     predicted_genre: str
     confidence: float
+    model_version: Optional[str] = None
     probabilities: GenreProbabilities
     position: Position
     created_at: datetime
@@ -59,6 +88,7 @@ class SongResponse(BaseModel):
     
     class Config:
         from_attributes = True
+        protected_namespaces = ()
     
     @classmethod
     def from_orm(cls, song):
@@ -70,6 +100,7 @@ class SongResponse(BaseModel):
             source_url=song.source_url,
             predicted_genre=song.predicted_genre,
             confidence=song.confidence,
+            model_version=song.model_version,
             probabilities=GenreProbabilities(
                 blues=song.prob_blues,
                 classical=song.prob_classical,
@@ -114,8 +145,84 @@ class ClusterDataResponse(BaseModel):
     songs: list[SongResponse]
 
 
+class GenreStats(BaseModel):
+    """Songs predicted as one genre"""
+    count: int
+    mean_confidence: Optional[float] = None
+
+
+class ConfidenceStats(BaseModel):
+    """Confidence distribution over the library"""
+    mean: Optional[float] = None
+    bin_edges: list[float]
+    histogram: list[int]
+
+
+class DailyStats(BaseModel):
+    """Songs created on one UTC day"""
+    date: str
+    count: int
+    mean_confidence: float
+    genres: Dict[str, int]
+
+
+class StatsResponse(BaseModel):
+    """Schema for library statistics"""
+    total: int
+    genres: Dict[str, GenreStats]
+    confidence: ConfidenceStats
+    mean_probabilities: GenreProbabilities
+    daily: list[DailyStats]
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     model_loaded: bool
-    db_connected: bool
\ No newline at end of file
+    model_version: Optional[str] = None
+    db_connected: bool
+    
+    class Config:
+        protected_namespaces = ()
+
+
+class BatchItemResponse(BaseModel):
+    """Progress of one URL in a batch"""
+    url: str
+    video_id: Optional[str] = None
+    status: str  # 'queued', 'downloading', 'classifying', 'completed', 'cached' or 'failed'
+    song_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchStatusResponse(BaseModel):
+    """Schema for batch YouTube upload progress"""
+    batch_id: str
+    status: str  # 'running' or 'completed'
+    total: int
+    counts: Dict[str, int]
+    items: list[BatchItemResponse]
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_job(cls, job):
+        """Convert a BatchJob to Pydantic schema"""
+        return cls(
+            batch_id=job.id,
+            status=job.status,
+            total=len(job.items),
+            counts=job.counts(),
+            items=[
+                BatchItemResponse(
+                    url=item.url,
+                    video_id=item.video_id,
+                    status=item.status,
+                    song_id=item.song_id,
+                    error=item.error
+                )
+                for item in job.items
+            ],
+            created_at=job.created_at,
+            finished_at=job.finished_at
+        )
\ No newline at end of file
@@ -5,8 +5,38 @@ Extracts 58 audio features from MP3/WAV files using librosa
 
 import librosa
 import numpy as np
-from typing import Dict
-from app.config import AUDIO_DURATION, SAMPLE_RATE
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.config import AUDIO_DURATION, SAMPLE_RATE, HPSS_MODE, HPSS_FAST_KERNEL
+from app.services.audio_decoder import decode_audio
+from app.services.metrics import stage_timer
+
+# Canonical feature order (as extracted), independent of any model's feature_columns
+FEATURE_NAMES = (
+    ['length']
+    + [f'{name}_{stat}' for name in (
+        'chroma_stft', 'rms', 'spectral_centroid', 'spectral_bandwidth', 'rolloff', 'zero_crossing_rate'
+    ) for stat in ('mean', 'var')]
+    + ['harmony_mean', 'harmony_var', 'perceptr_mean', 'perceptr_var', 'tempo']
+    + [f'mfcc{i}_{stat}' for i in range(1, 21) for stat in ('mean', 'var')]
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+NUM_FEATURES = len(FEATURE_NAMES)
+TEMPO_COLUMN = FEATURE_INDEX['tempo']
+
+# First column of each mean/var pair (HPSS: four columns, MFCCs: 20 interleaved pairs)
+_CHROMA, _RMS, _CENTROID, _BANDWIDTH, _ROLLOFF, _ZCR, _HPSS, _MFCC = (
+    FEATURE_INDEX[name] for name in (
+        'chroma_stft_mean', 'rms_mean', 'spectral_centroid_mean', 'spectral_bandwidth_mean',
+        'rolloff_mean', 'zero_crossing_rate_mean', 'harmony_mean', 'mfcc1_mean'
+    )
+)
+
+# One STFT (librosa's default settings) feeds every spectral feature
+N_FFT = 2048
+HOP_LENGTH = 512
+HPSS_KERNEL = 31  # median filter length of librosa.effects.hpss
+TEMPO_AC_SIZE = 8.0  # seconds, autocorrelation window of librosa.feature.tempo
 
 
 def extract_features(audio_path: str, duration: int = AUDIO_DURATION) -> Dict[str, float]:
@@ -22,66 +52,250 @@ def extract_features(audio_path: str, duration: int = AUDIO_DURATION) -> Dict[st
     """
     try:
         # Load audio
-        y, sr = librosa.load(audio_path, duration=duration, sr=SAMPLE_RATE)
-        
-        features = {}
-        
-        # 0. Length (sample count, not duration!)
-        features['length'] = len(y)
-        
-        # 1. Chroma STFT
-        chroma_stft = librosa.feature.chroma_stft(y=y, sr=sr)
-        features['chroma_stft_mean'] = np.mean(chroma_stft)
-        features['chroma_stft_var'] = np.var(chroma_stft)
-        
-        # 2. RMS Energy
-        rms = librosa.feature.rms(y=y)
-        features['rms_mean'] = np.mean(rms)
-        features['rms_var'] = np.var(rms)
-        
-        # 3. Spectral Centroid
-        spec_cent = librosa.feature.spectral_centroid(y=y, sr=sr)
-        features['spectral_centroid_mean'] = np.mean(spec_cent)
-        features['spectral_centroid_var'] = np.var(spec_cent)
-        
-        # 4. Spectral Bandwidth
-        spec_bw = librosa.feature.spectral_bandwidth(y=y, sr=sr)
-        features['spectral_bandwidth_mean'] = np.mean(spec_bw)
-        features['spectral_bandwidth_var'] = np.var(spec_bw)
-        
-        # 5. Rolloff
-        rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)
-        features['rolloff_mean'] = np.mean(rolloff)
-        features['rolloff_var'] = np.var(rolloff)
-        
-        # 6. Zero Crossing Rate
-        zcr = librosa.feature.zero_crossing_rate(y)
-        features['zero_crossing_rate_mean'] = np.mean(zcr)
-        features['zero_crossing_rate_var'] = np.var(zcr)
-        
-        # 7. Harmony and Perceptr
-        y_harm, y_perc = librosa.effects.hpss(y)
-        features['harmony_mean'] = np.mean(y_harm)
-        features['harmony_var'] = np.var(y_harm)
-        features['perceptr_mean'] = np.mean(y_perc)
-        features['perceptr_var'] = np.var(y_perc)
-        
-        # 8. Tempo
-        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-        features['tempo'] = float(tempo.item() if isinstance(tempo, np.ndarray) else tempo)
+        with stage_timer("decode"):
+            y = decode_audio(audio_path, sr=SAMPLE_RATE, duration=duration)
         
-        # 9. MFCCs (20 coefficients)
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=20)
-        for i in range(1, 21):
-            features[f'mfcc{i}_mean'] = np.mean(mfccs[i-1])
-            features[f'mfcc{i}_var'] = np.var(mfccs[i-1])
-        
-        return features
+        return features_to_dict(extract_feature_vector(y, SAMPLE_RATE))
     
     except Exception as e:
         raise Exception(f"Error extracting features: {str(e)}")
 
 
+def extract_feature_vector(
+    y: np.ndarray,
+    sr: int,
+    out: Optional[np.ndarray] = None,
+    tempograms: Optional[list] = None,
+    stft: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Extract the 58 features of one segment into a float32 row in FEATURE_NAMES order
+    
+    The spectral features share one STFT instead of each librosa feature
+    computing its own; values are the same.
+    
+    Args:
+        y: Audio samples
+        sr: Sample rate
+        out: Row to write into (e.g. one row of an (N, 58) block); allocated if None
+        tempograms: Optional list that receives the segment's tempogram (for a per-song tempo)
+        stft: Precomputed librosa.stft(y) (N_FFT, HOP_LENGTH, centered), e.g. from cached frames
+    
+    Returns:
+        The filled row
+    """
+    row = np.empty(NUM_FEATURES, dtype=np.float32) if out is None else out
+    
+    if stft is None:
+        with stage_timer("feature_stft"):
+            stft = librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH)
+    magnitude = np.abs(stft)
+    power = magnitude ** 2
+    
+    # 0. Length (sample count, not duration!)
+    row[0] = len(y)
+    
+    # 1. Chroma STFT
+    with stage_timer("feature_chroma_stft"):
+        _put_moments(row, _CHROMA, librosa.feature.chroma_stft(S=power, sr=sr))
+    
+    # 2. RMS Energy
+    with stage_timer("feature_rms"):
+        _put_moments(row, _RMS, librosa.feature.rms(y=y))
+    
+    # 3. Spectral Centroid
+    with stage_timer("feature_spectral_centroid"):
+        _put_moments(row, _CENTROID, librosa.feature.spectral_centroid(S=magnitude, sr=sr))
+    
+    # 4. Spectral Bandwidth
+    with stage_timer("feature_spectral_bandwidth"):
+        _put_moments(row, _BANDWIDTH, librosa.feature.spectral_bandwidth(S=magnitude, sr=sr))
+    
+    # 5. Rolloff
+    with stage_timer("feature_rolloff"):
+        _put_moments(row, _ROLLOFF, librosa.feature.spectral_rolloff(S=magnitude, sr=sr))
+    
+    # 6. Zero Crossing Rate
+    with stage_timer("feature_zero_crossing_rate"):
+        _put_moments(row, _ZCR, librosa.feature.zero_crossing_rate(y))
+    
+    # 7. Harmony and Perceptr
+    with stage_timer("feature_hpss"):
+        row[_HPSS:_HPSS + 4] = _hpss_moments(y, HPSS_MODE, stft)
+    
+    # Log-mel spectrogram shared by tempo and MFCCs
+    with stage_timer("feature_mel"):
+        log_mel = librosa.power_to_db(librosa.feature.melspectrogram(S=power, sr=sr))
+    
+    # 8. Tempo
+    with stage_timer("feature_tempo"):
+        tempogram = segment_tempogram(log_mel, sr)
+        row[TEMPO_COLUMN] = estimate_tempo([tempogram], sr)
+    if tempograms is not None:
+        tempograms.append(tempogram)
+    
+    # 9. MFCCs (20 coefficients), interleaved mean/var
+    with stage_timer("feature_mfcc"):
+        mfccs = librosa.feature.mfcc(S=log_mel, n_mfcc=20)
+    row[_MFCC:_MFCC + 40:2] = mfccs.mean(axis=1)
+    row[_MFCC + 1:_MFCC + 40:2] = mfccs.var(axis=1)
+    
+    return row
+
+
+def features_to_dict(row: np.ndarray) -> Dict[str, float]:
+    """
+    Name the values of a feature row (FEATURE_NAMES order)
+    
+    Args:
+        row: Output of extract_feature_vector
+    
+    Returns:
+        Dictionary with 58 features
+    """
+    return dict(zip(FEATURE_NAMES, row.tolist()))
+
+
+def column_index(feature_columns: Sequence[str]) -> np.ndarray:
+    """
+    Index array that reorders FEATURE_NAMES columns into a model's feature_columns order
+    
+    Raises:
+        Exception: If the model expects a feature that is not extracted
+    """
+    missing = [name for name in feature_columns if name not in FEATURE_INDEX]
+    if missing:
+        raise Exception(f"Extracted features lack model columns: {', '.join(missing)}")
+    return np.array([FEATURE_INDEX[name] for name in feature_columns])
+
+
+def _put_moments(row: np.ndarray, column: int, values: np.ndarray):
+    """Write the mean and variance of a feature matrix into two adjacent columns"""
+    row[column] = values.mean()
+    row[column + 1] = values.var()
+
+
+def log_mel_spectrogram(y: np.ndarray, sr: int) -> np.ndarray:
+    """
+    Log-power mel spectrogram with librosa's defaults, the input of both
+    librosa.feature.mfcc and librosa.onset.onset_strength
+    
+    Args:
+        y: Audio samples
+        sr: Sample rate
+    
+    Returns:
+        Log-mel spectrogram in dB (128 mels, frames)
+    """
+    return librosa.power_to_db(librosa.feature.melspectrogram(y=y, sr=sr))
+
+
+def segment_tempogram(log_mel: np.ndarray, sr: int) -> Optional[np.ndarray]:
+    """
+    Autocorrelation tempogram of a segment's onset envelope
+    
+    The onset envelope is the one librosa.beat.beat_track computes (median
+    over mel bands), taken from the shared log-mel spectrogram. Beat positions
+    are never tracked: the tempo feature only needs the tempo estimate.
+    
+    Args:
+        log_mel: Output of log_mel_spectrogram
+        sr: Sample rate
+    
+    Returns:
+        Tempogram (lags, frames), or None if the segment has no onsets
+    """
+    onset_envelope = librosa.onset.onset_strength(S=log_mel, sr=sr, aggregate=np.median)
+    if not onset_envelope.any():
+        return None
+    win_length = librosa.time_to_frames(TEMPO_AC_SIZE, sr=sr).item()
+    return librosa.feature.tempogram(onset_envelope=onset_envelope, sr=sr, win_length=win_length)
+
+
+def estimate_tempo(tempograms: List[Optional[np.ndarray]], sr: int) -> float:
+    """
+    Tempo (BPM) from the averaged tempograms of one or more segments
+    
+    For a single segment this is the tempo librosa.beat.beat_track returns.
+    
+    Args:
+        tempograms: segment_tempogram results (None entries are skipped)
+        sr: Sample rate
+    
+    Returns:
+        Tempo in BPM, or 0.0 if no segment has onsets (as beat_track)
+    """
+    tempograms = [tg for tg in tempograms if tg is not None]
+    if not tempograms:
+        return 0.0
+    return float(librosa.feature.tempo(tg=np.concatenate(tempograms, axis=-1), sr=sr, ac_size=TEMPO_AC_SIZE)[0])
+
+
+def hpss_statistics(y: np.ndarray, mode: str = HPSS_MODE) -> Dict[str, float]:
+    """
+    Mean and variance of the harmonic and percussive components of a signal
+    
+    Args:
+        y: Audio samples
+        mode: 'exact' (same values as librosa.effects.hpss, as in training) or
+            'fast' (shorter HPSS_FAST_KERNEL median filters)
+    
+    Returns:
+        Dict with harmony_mean, harmony_var, perceptr_mean and perceptr_var
+    """
+    return dict(zip(FEATURE_NAMES[_HPSS:_HPSS + 4], _hpss_moments(y, mode)))
+
+
+def _hpss_moments(y: np.ndarray, mode: str, stft: Optional[np.ndarray] = None) -> Tuple[float, float, float, float]:
+    """Harmonic mean/var and percussive mean/var (see hpss_statistics)"""
+    if mode not in ('exact', 'fast'):
+        raise Exception(f"Unknown HPSS mode: {mode}")
+    
+    if stft is None:
+        stft = librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH)
+    harmonic, percussive = hpss_spectra(stft, HPSS_KERNEL if mode == 'exact' else HPSS_FAST_KERNEL)
+    
+    # The masked spectra are not consistent STFTs, so the statistics need the
+    # real overlap-add signal (the inverse transforms are ~10% of the cost)
+    y_harm = librosa.istft(harmonic, hop_length=HOP_LENGTH, n_fft=N_FFT, length=len(y))
+    y_perc = librosa.istft(percussive, hop_length=HOP_LENGTH, n_fft=N_FFT, length=len(y))
+    
+    return np.mean(y_harm), np.var(y_harm), np.mean(y_perc), np.var(y_perc)
+
+
+def hpss_spectra(stft: np.ndarray, kernel_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Harmonic/percussive split of a complex STFT with soft masks, equivalent to
+    librosa.decompose.hpss(stft, kernel_size=kernel_size)
+    
+    The median filters use a partial sort over sliding windows, which is several
+    times faster than scipy.ndimage.median_filter and gives identical values.
+    
+    Args:
+        stft: Complex STFT (bins, frames)
+        kernel_size: Median filter length along time (harmonic) and frequency (percussive)
+    
+    Returns:
+        Tuple of (harmonic, percussive) complex spectra
+    """
+    magnitude = np.abs(stft)
+    harmonic = _median_filter(magnitude, kernel_size, axis=1)
+    percussive = _median_filter(magnitude, kernel_size, axis=0)
+    
+    harmonic_mask = librosa.util.softmask(harmonic, percussive, power=2.0, split_zeros=True)
+    percussive_mask = librosa.util.softmask(percussive, harmonic, power=2.0, split_zeros=True)
+    return stft * harmonic_mask, stft * percussive_mask
+
+
+def _median_filter(x: np.ndarray, size: int, axis: int) -> np.ndarray:
+    """1-D median filter along one axis with scipy.ndimage's default 'reflect' edges"""
+    half = size // 2
+    padding = [(0, 0)] * x.ndim
+    padding[axis] = (half, size - 1 - half)
+    windows = sliding_window_view(np.pad(x, padding, mode='symmetric'), size, axis=axis)
+    return np.partition(windows, half, axis=-1)[..., half]
+
+
 def get_audio_duration(audio_path: str) -> float:
     """
     Get the duration of an audio file in seconds
@@ -0,0 +1,381 @@
+"""
+Content-addressed audio storage
+Stores each distinct audio file once under its SHA-256 digest in hash-sharded
+directories. Song rows reference blobs through Song.audio_hash; a blob is
+removed when the last referencing song is deleted or its audio expires under
+the retention policy (extracted features are kept).
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.config import (
+    AUDIO_STORE_DIR,
+    AUDIO_RETENTION_DAYS,
+    AUDIO_RETENTION_INTERVAL,
+    ALLOWED_EXTENSIONS,
+    UPLOAD_DIR
+)
+from app.database import SessionLocal
+from app.models.song import Song
+from app.models.song_features import SongFeatures
+from app.services.resources import process_alive
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No cross-process locking (single server process only)
+
+_CHUNK = 1 << 20
+_EXTENSIONS = sorted(ALLOWED_EXTENSIONS | {'.mp3'})
+
+# Blobs being ingested (stored but not yet referenced by a committed Song) are
+# protected from release by pin files, PIN_DIR/<digest>.<pid>.<id>, visible to
+# every server process. Pinning, blob creation and removal all happen under
+# _locked() (a thread lock plus an flock shared by all processes).
+PIN_DIR = AUDIO_STORE_DIR / "pins"
+_LOCK_PATH = AUDIO_STORE_DIR / ".lock"
+_pins: Dict[str, List[Path]] = {}  # this process's pin files per digest
+_lock = threading.Lock()
+
+
+@contextmanager
+def _locked():
+    """Hold the thread lock and the cross-process store lock"""
+    with _lock:
+        AUDIO_STORE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(_LOCK_PATH, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def is_pinned(digest: str) -> bool:
+    """Whether any live process has the blob pinned (lock held; removes stale pins)"""
+    pinned = False
+    for path in PIN_DIR.glob(f"{digest}.*"):
+        try:
+            pid = int(path.name.split('.')[1])
+        except (IndexError, ValueError):
+            continue
+        if process_alive(pid):
+            pinned = True
+        else:
+            path.unlink(missing_ok=True)
+    return pinned
+
+
+@dataclass
+class StoredAudio:
+    """A blob in the store"""
+    digest: str
+    path: str
+    size: int
+    deduplicated: bool  # an identical blob was already stored
+
+
+def blob_path(digest: str, extension: str) -> Path:
+    """Sharded location of a blob: AUDIO_STORE_DIR/ab/cd/abcd....ext"""
+    return AUDIO_STORE_DIR / digest[:2] / digest[2:4] / f"{digest}{extension}"
+
+
+def find_blob(digest: str) -> Optional[Path]:
+    """Path of a stored blob with any known extension, or None"""
+    for extension in _EXTENSIONS:
+        path = blob_path(digest, extension)
+        if path.exists():
+            return path
+    return None
+
+
+def store_stream(source: BinaryIO, extension: str) -> StoredAudio:
+    """
+    Copy a file object into the store, hashing it on the way
+    
+    The blob is pinned until unpin(digest) so a concurrent delete of another
+    song with the same audio cannot remove it before the new Song is committed.
+    
+    Args:
+        source: Readable binary file object (read to the end)
+        extension: File extension including the dot (kept for decoders that use it)
+    
+    Returns:
+        StoredAudio for the (possibly pre-existing) blob
+    """
+    temp_dir = AUDIO_STORE_DIR / "tmp"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+        while True:
+            chunk = source.read(_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            temp.write(chunk)
+            size += len(chunk)
+    return _commit_blob(Path(temp.name), digest.hexdigest(), extension.lower(), size)
+
+
+def store_file(path: str, move: bool = False) -> StoredAudio:
+    """
+    Add an existing file to the store (pinned as for store_stream)
+    
+    Args:
+        path: File to add
+        move: Remove the original once stored
+    """
+    source = Path(path)
+    with open(source, 'rb') as f:
+        stored = store_stream(f, source.suffix)
+    if move:
+        source.unlink(missing_ok=True)
+    return stored
+
+
+def _commit_blob(temp: Path, digest: str, extension: str, size: int) -> StoredAudio:
+    """Move a hashed temp file into place, or drop it if the blob exists"""
+    with _locked():
+        PIN_DIR.mkdir(parents=True, exist_ok=True)
+        pin = PIN_DIR / f"{digest}.{os.getpid()}.{uuid.uuid4().hex}"
+        pin.touch()
+        _pins.setdefault(digest, []).append(pin)
+        
+        existing = find_blob(digest)
+        if existing is not None:
+            temp.unlink(missing_ok=True)
+            return StoredAudio(digest, str(existing), size, True)
+        
+        path = blob_path(digest, extension)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp, path)
+        return StoredAudio(digest, str(path), size, False)
+
+
+def unpin(digest: str):
+    """Release the ingest pin taken by store_stream/store_file"""
+    with _locked():
+        pins = _pins.get(digest)
+        if not pins:
+            return
+        pins.pop().unlink(missing_ok=True)
+        if not pins:
+            del _pins[digest]
+
+
+def reference_count(db: Session, digest: str) -> int:
+    """Songs whose audio is the blob"""
+    return db.scalar(
+        select(func.count()).select_from(Song).where(Song.audio_hash == digest, Song.file_path.isnot(None))
+    )
+
+
+def release(digest: Optional[str], db: Optional[Session] = None) -> bool:
+    """
+    Remove a blob if no Song references it and no ingest has it pinned
+    
+    Call after committing the change that dropped a reference.
+    
+    Args:
+        digest: Blob digest (None is ignored)
+        db: Session to count references with (a new one if omitted)
+    
+    Returns:
+        True if the blob was removed
+    """
+    if not digest:
+        return False
+    
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        with _locked():
+            if is_pinned(digest) or reference_count(db, digest) > 0:
+                return False
+            path = find_blob(digest)
+            if path is None:
+                return False
+            path.unlink(missing_ok=True)
+        print(f"🗑️  Freed audio blob {digest[:12]}")
+        return True
+    finally:
+        if own_session:
+            db.close()
+
+
+def apply_retention(db: Session, days: int = AUDIO_RETENTION_DAYS, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Drop the audio of songs older than `days` that have stored segment features
+    
+    The songs stay in the library (and can still be re-scored from their
+    features); file_path is cleared (audio_hash is kept as a record of the
+    content) and unreferenced blobs are freed.
+    Songs without stored features keep their audio.
+    
+    Args:
+        db: Sync session
+        days: Age limit (0 disables retention)
+        now: Current time (for testing)
+    
+    Returns:
+        Dict with songs expired and blobs freed
+    """
+    if days <= 0:
+        return {'expired': 0, 'freed': 0}
+    
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=days)
+    songs = db.execute(
+        select(Song)
+        .join(SongFeatures, SongFeatures.song_id == Song.id)
+        .where(Song.created_at < cutoff, Song.file_path.isnot(None), SongFeatures.num_segments > 0)
+    ).scalars().all()
+    
+    digests = set()
+    legacy_paths = []
+    for song in songs:
+        if song.audio_hash:
+            digests.add(song.audio_hash)
+        else:
+            legacy_paths.append(song.file_path)
+        song.file_path = None
+    db.commit()
+    
+    freed = sum(release(digest, db) for digest in digests)
+    freed += sum(release_legacy_file(path, db) for path in set(legacy_paths))
+    
+    if songs:
+        print(f"🧹 Retention: dropped audio of {len(songs)} songs older than {days} days, freed {freed} files")
+    return {'expired': len(songs), 'freed': freed}
+
+
+def release_legacy_file(path: Optional[str], db: Optional[Session] = None) -> bool:
+    """
+    Remove a file referenced by path only (stored before content addressing)
+    once no Song points at it
+    
+    Returns:
+        True if the file was removed
+    """
+    if not path:
+        return False
+    
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        if db.scalar(select(func.count()).select_from(Song).where(Song.file_path == path)) > 0:
+            return False
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+    finally:
+        if own_session:
+            db.close()
+
+
+async def retention_loop():
+    """Apply the retention policy every AUDIO_RETENTION_INTERVAL seconds (run as a task)"""
+    def sweep():
+        db = SessionLocal()
+        try:
+            return apply_retention(db)
+        finally:
+            db.close()
+    
+    while True:
+        try:
+            await asyncio.to_thread(sweep)
+        except Exception as e:
+            print(f"❌ Retention sweep failed: {e}")
+        await asyncio.sleep(AUDIO_RETENTION_INTERVAL)
+
+
+def migrate_legacy_files(db: Session) -> Dict[str, int]:
+    """
+    Move audio referenced by path only (stored before content addressing) into the store
+    
+    Songs sharing a path or identical content end up sharing one blob.
+    
+    Returns:
+        Dict with songs migrated and blobs deduplicated
+    """
+    songs = db.execute(
+        select(Song).where(Song.audio_hash.is_(None), Song.file_path.isnot(None))
+    ).scalars().all()
+    
+    migrated = deduplicated = 0
+    by_path: Dict[str, StoredAudio] = {}
+    for song in songs:
+        if not Path(song.file_path).exists():
+            continue
+        stored = by_path.get(song.file_path)
+        if stored is None:
+            stored = by_path[song.file_path] = store_file(song.file_path)
+            deduplicated += stored.deduplicated
+        song.file_path = stored.path
+        song.audio_hash = stored.digest
+        migrated += 1
+    db.commit()
+    
+    for path, stored in by_path.items():
+        Path(path).unlink(missing_ok=True)
+        unpin(stored.digest)
+    return {'migrated': migrated, 'deduplicated': deduplicated}
+
+
+def storage_stats(db: Session) -> Dict[str, int]:
+    """Blob count and size on disk, and songs referencing stored blobs"""
+    blobs = size = 0
+    if AUDIO_STORE_DIR.exists():
+        for path in AUDIO_STORE_DIR.glob("??/??/*"):
+            blobs += 1
+            size += path.stat().st_size
+    referenced = (Song.audio_hash.isnot(None), Song.file_path.isnot(None))
+    references = db.scalar(select(func.count()).select_from(Song).where(*referenced))
+    distinct = db.scalar(select(func.count(func.distinct(Song.audio_hash))).where(*referenced))
+    return {
+        'blobs': blobs,
+        'bytes': size,
+        'song_references': references,
+        'referenced_blobs': distinct,
+        'retention_days': AUDIO_RETENTION_DAYS,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Content-addressed audio store maintenance")
+    parser.add_argument("--migrate", action="store_true", help=f"Move legacy files (e.g. in {UPLOAD_DIR}) into the store")
+    parser.add_argument("--retention", action="store_true", help="Apply the AUDIO_RETENTION_DAYS policy")
+    parser.add_argument("--days", type=int, default=AUDIO_RETENTION_DAYS, help="Retention age in days")
+    args = parser.parse_args()
+    
+    from app.database import create_tables
+    create_tables()
+    
+    db = SessionLocal()
+    try:
+        if args.migrate:
+            print(migrate_legacy_files(db))
+        if args.retention:
+            print(apply_retention(db, args.days))
+        print(storage_stats(db))
+    finally:
+        db.close()
@@ -0,0 +1,514 @@
+"""
+Memory-mapped feature store
+Library-wide, append-only columnar copy of every song's segment features and
+genre probabilities for offline analysis, readable zero-copy with NumPy
+
+Layout of FEATURE_STORE_DIR:
+    meta.json          feature layout, feature names and genre order
+    features.f32       (segments, 58) little-endian float32, FEATURE_NAMES order
+    offsets.f32        (segments,) segment start times in seconds
+    probabilities.f32  (records, 10) song probabilities, GENRE_ORDER order
+    index.bin          (records,) INDEX_DTYPE: song_id, first segment, segment count, live flag
+
+Usage (offline):
+    python -m app.services.feature_store [--rebuild] [--compact]
+    
+    from app.services.feature_store import open_feature_store
+    store = open_feature_store()
+    X = store.features[store.live_segments()]
+"""
+
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import (
+    GENRE_ORDER,
+    FEATURE_STORE_ENABLED,
+    FEATURE_STORE_DIR,
+    FEATURE_STORE_COMPACT_RATIO
+)
+from app.services.audio_processor import FEATURE_NAMES, NUM_FEATURES
+from app.services.segment_features import FEATURE_LAYOUT
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No cross-process locking (single server process only)
+
+INDEX_DTYPE = np.dtype([('song_id', '<i8'), ('start', '<i8'), ('count', '<i4'), ('live', '<i4')])
+
+_FLOAT = np.dtype('<f4')
+_ROW_BYTES = NUM_FEATURES * _FLOAT.itemsize
+_PROB_BYTES = len(GENRE_ORDER) * _FLOAT.itemsize
+_MIN_COMPACT_SEGMENTS = 256  # don't rewrite the store for a handful of deleted segments
+
+
+def _map(path: Path, dtype, shape: Tuple[int, ...], mode: str = 'r') -> np.ndarray:
+    """Memory-map a file region (empty array for zero-length regions)"""
+    if not shape[0]:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+
+class FeatureStoreSnapshot:
+    """
+    Read-only, zero-copy view of the store as of when it was opened
+    
+    Arrays are np.memmap views; records appended later are not visible (open
+    again), and deleted records stay visible with index['live'] == 0.
+    """
+    
+    def __init__(self, path: Path):
+        """Map the files of a store directory"""
+        self.path = path
+        index_bytes = os.path.getsize(path / "index.bin") if (path / "index.bin").exists() else 0
+        self.index = _map(path / "index.bin", INDEX_DTYPE, (index_bytes // INDEX_DTYPE.itemsize,))
+        # Records are in segment order: the last one ends the referenced segments
+        self.num_segments = int(self.index['start'][-1] + self.index['count'][-1]) if len(self.index) else 0
+        self.features = _map(path / "features.f32", _FLOAT, (self.num_segments, NUM_FEATURES))
+        self.offsets = _map(path / "offsets.f32", _FLOAT, (self.num_segments,))
+        self.probabilities = _map(path / "probabilities.f32", _FLOAT, (len(self.index), len(GENRE_ORDER)))
+    
+    @property
+    def live(self) -> np.ndarray:
+        """Boolean mask of live records"""
+        return self.index['live'] != 0
+    
+    @property
+    def song_ids(self) -> np.ndarray:
+        """Song IDs of live records"""
+        return np.asarray(self.index['song_id'][self.live])
+    
+    def live_segments(self) -> np.ndarray:
+        """Segment row indices of every live record, in record order"""
+        starts = self.index['start'][self.live]
+        counts = self.index['count'][self.live]
+        if not len(counts):
+            return np.empty(0, dtype=np.int64)
+        # Per-segment start of its record, shifted by the segment's position in the record
+        first = np.cumsum(counts) - counts
+        return np.repeat(starts - first, counts) + np.arange(counts.sum())
+    
+    def segment_song_ids(self) -> np.ndarray:
+        """Song ID of each row of live_segments()"""
+        return np.repeat(self.song_ids, self.index['count'][self.live])
+    
+    def song(self, song_id: int) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        (offsets, features, probabilities) views of a live song, or None
+        """
+        matches = np.flatnonzero((self.index['song_id'] == song_id) & self.live)
+        if not len(matches):
+            return None
+        record = self.index[matches[-1]]
+        rows = slice(int(record['start']), int(record['start'] + record['count']))
+        return self.offsets[rows], self.features[rows], self.probabilities[matches[-1]]
+
+
+class FeatureStore:
+    """
+    Writer for the feature store
+    
+    Appends and deletes may come from any thread and (where fcntl exists) any
+    server process; they serialize on a lock file next to the store. Data
+    files are appended before the index record that makes them visible, so a
+    crash mid-append leaves only an unreferenced tail, trimmed on the next write.
+    """
+    
+    def __init__(self, path: Path = FEATURE_STORE_DIR):
+        """Use (and create if needed) the store directory at path"""
+        self.path = Path(path)
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.Lock()
+        self._meta_checked = False
+    
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and the cross-process file lock"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _prepare(self) -> Tuple[int, int]:
+        """
+        Create or validate the store and trim unreferenced tails (lock held)
+        
+        Costs O(1): records are appended in segment order, so the last index
+        record ends the referenced segments.
+        
+        Returns:
+            Tuple of (records, segments) committed by the index
+        """
+        meta_path = self.path / "meta.json"
+        if not self._meta_checked or not meta_path.exists():
+            self.path.mkdir(parents=True, exist_ok=True)
+            meta = {'layout': FEATURE_LAYOUT, 'features': list(FEATURE_NAMES), 'genres': list(GENRE_ORDER)}
+            if not meta_path.exists():
+                meta_path.write_text(json.dumps(meta, indent=2))
+            elif json.loads(meta_path.read_text()) != meta:
+                raise Exception(f"Feature store at {self.path} has a different layout; rebuild it with --rebuild")
+            self._meta_checked = True
+        
+        index_path = self.path / "index.bin"
+        records = (os.path.getsize(index_path) if index_path.exists() else 0) // INDEX_DTYPE.itemsize
+        segments = 0
+        if records:
+            with open(index_path, 'rb') as f:
+                f.seek((records - 1) * INDEX_DTYPE.itemsize)
+                last = np.frombuffer(f.read(INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)[0]
+            segments = int(last['start'] + last['count'])
+        
+        for name, size in (
+            ("index.bin", records * INDEX_DTYPE.itemsize),
+            ("features.f32", segments * _ROW_BYTES),
+            ("offsets.f32", segments * _FLOAT.itemsize),
+            ("probabilities.f32", records * _PROB_BYTES),
+        ):
+            with open(self.path / name, 'ab') as f:
+                if f.tell() != size:
+                    f.truncate(size)
+        return records, segments
+    
+    def _read_index(self) -> np.ndarray:
+        """Load the whole index (lock held; for deletes, re-scores and compaction only)"""
+        records, _ = self._prepare()
+        if not records:
+            return np.empty(0, INDEX_DTYPE)
+        return np.fromfile(self.path / "index.bin", dtype=INDEX_DTYPE, count=records)
+    
+    def append(self, song_id: int, offsets: np.ndarray, features: np.ndarray, probabilities: Sequence[float]):
+        """
+        Append a new song's segments in O(1) of the store size
+        
+        Song IDs are never reused, so no existing record is looked up; rebuild()
+        is the way to replace the store's contents.
+        
+        Args:
+            song_id: Song ID
+            offsets: (n,) segment start times
+            features: (n, 58) raw features in FEATURE_NAMES order
+            probabilities: 10 song probabilities in GENRE_ORDER order
+        """
+        offsets = np.ascontiguousarray(offsets, dtype=_FLOAT)
+        features = np.ascontiguousarray(features, dtype=_FLOAT).reshape(len(offsets), NUM_FEATURES)
+        probabilities = np.asarray(probabilities, dtype=_FLOAT).reshape(len(GENRE_ORDER))
+        
+        with self._locked():
+            _, start = self._prepare()
+            
+            with open(self.path / "features.f32", 'ab') as f:
+                f.write(features.tobytes())
+            with open(self.path / "offsets.f32", 'ab') as f:
+                f.write(offsets.tobytes())
+            with open(self.path / "probabilities.f32", 'ab') as f:
+                f.write(probabilities.tobytes())
+            
+            record = np.array([(song_id, start, len(offsets), 1)], dtype=INDEX_DTYPE)
+            with open(self.path / "index.bin", 'ab') as f:
+                f.write(record.tobytes())
+    
+    def _retire(self, index: np.ndarray, song_ids: Iterable[int]) -> int:
+        """Clear the live flag of records of song_ids in place (lock held)"""
+        positions = np.flatnonzero(np.isin(index['song_id'], list(song_ids)) & (index['live'] != 0))
+        if not len(positions):
+            return 0
+        mapped = np.memmap(self.path / "index.bin", dtype=INDEX_DTYPE, mode='r+', shape=(len(index),))
+        mapped['live'][positions] = 0
+        mapped.flush()
+        index['live'][positions] = 0
+        return len(positions)
+    
+    def delete(self, song_ids: Iterable[int]) -> int:
+        """
+        Mark songs deleted (space is reclaimed by compact())
+        
+        Returns:
+            Number of records retired
+        """
+        song_ids = list(song_ids)
+        with self._locked():
+            if not (self.path / "index.bin").exists():
+                return 0
+            return self._retire(self._read_index(), song_ids)
+    
+    def update_probabilities(self, song_ids: Sequence[int], probabilities: np.ndarray) -> int:
+        """
+        Overwrite the probabilities of live songs in place (after a re-score)
+        
+        Args:
+            song_ids: Song IDs
+            probabilities: (len(song_ids), 10) in GENRE_ORDER order
+        
+        Returns:
+            Number of records updated
+        """
+        with self._locked():
+            if not (self.path / "index.bin").exists():
+                return 0
+            index = self._read_index()
+            record_of = {int(song_id): i for i, song_id in enumerate(index['song_id']) if index['live'][i]}
+            pairs = [(record_of[int(song_id)], k) for k, song_id in enumerate(song_ids) if int(song_id) in record_of]
+            if not pairs:
+                return 0
+            
+            records, rows = map(list, zip(*pairs))
+            mapped = np.memmap(self.path / "probabilities.f32", dtype=_FLOAT, mode='r+', shape=(len(index), len(GENRE_ORDER)))
+            mapped[records] = np.asarray(probabilities, dtype=_FLOAT)[rows]
+            mapped.flush()
+            return len(pairs)
+    
+    def stats(self) -> Dict[str, int]:
+        """Record and segment counts, dead segments and bytes on disk"""
+        store = FeatureStoreSnapshot(self.path)
+        live_segments = int(store.index['count'][store.live].sum())
+        size = sum(f.stat().st_size for f in self.path.glob("*")) if self.path.exists() else 0
+        return {
+            'songs': int(store.live.sum()),
+            'records': len(store.index),
+            'segments': store.num_segments,
+            'dead_segments': store.num_segments - live_segments,
+            'bytes': size,
+        }
+    
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite the store with only live records, reclaiming deleted space
+        
+        Readers holding an open snapshot keep their (now unlinked) files.
+        
+        Returns:
+            stats() after compaction
+        """
+        with self._locked():
+            self._prepare()
+            store = FeatureStoreSnapshot(self.path)
+            live = np.flatnonzero(store.live)
+            rows = store.live_segments()
+            
+            counts = store.index['count'][live]
+            index = np.zeros(len(live), dtype=INDEX_DTYPE)
+            index['song_id'] = store.index['song_id'][live]
+            index['start'] = np.cumsum(counts) - counts
+            index['count'] = counts
+            index['live'] = 1
+            
+            self._replace({
+                "features.f32": store.features[rows],
+                "offsets.f32": store.offsets[rows],
+                "probabilities.f32": store.probabilities[live],
+                "index.bin": index,
+            })
+        return self.stats()
+    
+    def rebuild(self, songs: Iterable[Tuple[int, np.ndarray, np.ndarray, Sequence[float]]]) -> Dict[str, int]:
+        """
+        Replace the store with the given songs
+        
+        Args:
+            songs: (song_id, offsets, features, probabilities) per song, as for append()
+        
+        Returns:
+            stats() after the rebuild
+        """
+        with self._locked():
+            staging = self.path.with_name(self.path.name + ".rebuild")
+            shutil.rmtree(staging, ignore_errors=True)
+            writer = FeatureStore(staging)
+            for song_id, offsets, features, probabilities in songs:
+                writer.append(song_id, offsets, features, probabilities)
+            writer._locked_prepare()
+            self._swap(staging)
+            writer._lock_path.unlink(missing_ok=True)
+        return self.stats()
+    
+    def _locked_prepare(self):
+        """Create an empty store if nothing was appended"""
+        with self._locked():
+            self._prepare()
+    
+    def _replace(self, arrays: Dict[str, np.ndarray]):
+        """Write arrays as a new store directory and swap it in (lock held)"""
+        staging = self.path.with_name(self.path.name + ".compact")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        shutil.copy2(self.path / "meta.json", staging / "meta.json")
+        # Index last, as in append()
+        for name, array in arrays.items():
+            with open(staging / name, 'wb') as f:
+                f.write(np.ascontiguousarray(array).tobytes())
+        self._swap(staging)
+    
+    def _swap(self, staging: Path):
+        """Replace the store directory with staging (lock held)"""
+        retired = self.path.with_name(self.path.name + ".old")
+        shutil.rmtree(retired, ignore_errors=True)
+        if self.path.exists():
+            os.rename(self.path, retired)
+        os.rename(staging, self.path)
+        shutil.rmtree(retired, ignore_errors=True)
+    
+    def maybe_compact(self, ratio: float = FEATURE_STORE_COMPACT_RATIO) -> bool:
+        """Compact if deleted segments exceed `ratio` of the store"""
+        stats = self.stats()
+        dead = stats['dead_segments']
+        if dead < _MIN_COMPACT_SEGMENTS or dead <= ratio * stats['segments']:
+            return False
+        print(f"🗜️  Compacting feature store ({dead} of {stats['segments']} segments deleted)")
+        self.compact()
+        return True
+
+
+feature_store = FeatureStore()
+
+
+def open_feature_store(path: Path = FEATURE_STORE_DIR) -> FeatureStoreSnapshot:
+    """Open a read-only, memory-mapped snapshot of the feature store"""
+    return FeatureStoreSnapshot(Path(path))
+
+
+def record_song_features(song, segments: Sequence[Tuple[float, np.ndarray]]):
+    """
+    Append a stored song's segments to the feature store (runs in a worker thread)
+    
+    Failures are logged, not raised: the database remains the source of truth
+    and the store can be rebuilt from it.
+    
+    A delete of the song can commit (and find nothing to forget) before this
+    append, so the song's existence is checked afterwards and the new record
+    retired if it is gone.
+    
+    Args:
+        song: Committed Song
+        segments: (offset_seconds, feature_row) per analyzed segment, rows in FEATURE_NAMES order
+    """
+    if not FEATURE_STORE_ENABLED or not segments:
+        return
+    try:
+        feature_store.append(
+            song.id,
+            np.array([offset for offset, _ in segments]),
+            np.array([row for _, row in segments]),
+            [getattr(song, f'prob_{genre}') for genre in GENRE_ORDER]
+        )
+        if not _song_exists(song.id):
+            forget_song_features(song.id)
+    except Exception as e:
+        print(f"⚠️  Feature store append failed for song {song.id}: {e}")
+
+
+def _song_exists(song_id: int) -> bool:
+    """Whether the song is still in the database"""
+    from app.database import SessionLocal
+    from app.models.song import Song
+    
+    db = SessionLocal()
+    try:
+        return db.get(Song, song_id) is not None
+    finally:
+        db.close()
+
+
+def forget_song_features(song_id: int):
+    """
+    Mark a deleted song in the feature store (worker thread)
+    
+    Compaction, if worthwhile, runs on a background thread so the delete
+    request doesn't wait for the store to be rewritten.
+    """
+    if not FEATURE_STORE_ENABLED:
+        return
+    try:
+        if feature_store.delete([song_id]):
+            compact_in_background()
+    except Exception as e:
+        print(f"⚠️  Feature store delete failed for song {song_id}: {e}")
+
+
+_compacting = threading.Lock()
+
+
+def compact_in_background():
+    """Start maybe_compact() on a background thread unless one is already running"""
+    if not _compacting.acquire(blocking=False):
+        return
+    
+    def run():
+        try:
+            feature_store.maybe_compact()
+        except Exception as e:
+            print(f"❌ Feature store compaction failed: {e}")
+        finally:
+            _compacting.release()
+    
+    threading.Thread(target=run, name="feature-store-compact", daemon=True).start()
+
+
+def update_song_probabilities(song_ids: Sequence[int], probabilities: Sequence[Sequence[float]]):
+    """Mirror re-scored probabilities (GENRE_ORDER order) into the feature store"""
+    if not FEATURE_STORE_ENABLED or not song_ids:
+        return
+    try:
+        feature_store.update_probabilities(song_ids, np.array(probabilities))
+    except Exception as e:
+        print(f"⚠️  Feature store probability update failed: {e}")
+
+
+def _database_songs(batch_songs: int = 500):
+    """(song_id, offsets, features, probabilities) of every song with stored features"""
+    from sqlalchemy import select
+    from app.database import SessionLocal
+    from app.models.song import Song
+    from app.models.song_features import SongFeatures
+    from app.services.segment_features import decode_features
+    
+    probability_columns = [getattr(Song, f'prob_{genre}') for genre in GENRE_ORDER]
+    db = SessionLocal()
+    last_id = 0
+    try:
+        while True:
+            rows = db.execute(
+                select(SongFeatures, *probability_columns)
+                .join(Song, Song.id == SongFeatures.song_id)
+                .where(SongFeatures.song_id > last_id, SongFeatures.num_segments > 0)
+                .order_by(SongFeatures.song_id)
+                .limit(batch_songs)
+            ).all()
+            if not rows:
+                return
+            for stored, *probabilities in rows:
+                offsets, features = decode_features(stored)
+                yield stored.song_id, offsets, features, probabilities
+            last_id = rows[-1][0].song_id
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Feature store maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild from the song_features table")
+    parser.add_argument("--compact", action="store_true", help="Reclaim space of deleted songs")
+    args = parser.parse_args()
+    
+    if args.rebuild:
+        from app.database import create_tables
+        create_tables()
+        print(feature_store.rebuild(_database_songs()))
+    if args.compact:
+        print(feature_store.compact())
+    print(feature_store.stats())
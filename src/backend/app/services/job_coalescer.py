@@ -0,0 +1,80 @@
+"""
+In-flight job coalescing service
+Concurrent requests for the same key share a single running job; file_lock
+serializes jobs for the same key across server processes
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No cross-process locking (single server process only)
+
+_LOCK_POLL = 0.2  # seconds between attempts to take a busy file lock
+
+
+@asynccontextmanager
+async def file_lock(path: Path):
+    """
+    Hold an exclusive flock on `path` (created if missing) shared by all processes
+    
+    Waits without blocking the event loop or a thread while another process
+    holds the lock.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as lock_file:
+        if fcntl is not None:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(_LOCK_POLL)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class InFlightJobs:
+    """
+    Registry of running jobs keyed by a string (e.g. a YouTube video ID)
+    """
+    
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._jobs: Dict[str, asyncio.Future] = {}
+    
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run the job for `key`, or join it if one is already in flight
+        
+        The job keeps running if a waiter is cancelled (e.g. client disconnect),
+        so the other waiters still get its result.
+        
+        Args:
+            key: Job identity
+            factory: Zero-argument callable returning the awaitable to run
+        
+        Returns:
+            The job's result (exceptions propagate to every waiter)
+        """
+        job = self._jobs.get(key)
+        if job is None:
+            job = asyncio.ensure_future(factory())
+            self._jobs[key] = job
+            job.add_done_callback(lambda _: self._jobs.pop(key, None))
+        return await asyncio.shield(job)
+    
+    def is_running(self, key: str) -> bool:
+        """Whether a job for `key` is currently in flight"""
+        return key in self._jobs
+    
+    def __len__(self) -> int:
+        """Number of jobs currently in flight"""
+        return len(self._jobs)
@@ -0,0 +1,248 @@
+"""
+Live stream classification service
+Keeps a rolling 3-second window over an incoming audio stream and classifies
+it, reusing the STFT frames already computed for earlier hops
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+import librosa
+import numpy as np
+import soxr
+
+from app.config import SAMPLE_RATE, GENRE_ORDER, STREAM_UPDATE_INTERVAL
+from app.services.audio_processor import N_FFT, HOP_LENGTH, extract_feature_vector
+from app.services.cluster_calculator import calculate_decagon_position
+from app.services.metrics import stage_timer
+
+SAMPLE_FORMATS = {'f32le': np.dtype('<f4'), 's16le': np.dtype('<i2')}
+
+WINDOW_SAMPLES = 3 * SAMPLE_RATE  # same length as an analyzed track segment
+WINDOW_FRAMES = 1 + WINDOW_SAMPLES // HOP_LENGTH  # centered STFT frames of one window
+
+# Frames of a window whose analysis span reaches past its edges (zero-padded,
+# as librosa pads an isolated segment); every other frame is cached from the stream
+_LEFT_EDGE = -(-(N_FFT // 2) // HOP_LENGTH)
+_RIGHT_EDGE = (WINDOW_SAMPLES - N_FFT // 2) // HOP_LENGTH + 1
+
+_PIECE = 8 * HOP_LENGTH  # samples appended per step
+_CAPACITY = WINDOW_SAMPLES + N_FFT + _PIECE
+
+
+class LiveClassifier:
+    """
+    Rolling-window classifier for one live stream
+    
+    Audio is converted to mono model-rate samples as it arrives and kept in a
+    fixed-size buffer. The STFT frame of each new hop is computed once and
+    kept in a ring of WINDOW_FRAMES columns, so a prediction only computes the
+    few zero-padded edge frames of its window; the features then match
+    extract_feature_vector on the same 3 seconds. Memory per stream is fixed
+    (about 1.5 MB) whatever the stream length.
+    """
+    
+    def __init__(self, sample_rate: int = SAMPLE_RATE, channels: int = 1, sample_format: str = 'f32le'):
+        """Initialize an empty stream of raw PCM in the given layout"""
+        if sample_format not in SAMPLE_FORMATS:
+            raise Exception(f"Unsupported sample format: {sample_format}")
+        if not 1 <= channels <= 8:
+            raise Exception(f"Unsupported channel count: {channels}")
+        if not 8000 <= sample_rate <= 192000:
+            raise Exception(f"Unsupported sample rate: {sample_rate}")
+        
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = SAMPLE_FORMATS[sample_format]
+        self.total = 0  # model-rate samples received
+        self.last_update = 0  # self.total at the last snapshot
+        
+        self._pending = b''  # bytes of an incomplete sample frame
+        self._resampler = None
+        if sample_rate != SAMPLE_RATE:
+            self._resampler = soxr.ResampleStream(sample_rate, SAMPLE_RATE, 1, dtype='float32', quality='HQ')
+        
+        self._buffer = np.zeros(_CAPACITY, dtype=np.float32)
+        self._frames = np.zeros((1 + N_FFT // 2, WINDOW_FRAMES), dtype=np.complex64)
+        self._next_frame = _LEFT_EDGE  # stream frame index of the next frame to cache
+    
+    def feed_pcm(self, data: bytes):
+        """
+        Append raw interleaved PCM bytes in the stream's format
+        
+        Args:
+            data: Any number of bytes; a trailing partial frame is kept for the next call
+        """
+        data = self._pending + data
+        frame_bytes = self.dtype.itemsize * self.channels
+        usable = len(data) - len(data) % frame_bytes
+        self._pending = data[usable:]
+        if not usable:
+            return
+        
+        samples = np.frombuffer(data[:usable], dtype=self.dtype).reshape(-1, self.channels)
+        y = samples[:, 0].astype(np.float32)
+        for channel in range(1, self.channels):
+            y += samples[:, channel]
+        if self.dtype.kind == 'i':
+            y /= 32768.0
+        if self.channels > 1:
+            y /= self.channels
+        
+        if self._resampler is not None:
+            y = self._resampler.resample_chunk(y)
+        self.feed_samples(y)
+    
+    def feed_samples(self, y: np.ndarray):
+        """
+        Append mono float32 samples at SAMPLE_RATE
+        
+        Args:
+            y: New samples
+        """
+        for start in range(0, len(y), _PIECE):
+            piece = y[start:start + _PIECE]
+            self._buffer[:-len(piece)] = self._buffer[len(piece):]
+            self._buffer[-len(piece):] = piece
+            self.total += len(piece)
+            self._cache_frames()
+    
+    def update_due(self, interval: float = STREAM_UPDATE_INTERVAL) -> bool:
+        """Whether a full window exists and interval seconds of audio arrived since the last snapshot"""
+        return self.total >= WINDOW_SAMPLES and self.total - self.last_update >= interval * SAMPLE_RATE
+    
+    def snapshot(self) -> Dict:
+        """
+        Copy the latest hop-aligned 3-second window and its complete STFT
+        
+        Cheap enough to run on the event loop; pass the result to classify_window
+        on a worker thread.
+        
+        Returns:
+            Dict with 'y' (window samples), 'stft' and 'end' (stream seconds at the window end)
+        """
+        first = (self.total - WINDOW_SAMPLES) // HOP_LENGTH  # stream frame index of window frame 0
+        start = first * HOP_LENGTH
+        offset = start - (self.total - _CAPACITY)
+        y = self._buffer[offset:offset + WINDOW_SAMPLES].copy()
+        
+        stft = np.empty_like(self._frames)
+        columns = (first + np.arange(_LEFT_EDGE, _RIGHT_EDGE)) % WINDOW_FRAMES
+        stft[:, _LEFT_EDGE:_RIGHT_EDGE] = self._frames[:, columns]
+        
+        # Edge frames see librosa's zero padding around an isolated segment
+        padded = np.pad(y, N_FFT // 2)
+        stft[:, :_LEFT_EDGE] = librosa.stft(
+            padded[:(_LEFT_EDGE - 1) * HOP_LENGTH + N_FFT], n_fft=N_FFT, hop_length=HOP_LENGTH, center=False
+        )
+        stft[:, _RIGHT_EDGE:] = librosa.stft(
+            padded[_RIGHT_EDGE * HOP_LENGTH:(WINDOW_FRAMES - 1) * HOP_LENGTH + N_FFT],
+            n_fft=N_FFT, hop_length=HOP_LENGTH, center=False
+        )
+        
+        self.last_update = self.total
+        return {'y': y, 'stft': stft, 'end': (start + WINDOW_SAMPLES) / SAMPLE_RATE}
+    
+    def _cache_frames(self):
+        """Compute the STFT frames whose full analysis span has arrived"""
+        last = (self.total - N_FFT // 2) // HOP_LENGTH
+        if last < self._next_frame:
+            return
+        
+        start = self._next_frame * HOP_LENGTH - N_FFT // 2
+        end = last * HOP_LENGTH + N_FFT // 2
+        offset = start - (self.total - _CAPACITY)
+        frames = librosa.stft(
+            self._buffer[offset:offset + end - start], n_fft=N_FFT, hop_length=HOP_LENGTH, center=False
+        )
+        self._frames[:, np.arange(self._next_frame, last + 1) % WINDOW_FRAMES] = frames
+        self._next_frame = last + 1
+
+
+def classify_window(predictor, window: Dict) -> Dict:
+    """
+    Classify a snapshot window (runs in a worker thread)
+    
+    Args:
+        predictor: GenrePredictor
+        window: Result of LiveClassifier.snapshot
+    
+    Returns:
+        JSON-friendly prediction message
+    """
+    with stage_timer("live_update"):
+        row = extract_feature_vector(window['y'], SAMPLE_RATE, stft=window['stft'])
+        genre, confidence, probabilities = predictor.predict_vector(row)
+        x, y = calculate_decagon_position(probabilities)
+    
+    prob_dict = predictor.get_probabilities_dict(probabilities)
+    return {
+        'type': 'prediction',
+        'time': round(window['end'], 3),
+        'genre': str(genre),
+        'confidence': float(confidence),
+        'probabilities': {genre_name: prob_dict[genre_name] for genre_name in GENRE_ORDER},
+        'x': float(x),
+        'y': float(y),
+        'model_version': predictor.version,
+    }
+
+
+class FFmpegStreamDecoder:
+    """
+    Decodes an encoded audio stream (e.g. WebM/Opus or MP3 chunks) to mono
+    float32 at SAMPLE_RATE through an FFmpeg subprocess fed incrementally
+    """
+    
+    def __init__(self):
+        """Create an unstarted decoder"""
+        self.process: Optional[asyncio.subprocess.Process] = None
+    
+    async def start(self):
+        """Launch FFmpeg reading from stdin and writing raw samples to stdout"""
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-nostdin', '-loglevel', 'error',
+                '-i', 'pipe:0',
+                '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE),
+                '-f', 'f32le', 'pipe:1',
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            raise Exception("FFmpeg not found. Please install FFmpeg: https://ffmpeg.org/download.html")
+    
+    async def write(self, data: bytes):
+        """Feed encoded bytes"""
+        self.process.stdin.write(data)
+        await self.process.stdin.drain()
+    
+    async def read(self, size: int = 65536) -> bytes:
+        """Decoded f32le bytes as they become available (b'' at end of stream)"""
+        return await self.process.stdout.read(size)
+    
+    async def close(self):
+        """Signal end of input"""
+        if self.process.stdin and not self.process.stdin.is_closing():
+            self.process.stdin.close()
+    
+    async def kill(self):
+        """Stop FFmpeg if still running"""
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+
+def stream_started_message(classifier: LiveClassifier, sample_format: str) -> Dict:
+    """Initial message describing how the stream will be analyzed"""
+    return {
+        'type': 'started',
+        'sample_format': sample_format,
+        'sample_rate': classifier.sample_rate,
+        'channels': classifier.channels,
+        'window_seconds': WINDOW_SAMPLES / SAMPLE_RATE,
+        'update_interval': STREAM_UPDATE_INTERVAL,
+        'started_at': time.time(),
+    }
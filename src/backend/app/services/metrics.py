@@ -0,0 +1,345 @@
+"""
+Pipeline metrics service
+Thread-safe counters, gauges and histograms rendered in the Prometheus text format
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds (feature families take ms, downloads take tens of seconds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Render {name="value",...} (empty string for no labels)"""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for labelled metrics"""
+    
+    type_name = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize the metric and register it in the global registry"""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Label values in labelnames order"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def _labels(self, key: Tuple[str, ...], **extra) -> Dict[str, str]:
+        """Label dict for a stored key"""
+        labels = dict(zip(self.labelnames, key))
+        labels.update(extra)
+        return labels
+    
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        """Yield (sample_name, labels, value) tuples"""
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        """Render HELP/TYPE headers and samples"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for sample_name, labels, value in self.samples():
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    
+    type_name = 'counter'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        super().__init__(name, documentation, labelnames)
+    
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the count for a label set"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels) -> float:
+        """Current count for a label set"""
+        return self._values.get(self._key(labels), 0.0)
+    
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down
+    
+    Pass `function` to compute an unlabelled value at render time instead.
+    """
+    
+    type_name = 'gauge'
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+        super().__init__(name, documentation, labelnames)
+    
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the value for a label set"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, **labels):
+        """Decrease the value for a label set"""
+        self.inc(-amount, **labels)
+    
+    def set(self, value: float, **labels):
+        """Set the value for a label set"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def value(self, **labels) -> float:
+        """Current value for a label set"""
+        if self._function is not None:
+            return float(self._function())
+        return self._values.get(self._key(labels), 0.0)
+    
+    def samples(self):
+        if self._function is not None:
+            yield self.name, {}, float(self._function())
+            return
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+    
+    type_name = 'histogram'
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        super().__init__(name, documentation, labelnames)
+    
+    def observe(self, value: float, **labels):
+        """Record one observation"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+    
+    def count(self, **labels) -> int:
+        """Number of observations for a label set"""
+        state = self._values.get(self._key(labels))
+        return int(state[-1]) if state else 0
+    
+    def samples(self):
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", self._labels(key, le=_format_value(bound)), cumulative
+            yield f"{self.name}_bucket", self._labels(key, le='+Inf'), state[-1]
+            yield f"{self.name}_sum", self._labels(key), state[-2]
+            yield f"{self.name}_count", self._labels(key), state[-1]
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics exposed by the /metrics endpoint
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric: _Metric):
+        """Add a metric (names must be unique)"""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline metrics
+STAGE_SECONDS = Histogram(
+    "soundscape_stage_seconds",
+    "Time spent in each processing stage",
+    ["stage"]
+)
+STAGE_ERRORS = Counter(
+    "soundscape_stage_errors_total",
+    "Processing stage failures",
+    ["stage"]
+)
+SONGS_PROCESSED = Counter(
+    "soundscape_songs_processed_total",
+    "Songs processed by source and outcome (completed, cached, failed)",
+    ["source", "status"]
+)
+QUEUE_DEPTH = Gauge(
+    "soundscape_queue_depth",
+    "Jobs submitted to a worker pool and waiting to start",
+    ["pool"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "soundscape_http_request_seconds",
+    "HTTP request latency by route and status code",
+    ["method", "route", "status"]
+)
+SEGMENTS_ANALYZED = Histogram(
+    "soundscape_segments_analyzed",
+    "3-second segments analyzed per track by sampling mode",
+    ["mode"],
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 20)
+)
+MODEL_SELECTIONS = Counter(
+    "soundscape_model_selections_total",
+    "Tracks assigned to each model version",
+    ["version"]
+)
+IN_FLIGHT = Gauge(
+    "soundscape_in_flight",
+    "Jobs currently running in a worker pool",
+    ["pool"]
+)
+LIVE_STREAMS = Gauge(
+    "soundscape_live_streams",
+    "Open live classification streams"
+)
+LIVE_UPDATES = Counter(
+    "soundscape_live_updates_total",
+    "Live stream windows by outcome (sent, skipped while the previous one was running)",
+    ["status"]
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    Time a processing stage into STAGE_SECONDS (failures also count in STAGE_ERRORS)
+    
+    Usage:
+        with stage_timer("download"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def run_tracked(executor, pool: str, fn: Callable, *args) -> "asyncio.Future":
+    """
+    Submit fn(*args) to a worker pool from the event loop so QUEUE_DEPTH and
+    IN_FLIGHT follow it from submission to completion
+    
+    The queued count is taken back exactly once: when the job starts, or when
+    it is cancelled before starting or the submit itself fails.
+    
+    Args:
+        executor: Pool to run in
+        pool: Pool name used as the label
+        fn: Callable to run in the pool
+        *args: Arguments for fn
+    
+    Returns:
+        Awaitable future with fn's result
+    """
+    lock = threading.Lock()
+    queued = [True]
+    
+    def dequeue():
+        with lock:
+            if not queued[0]:
+                return
+            queued[0] = False
+        QUEUE_DEPTH.dec(pool=pool)
+    
+    def run():
+        dequeue()
+        IN_FLIGHT.inc(pool=pool)
+        try:
+            return fn(*args)
+        finally:
+            IN_FLIGHT.dec(pool=pool)
+    
+    QUEUE_DEPTH.inc(pool=pool)
+    try:
+        future = asyncio.get_running_loop().run_in_executor(executor, run)
+    except BaseException:
+        dequeue()
+        raise
+    future.add_done_callback(lambda _: dequeue())
+    return future
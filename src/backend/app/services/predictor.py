@@ -4,8 +4,15 @@ Genre prediction service using the trained PyTorch model
 
 import torch
 import pickle
+import hashlib
+import random
+import threading
+import time
+import uuid
+import json
+import os
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import sys
 
@@ -13,7 +20,55 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "ml_models"))
 
 from ml_models.model_classes import ConfigurableBiLSTMAttentionModel
-from app.config import MODEL_PATH, GENRE_ORDER
+from app.config import (
+    MODEL_PATH,
+    MODEL_STATE_PATH,
+    MODEL_SYNC_INTERVAL,
+    GENRE_ORDER,
+    SAMPLE_RATE,
+    SEGMENT_SAMPLING,
+    FIXED_SEGMENTS,
+    ADAPTIVE_MIN_SEGMENTS,
+    ADAPTIVE_MAX_SEGMENTS,
+    ADAPTIVE_MIN_MARGIN,
+    ADAPTIVE_LEAD_Z,
+    TEMPO_SCOPE
+)
+from app.services.audio_decoder import decode_audio
+from app.services.audio_processor import (
+    NUM_FEATURES,
+    TEMPO_COLUMN,
+    column_index,
+    estimate_tempo,
+    extract_feature_vector,
+    features_to_dict
+)
+from app.services.metrics import MODEL_SELECTIONS, SEGMENTS_ANALYZED, stage_timer
+
+SEGMENT_DURATION = 3.0  # seconds per analyzed segment
+
+
+def coverage_positions(count: int) -> np.ndarray:
+    """
+    Segment positions in [0, 1] ordered so every prefix covers the track evenly
+    
+    Uses the base-2 van der Corput sequence: 1/2, 1/4, 3/4, 1/8, 5/8, ...
+    
+    Args:
+        count: Number of positions
+    
+    Returns:
+        Array of relative offsets (0 = start, 1 = last full segment)
+    """
+    positions = np.empty(count)
+    for i in range(count):
+        n, denominator, value = i + 1, 1.0, 0.0
+        while n:
+            denominator *= 2
+            n, bit = divmod(n, 2)
+            value += bit / denominator
+        positions[i] = value
+    return positions
 
 
 class GenrePredictor:
@@ -21,26 +76,35 @@ class GenrePredictor:
     Genre prediction service that loads and uses the trained model
     """
     
-    def __init__(self):
+    def __init__(self, model_path: Path = MODEL_PATH):
         """Initialize the predictor and load the model"""
+        self.model_path = Path(model_path)
+        self.version = None
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = None
         self.scaler = None
         self.label_encoder = None
         self.feature_columns = None
+        self.column_index = None
         self._load_model()
     
     def _load_model(self):
         """Load the trained model and associated components"""
         try:
             # Load model package
-            with open(MODEL_PATH, 'rb') as f:
-                model_package = pickle.load(f)
+            with open(self.model_path, 'rb') as f:
+                data = f.read()
+            model_package = pickle.loads(data)
+            
+            # Explicit version from the package, else file name + content hash
+            self.version = str(model_package.get('version') or
+                               f"{self.model_path.stem}-{hashlib.sha256(data).hexdigest()[:8]}")
             
             # Extract components
             self.scaler = model_package['scaler']
             self.label_encoder = model_package['label_encoder']
             self.feature_columns = model_package['feature_columns']
+            self.column_index = column_index(self.feature_columns)
             config = model_package['config']
             input_dim = model_package['input_dim']
             
@@ -51,12 +115,17 @@ class GenrePredictor:
             self.model.load_state_dict(model_package['model_state_dict'])
             self.model.eval()
             
-            print(f"✓ Model loaded successfully on {self.device}")
+            print(f"✓ Model {self.version} loaded successfully on {self.device}")
             print(f"  Test Accuracy: {model_package.get('test_accuracy', 'N/A')}")
             
         except Exception as e:
             raise Exception(f"Failed to load model: {str(e)}")
     
+    def warm_up(self):
+        """Run one synthetic segment through feature extraction and the model (JIT, allocator warm-up)"""
+        y = np.random.default_rng(0).standard_normal(int(SEGMENT_DURATION * SAMPLE_RATE)).astype(np.float32) * 0.1
+        self.predict_vector(extract_feature_vector(y, SAMPLE_RATE))
+    
     def predict(self, features: Dict[str, float]) -> Tuple[str, float, np.ndarray]:
         """
         Predict genre from extracted features (single segment)
@@ -70,31 +139,109 @@ class GenrePredictor:
         try:
             # Convert features to vector in correct order
             feature_vector = np.array([features[col] for col in self.feature_columns])
-            
-            # Normalize features using training scaler
-            feature_vector_scaled = self.scaler.transform(feature_vector.reshape(1, -1))
-            
-            # Convert to PyTorch tensor
-            feature_tensor = torch.FloatTensor(feature_vector_scaled).to(self.device)
-            
-            # Make prediction
-            with torch.no_grad():
-                output = self.model(feature_tensor)
-                probabilities = torch.softmax(output, dim=1)
-                predicted_class = torch.argmax(probabilities, dim=1).item()
-                confidence = probabilities[0, predicted_class].item()
-            
-            # Get genre name
-            predicted_genre = self.label_encoder.inverse_transform([predicted_class])[0]
-            
-            # Get all probabilities as numpy array
-            all_probabilities = probabilities[0].cpu().numpy()
-            
-            return predicted_genre, confidence, all_probabilities
-            
+            return self._predict_ordered(feature_vector)
         except Exception as e:
             raise Exception(f"Prediction failed: {str(e)}")
     
+    def predict_vector(self, row: np.ndarray) -> Tuple[str, float, np.ndarray]:
+        """
+        Predict genre from a feature row (single segment)
+        
+        Args:
+            row: 58 features in FEATURE_NAMES order, as written by extract_feature_vector
+        
+        Returns:
+            Tuple of (predicted_genre, confidence, probabilities_array)
+        """
+        try:
+            return self._predict_ordered(row[self.column_index])
+        except Exception as e:
+            raise Exception(f"Prediction failed: {str(e)}")
+    
+    def _predict_ordered(self, feature_vector: np.ndarray) -> Tuple[str, float, np.ndarray]:
+        """Scale and classify one feature vector in feature_columns order"""
+        # Normalize features using training scaler
+        with stage_timer("scaling"):
+            feature_vector_scaled = self.scaler.transform(feature_vector.reshape(1, -1))
+        
+        # Convert to PyTorch tensor
+        feature_tensor = torch.FloatTensor(feature_vector_scaled).to(self.device)
+        
+        # Make prediction
+        with stage_timer("model_forward"), torch.no_grad():
+            output = self.model(feature_tensor)
+            probabilities = torch.softmax(output, dim=1)
+            predicted_class = torch.argmax(probabilities, dim=1).item()
+            confidence = probabilities[0, predicted_class].item()
+        
+        # Get genre name
+        predicted_genre = self.label_encoder.inverse_transform([predicted_class])[0]
+        
+        # Get all probabilities as numpy array
+        all_probabilities = probabilities[0].cpu().numpy()
+        
+        return predicted_genre, confidence, all_probabilities
+    
+    def predict_proba_batch(self, feature_matrix: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        """
+        Genre probabilities for many segments at once
+        
+        Args:
+            feature_matrix: Raw features (n_segments, n_features) in feature_columns order
+            batch_size: Rows per model forward pass
+        
+        Returns:
+            Probabilities (n_segments, 10) in label_encoder.classes_ order
+        """
+        if len(feature_matrix) == 0:
+            return np.empty((0, len(self.label_encoder.classes_)))
+        
+        with stage_timer("scaling"):
+            scaled = self.scaler.transform(feature_matrix)
+        
+        probabilities = []
+        with stage_timer("model_forward"), torch.no_grad():
+            for start in range(0, len(scaled), batch_size):
+                batch = torch.FloatTensor(scaled[start:start + batch_size]).to(self.device)
+                probabilities.append(torch.softmax(self.model(batch), dim=1).cpu().numpy())
+        return np.concatenate(probabilities)
+    
+    def predict_track(self, audio_path: str, segments: Optional[list] = None) -> Tuple[str, float, np.ndarray]:
+        """
+        Predict genre for a whole track using the configured segment sampling
+        (SEGMENT_SAMPLING: 'adaptive' or 'fixed')
+        
+        Args:
+            audio_path: Path to audio file
+            segments: Optional list that receives (offset_seconds, feature_row) per analyzed segment
+        
+        Returns:
+            Tuple of (predicted_genre, confidence, averaged_probabilities)
+        """
+        y_full, sr = self._load_audio(audio_path)
+        return self.predict_track_from_array(y_full, sr, segments=segments)
+    
+    def predict_track_from_array(
+        self,
+        y_full: np.ndarray,
+        sr: int,
+        segments: Optional[list] = None
+    ) -> Tuple[str, float, np.ndarray]:
+        """
+        Predict genre for already-decoded audio using the configured segment sampling
+        
+        Args:
+            y_full: Mono audio samples
+            sr: Sample rate of y_full
+            segments: Optional list that receives (offset_seconds, feature_row) per analyzed segment
+        
+        Returns:
+            Tuple of (predicted_genre, confidence, averaged_probabilities)
+        """
+        if SEGMENT_SAMPLING == 'adaptive':
+            return self.predict_adaptive_from_array(y_full, sr, segments=segments)
+        return self.predict_multi_segment_from_array(y_full, sr, num_segments=FIXED_SEGMENTS, segments=segments)
+    
     def predict_multi_segment(self, audio_path: str, num_segments: int = 10) -> Tuple[str, float, np.ndarray]:
         """
         Predict genre by analyzing multiple 3-second segments (more accurate)
@@ -106,108 +253,204 @@ class GenrePredictor:
         Returns:
             Tuple of (predicted_genre, confidence, averaged_probabilities)
         """
-        import librosa
-        from app.services.audio_processor import extract_features
+        y_full, sr = self._load_audio(audio_path)
+        return self.predict_multi_segment_from_array(y_full, sr, num_segments=num_segments)
+    
+    def _load_audio(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        """Decode a file to mono model-rate samples (AUDIO_DECODER backend)"""
+        try:
+            with stage_timer("decode"):
+                return decode_audio(audio_path, sr=SAMPLE_RATE), SAMPLE_RATE
+        except Exception as e:
+            raise Exception(f"Multi-segment prediction failed: {str(e)}")
+    
+    def predict_multi_segment_from_array(
+        self,
+        y_full: np.ndarray,
+        sr: int,
+        num_segments: int = 10,
+        segments: Optional[list] = None
+    ) -> Tuple[str, float, np.ndarray]:
+        """
+        Predict genre from already-decoded audio by analyzing multiple 3-second segments
+        
+        Args:
+            y_full: Mono audio samples
+            sr: Sample rate of y_full
+            num_segments: Number of segments to analyze (default 10)
+            segments: Optional list that receives (offset_seconds, feature_row) per analyzed segment
+        
+        Returns:
+            Tuple of (predicted_genre, confidence, averaged_probabilities)
+        """
+        if segments is None:
+            segments = []
         
         try:
-            # Load full audio
-            y_full, sr = librosa.load(audio_path, sr=22050)
             total_duration = len(y_full) / sr
-            segment_duration = 3.0
-            segment_samples = int(segment_duration * sr)
             
             # Determine segment positions (evenly spaced)
-            if total_duration < segment_duration:
+            if total_duration < SEGMENT_DURATION:
                 # Audio too short, use single segment
-                features = extract_features(audio_path)
-                return self.predict(features)
+                row = extract_feature_vector(y_full, sr)
+                segments.append((0.0, row))
+                SEGMENTS_ANALYZED.observe(1, mode='fixed')
+                return self.predict_vector(row)
             
-            max_offset = total_duration - segment_duration
+            max_offset = total_duration - SEGMENT_DURATION
             if num_segments == 1:
                 offsets = [max_offset / 2]
             else:
                 offsets = np.linspace(0, max_offset, num_segments)
             
-            # Predict for each segment
+            # Predict for each segment, extracting into one preallocated block
             all_probabilities = []
+            block = np.empty((len(offsets), NUM_FEATURES), dtype=np.float32)
+            tempograms = []
             
-            for offset in offsets:
-                # Extract segment
-                start_sample = int(offset * sr)
-                end_sample = start_sample + segment_samples
-                y_segment = y_full[start_sample:end_sample]
-                
-                # Pad if needed
-                if len(y_segment) < segment_samples:
-                    y_segment = np.pad(y_segment, (0, segment_samples - len(y_segment)))
-                
-                # Extract features from segment
-                features = self._extract_features_from_array(y_segment, sr)
-                
-                # Predict
-                _, _, probs = self.predict(features)
-                all_probabilities.append(probs)
-            
-            # Average probabilities across all segments
-            avg_probabilities = np.mean(all_probabilities, axis=0)
+            for row, offset in zip(block, offsets):
+                extract_feature_vector(self._segment(y_full, sr, offset), sr, out=row, tempograms=tempograms)
+                segments.append((float(offset), row))
+                if TEMPO_SCOPE != 'song':
+                    _, _, probs = self.predict_vector(row)
+                    all_probabilities.append(probs)
             
-            # Get final prediction
-            predicted_class = np.argmax(avg_probabilities)
-            predicted_genre = self.label_encoder.inverse_transform([predicted_class])[0]
-            confidence = avg_probabilities[predicted_class]
+            # With a song tempo the rows are only final once every segment is in; score them once
+            if TEMPO_SCOPE == 'song':
+                all_probabilities = self._apply_song_tempo(block, tempograms, sr)
             
-            return predicted_genre, confidence, avg_probabilities
+            SEGMENTS_ANALYZED.observe(len(offsets), mode='fixed')
+            return self._average(all_probabilities)
             
         except Exception as e:
             raise Exception(f"Multi-segment prediction failed: {str(e)}")
     
-    def _extract_features_from_array(self, y: np.ndarray, sr: int) -> Dict[str, float]:
-        """Extract features from audio array (for multi-segment)"""
-        import librosa
-        
-        features = {}
+    def predict_adaptive_from_array(
+        self,
+        y_full: np.ndarray,
+        sr: int,
+        min_segments: int = ADAPTIVE_MIN_SEGMENTS,
+        max_segments: int = ADAPTIVE_MAX_SEGMENTS,
+        segments: Optional[list] = None
+    ) -> Tuple[str, float, np.ndarray]:
+        """
+        Predict genre from already-decoded audio, analyzing segments until the
+        averaged prediction is settled
         
-        features['length'] = len(y)
+        Segments are visited in coverage order (middle, quarters, eighths, ...)
+        so any prefix is spread over the whole track. After min_segments, the
+        track stops early once the top genre leads the runner-up by at least
+        ADAPTIVE_MIN_MARGIN and by ADAPTIVE_LEAD_Z standard errors of the
+        per-segment lead; ambiguous tracks keep sampling up to max_segments.
         
-        chroma_stft = librosa.feature.chroma_stft(y=y, sr=sr)
-        features['chroma_stft_mean'] = np.mean(chroma_stft)
-        features['chroma_stft_var'] = np.var(chroma_stft)
+        Args:
+            y_full: Mono audio samples
+            sr: Sample rate of y_full
+            min_segments: Segments analyzed before early exit is considered
+            max_segments: Upper bound on analyzed segments
+            segments: Optional list that receives (offset_seconds, feature_row) per analyzed segment
         
-        rms = librosa.feature.rms(y=y)
-        features['rms_mean'] = np.mean(rms)
-        features['rms_var'] = np.var(rms)
+        Returns:
+            Tuple of (predicted_genre, confidence, averaged_probabilities)
+        """
+        if segments is None:
+            segments = []
         
-        spec_cent = librosa.feature.spectral_centroid(y=y, sr=sr)
-        features['spectral_centroid_mean'] = np.mean(spec_cent)
-        features['spectral_centroid_var'] = np.var(spec_cent)
+        try:
+            total_duration = len(y_full) / sr
+            
+            if total_duration < SEGMENT_DURATION:
+                row = extract_feature_vector(y_full, sr)
+                segments.append((0.0, row))
+                SEGMENTS_ANALYZED.observe(1, mode='adaptive')
+                return self.predict_vector(row)
+            
+            # Short tracks have room for fewer distinct segments
+            max_offset = total_duration - SEGMENT_DURATION
+            limit = min(max_segments, max(min_segments, int(total_duration // SEGMENT_DURATION)))
+            
+            all_probabilities = []
+            block = np.empty((limit, NUM_FEATURES), dtype=np.float32)
+            tempograms = []
+            for row, position in zip(block, coverage_positions(limit)):
+                offset = float(position * max_offset)
+                extract_feature_vector(self._segment(y_full, sr, offset), sr, out=row, tempograms=tempograms)
+                segments.append((offset, row))
+                _, _, probs = self.predict_vector(row)
+                all_probabilities.append(probs)
+                
+                if len(all_probabilities) >= min_segments and self._is_settled(np.array(all_probabilities)):
+                    break
+            
+            # Early exit was decided on per-segment tempos; the final average uses the song tempo
+            if TEMPO_SCOPE == 'song':
+                all_probabilities = self._apply_song_tempo(block[:len(all_probabilities)], tempograms, sr)
+            
+            SEGMENTS_ANALYZED.observe(len(all_probabilities), mode='adaptive')
+            return self._average(all_probabilities)
+            
+        except Exception as e:
+            raise Exception(f"Adaptive prediction failed: {str(e)}")
+    
+    def _apply_song_tempo(self, block: np.ndarray, tempograms: List[Optional[np.ndarray]], sr: int) -> np.ndarray:
+        """
+        Give every segment one tempo estimated over all analyzed segments and re-score them
         
-        spec_bw = librosa.feature.spectral_bandwidth(y=y, sr=sr)
-        features['spectral_bandwidth_mean'] = np.mean(spec_bw)
-        features['spectral_bandwidth_var'] = np.var(spec_bw)
+        Args:
+            block: Per-segment feature rows (segments x 58, updated in place)
+            tempograms: Per-segment tempograms from extract_feature_vector
+            sr: Sample rate
         
-        rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)
-        features['rolloff_mean'] = np.mean(rolloff)
-        features['rolloff_var'] = np.var(rolloff)
+        Returns:
+            Per-segment probabilities (segments x genres)
+        """
+        with stage_timer("feature_tempo"):
+            block[:, TEMPO_COLUMN] = estimate_tempo(tempograms, sr)
+        return self.predict_proba_batch(block[:, self.column_index])
+    
+    @staticmethod
+    def _is_settled(probabilities: np.ndarray) -> bool:
+        """
+        Early-exit test on per-segment probabilities (segments x genres)
         
-        zcr = librosa.feature.zero_crossing_rate(y)
-        features['zero_crossing_rate_mean'] = np.mean(zcr)
-        features['zero_crossing_rate_var'] = np.var(zcr)
+        Returns:
+            True if the averaged top genre clearly and consistently leads the runner-up
+        """
+        mean = probabilities.mean(axis=0)
+        second, top = np.argsort(mean)[-2:]
+        leads = probabilities[:, top] - probabilities[:, second]
+        lead = leads.mean()
         
-        y_harm, y_perc = librosa.effects.hpss(y)
-        features['harmony_mean'] = np.mean(y_harm)
-        features['harmony_var'] = np.var(y_harm)
-        features['perceptr_mean'] = np.mean(y_perc)
-        features['perceptr_var'] = np.var(y_perc)
+        if lead < ADAPTIVE_MIN_MARGIN:
+            return False
+        stderr = leads.std(ddof=1) / np.sqrt(len(leads))
+        return lead >= ADAPTIVE_LEAD_Z * stderr
+    
+    @staticmethod
+    def _segment(y_full: np.ndarray, sr: int, offset: float) -> np.ndarray:
+        """Cut one 3-second segment starting at offset seconds (zero-padded at the end)"""
+        segment_samples = int(SEGMENT_DURATION * sr)
+        start_sample = int(offset * sr)
+        y_segment = y_full[start_sample:start_sample + segment_samples]
         
-        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-        features['tempo'] = float(tempo.item() if isinstance(tempo, np.ndarray) else tempo)
+        # Pad if needed
+        if len(y_segment) < segment_samples:
+            y_segment = np.pad(y_segment, (0, segment_samples - len(y_segment)))
+        return y_segment
+    
+    def _average(self, all_probabilities) -> Tuple[str, float, np.ndarray]:
+        """Average per-segment probabilities into a final prediction"""
+        avg_probabilities = np.mean(all_probabilities, axis=0)
         
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=20)
-        for i in range(1, 21):
-            features[f'mfcc{i}_mean'] = np.mean(mfccs[i-1])
-            features[f'mfcc{i}_var'] = np.var(mfccs[i-1])
+        predicted_class = np.argmax(avg_probabilities)
+        predicted_genre = self.label_encoder.inverse_transform([predicted_class])[0]
+        confidence = avg_probabilities[predicted_class]
         
-        return features
+        return predicted_genre, confidence, avg_probabilities
+    
+    def _extract_features_from_array(self, y: np.ndarray, sr: int) -> Dict[str, float]:
+        """Extract features from audio array as a dict (see extract_feature_vector for the array form)"""
+        return features_to_dict(extract_feature_vector(y, sr))
     
     def get_probabilities_dict(self, probabilities: np.ndarray) -> Dict[str, float]:
         """
@@ -225,18 +468,271 @@ class GenrePredictor:
         return prob_dict
 
 
-# Global predictor instance (singleton)
-_predictor_instance = None
+class ModelRegistry:
+    """
+    Versioned predictors behind get_predictor()
+    
+    New model packages are loaded and warmed on a background thread, then either
+    replace the active model atomically or serve a fraction of traffic as a
+    candidate. Requests already holding a predictor finish on that version.
+    
+    Every change is written to MODEL_STATE_PATH; the registries of other server
+    processes notice the new state within MODEL_SYNC_INTERVAL seconds and load
+    the same models in the background.
+    """
+    
+    def __init__(self):
+        """Initialize an empty registry (the default model loads on first use)"""
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._active: Optional[GenrePredictor] = None
+        self._candidate: Optional[GenrePredictor] = None
+        self._previous: Optional[GenrePredictor] = None
+        self.traffic_split = 0.0  # fraction of predictions served by the candidate
+        self.loading: Optional[Dict] = None  # state of the most recent background load
+        self.generation: Optional[str] = None  # MODEL_STATE_PATH state this registry matches
+        self._state_mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._syncing = False
+    
+    @property
+    def active(self) -> GenrePredictor:
+        """The active predictor (loads MODEL_PATH on first use)"""
+        if self._active is None:
+            with self._lock:
+                if self._active is None:
+                    self._active = GenrePredictor()
+        return self._active
+    
+    @property
+    def candidate(self) -> Optional[GenrePredictor]:
+        """The candidate predictor receiving split traffic, if any"""
+        return self._candidate
+    
+    def choose(self, record: bool = True) -> GenrePredictor:
+        """
+        Pick the predictor for one track according to the traffic split
+        
+        Args:
+            record: Count the selection in MODEL_SELECTIONS (False for non-track use)
+        """
+        active = self.active
+        self.sync()
+        candidate = self._candidate
+        predictor = candidate if candidate is not None and self._rng.random() < self.traffic_split else active
+        if record:
+            MODEL_SELECTIONS.inc(version=predictor.version)
+        return predictor
+    
+    def activate(self, predictor: GenrePredictor):
+        """Make a loaded predictor active immediately (the old one is kept for rollback)"""
+        with self._lock:
+            self._previous, self._active = self._active, predictor
+            if self._candidate is predictor:
+                self._candidate, self.traffic_split = None, 0.0
+            self._publish()
+        print(f"🔀 Active model: {predictor.version}")
+    
+    def set_candidate(self, predictor: GenrePredictor, traffic_split: float):
+        """Serve traffic_split of predictions with a loaded predictor"""
+        with self._lock:
+            self._candidate, self.traffic_split = predictor, traffic_split
+            self._publish()
+        print(f"🔀 Candidate model {predictor.version} receives {traffic_split:.0%} of traffic")
+    
+    def set_split(self, traffic_split: float):
+        """Change the candidate's share of traffic"""
+        with self._lock:
+            if self._candidate is None:
+                raise Exception("No candidate model loaded")
+            self.traffic_split = traffic_split
+            self._publish()
+    
+    def promote(self):
+        """Make the candidate the active model"""
+        candidate = self._candidate
+        if candidate is None:
+            raise Exception("No candidate model loaded")
+        self.activate(candidate)
+    
+    def rollback(self):
+        """Drop the candidate, or if there is none, return to the previous active model"""
+        with self._lock:
+            if self._candidate is not None:
+                self._candidate, self.traffic_split = None, 0.0
+                self._publish()
+                return
+            if self._previous is None:
+                raise Exception("No previous model to roll back to")
+            self._active, self._previous = self._previous, None
+            self._publish()
+        print(f"🔀 Rolled back to model {self._active.version}")
+    
+    def load(self, model_path: Path, traffic_split: float = 1.0) -> bool:
+        """
+        Load and warm a model package on a background thread, then switch to it
+        (traffic_split 1.0) or make it the candidate (0 < traffic_split < 1)
+        
+        Args:
+            model_path: Model package to load
+            traffic_split: Share of predictions for the new model once warm
+        
+        Returns:
+            False if another load is still in progress
+        """
+        with self._lock:
+            if self.loading is not None and self.loading['status'] == 'loading':
+                return False
+            self.loading = {'model_path': str(model_path), 'status': 'loading', 'version': None, 'error': None}
+        
+        threading.Thread(
+            target=self._load, args=(Path(model_path), traffic_split), name="model-load", daemon=True
+        ).start()
+        return True
+    
+    def _load(self, model_path: Path, traffic_split: float):
+        """Background part of load()"""
+        state = self.loading
+        try:
+            predictor = GenrePredictor(model_path)
+            predictor.warm_up()
+            state['version'] = predictor.version
+            
+            if traffic_split >= 1.0:
+                self.activate(predictor)
+            else:
+                self.set_candidate(predictor, traffic_split)
+            state['status'] = 'ready'
+        
+        except Exception as e:
+            state['status'] = 'failed'
+            state['error'] = str(e)
+            print(f"❌ Model load failed: {e}")
+    
+    def _publish(self):
+        """Write the current models and split to MODEL_STATE_PATH for other processes (lock held)"""
+        def path_of(predictor: Optional[GenrePredictor]) -> Optional[str]:
+            return str(predictor.model_path) if predictor is not None else None
+        
+        self.generation = uuid.uuid4().hex
+        state = {
+            'generation': self.generation,
+            'active': path_of(self._active),
+            'candidate': path_of(self._candidate),
+            'traffic_split': self.traffic_split,
+            'previous': path_of(self._previous),
+        }
+        try:
+            temp = MODEL_STATE_PATH.with_name(f"{MODEL_STATE_PATH.name}.{os.getpid()}.tmp")
+            temp.write_text(json.dumps(state, indent=2))
+            os.replace(temp, MODEL_STATE_PATH)
+            self._state_mtime = MODEL_STATE_PATH.stat().st_mtime_ns
+        except OSError as e:
+            print(f"⚠️  Could not share model state with other workers: {e}")
+    
+    def sync(self):
+        """
+        Adopt a model state published by another process (checked at most every
+        MODEL_SYNC_INTERVAL seconds; models are loaded in the background)
+        """
+        now = time.monotonic()
+        if now - self._checked_at < MODEL_SYNC_INTERVAL or self._syncing:
+            return
+        self._checked_at = now
+        try:
+            mtime = MODEL_STATE_PATH.stat().st_mtime_ns
+            if mtime == self._state_mtime:
+                return
+            state = json.loads(MODEL_STATE_PATH.read_text())
+        except (OSError, ValueError):
+            return  # No shared state yet (or mid-write; retried next check)
+        
+        self._state_mtime = mtime
+        if state.get('generation') == self.generation:
+            return
+        self._syncing = True
+        threading.Thread(target=self._adopt, args=(state,), name="model-sync", daemon=True).start()
+    
+    def _adopt(self, state: Dict):
+        """Background part of sync(): load the state's models, then switch to them"""
+        try:
+            loaded = {
+                str(predictor.model_path): predictor
+                for predictor in (self._active, self._candidate, self._previous) if predictor is not None
+            }
+            
+            def predictor_for(path: Optional[str]) -> Optional[GenrePredictor]:
+                if path is None or path in loaded:
+                    return loaded.get(path)
+                predictor = loaded[path] = GenrePredictor(Path(path))
+                predictor.warm_up()
+                return predictor
+            
+            active = predictor_for(state['active'])
+            candidate = predictor_for(state['candidate'])
+            with self._lock:
+                self._active = active or self._active
+                self._candidate, self.traffic_split = candidate, state['traffic_split'] if candidate else 0.0
+                self._previous = loaded.get(state['previous'])
+                self.generation = state['generation']
+            print(f"🔀 Synced model state: active {self.active.version}, candidate "
+                  f"{candidate.version if candidate else None} ({self.traffic_split:.0%})")
+        
+        except Exception as e:
+            self.generation = state.get('generation')  # don't retry a broken state every check
+            print(f"❌ Model sync failed: {e}")
+        
+        finally:
+            self._syncing = False
+    
+    def status(self) -> Dict:
+        """Versions, traffic split and load state for the admin API"""
+        self.sync()
+        def describe(predictor: Optional[GenrePredictor]) -> Optional[Dict]:
+            if predictor is None:
+                return None
+            return {'version': predictor.version, 'model_path': str(predictor.model_path)}
+        
+        return {
+            'active': describe(self._active),
+            'candidate': describe(self._candidate),
+            'traffic_split': self.traffic_split,
+            'previous': describe(self._previous),
+            'loading': self.loading,
+            'generation': self.generation,
+            'pid': os.getpid(),
+        }
+
+
+# Global registry shared by all prediction paths
+model_registry = ModelRegistry()
 
 
 def get_predictor() -> GenrePredictor:
     """
-    Get the global predictor instance (lazy initialization)
+    Get the predictor for one prediction (the active model, or the candidate
+    for its share of traffic)
     
     Returns:
         GenrePredictor instance
     """
-    global _predictor_instance
-    if _predictor_instance is None:
-        _predictor_instance = GenrePredictor()
-    return _predictor_instance
\ No newline at end of file
+    return model_registry.choose()
+
+
+def preload_shared_model():
+    """
+    Load the active model in a parent process before workers are forked
+    
+    Weights are moved to shared memory so every worker maps the same pages, and
+    the objects that exist now are frozen out of the cyclic GC so collections in
+    the workers don't dirty (and copy) the inherited heap. No forward pass runs
+    here: torch/OpenMP thread pools started before fork() can hang in the child,
+    so each worker warms up after forking instead.
+    """
+    import gc
+    
+    predictor = model_registry.active
+    predictor.model.share_memory()
+    gc.collect()
+    gc.freeze()
+    print(f"📌 Preloaded model {predictor.version} for forked workers")
@@ -0,0 +1,252 @@
+"""
+On-demand upload profiling service
+A low-overhead sampling profiler that only samples the threads running one
+upload, plus the rate-limited gate that decides which upload gets profiled
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import PROFILE_DIR, PROFILE_MIN_INTERVAL, PROFILE_SAMPLE_INTERVAL
+
+MAX_STACK_DEPTH = 128
+TOP_FUNCTIONS = 40
+
+
+def _frame_label(frame) -> str:
+    """Readable label for a stack frame: function (file:line)"""
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> Tuple[str, ...]:
+    """Stack of frame labels, outermost first"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of attached threads at a fixed interval
+    
+    Other threads (and so other requests) are never sampled; the only shared
+    cost is the sampler thread waking up every `interval` seconds.
+    """
+    
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        """Initialize an idle profiler"""
+        self.interval = interval
+        self._threads: set = set()
+        self._stacks: StackCounter = StackCounter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+    
+    def start(self):
+        """Start the sampler thread"""
+        self.started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name="upload-profiler", daemon=True)
+        self._sampler.start()
+    
+    def stop(self):
+        """Stop sampling"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.stopped_at = time.perf_counter()
+    
+    def _run(self):
+        """Sampler loop"""
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id in self._threads:
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self._stacks[_stack(frame)] += 1
+                        self.samples += 1
+    
+    def wrap(self, fn: Callable) -> Callable:
+        """
+        Wrap a callable so the thread running it is sampled while it runs
+        
+        Args:
+            fn: Callable to profile (typically submitted to a worker pool)
+        
+        Returns:
+            Wrapped callable taking the same arguments
+        """
+        @wraps(fn)
+        def run(*args, **kwargs):
+            thread_id = threading.get_ident()
+            with self._lock:
+                self._threads.add(thread_id)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._threads.discard(thread_id)
+        
+        return run
+    
+    def report(self) -> Dict:
+        """
+        Summarize the samples
+        
+        Returns:
+            Dict with sample counts, the hottest functions by self and total
+            samples, and collapsed stacks (flamegraph.pl / speedscope format)
+        """
+        with self._lock:
+            stacks = dict(self._stacks)
+        
+        self_counts: StackCounter = StackCounter()
+        total_counts: StackCounter = StackCounter()
+        for stack, count in stacks.items():
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+        
+        def top(counter: StackCounter) -> List[Dict]:
+            return [
+                {"function": label, "samples": count, "percent": round(100.0 * count / max(self.samples, 1), 1)}
+                for label, count in counter.most_common(TOP_FUNCTIONS)
+            ]
+        
+        end = self.stopped_at if self.stopped_at is not None else time.perf_counter()
+        return {
+            "interval_ms": self.interval * 1000,
+            "wall_seconds": round(end - (self.started_at or end), 3),
+            "samples": self.samples,
+            "top_self": top(self_counts),
+            "top_total": top(total_counts),
+            "collapsed": "\n".join(
+                f"{';'.join(stack)} {count}"
+                for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+            ),
+        }
+
+
+class ProfileGate:
+    """
+    Decides which upload runs under the profiler
+    
+    An upload is profiled when it asks to be (admin header) or an admin armed
+    the gate, at most one upload at a time and no more often than every
+    PROFILE_MIN_INTERVAL seconds (per server process).
+    
+    Arming creates a marker file in PROFILE_DIR, so the next upload on any
+    server process is profiled; the process that profiles it removes the marker.
+    """
+    
+    def __init__(self, min_interval: float = PROFILE_MIN_INTERVAL, marker: Path = PROFILE_DIR / ".armed"):
+        """Initialize a gate (armed if the marker exists)"""
+        self.min_interval = min_interval
+        self.marker = marker
+        self._lock = threading.Lock()
+        self._active = False
+        self._last_start: Optional[float] = None
+    
+    def arm(self):
+        """Profile the next upload on any server process"""
+        self.marker.parent.mkdir(parents=True, exist_ok=True)
+        self.marker.touch()
+    
+    @property
+    def armed(self) -> bool:
+        """Whether the next upload will be profiled"""
+        return self.marker.exists()
+    
+    def _claim_armed(self) -> bool:
+        """Consume the armed marker (only one process succeeds)"""
+        try:
+            self.marker.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def begin(self, requested: bool = False) -> Tuple[Optional[SamplingProfiler], str]:
+        """
+        Start a profiler for an upload if it should be profiled
+        
+        Args:
+            requested: The upload explicitly asked to be profiled
+        
+        Returns:
+            Tuple of (running profiler or None, status) where status is
+            'recording', 'rate_limited' or 'off'
+        """
+        with self._lock:
+            if not (requested or self.armed):
+                return None, 'off'
+            
+            now = time.monotonic()
+            if self._active or (self._last_start is not None and now - self._last_start < self.min_interval):
+                return None, 'rate_limited'
+            
+            if not requested and not self._claim_armed():
+                return None, 'off'  # another process took the armed upload
+            self._active = True
+            self._last_start = now
+        
+        profiler = SamplingProfiler()
+        profiler.start()
+        return profiler, 'recording'
+    
+    def finish(self, profiler: SamplingProfiler, song_id: Optional[int] = None):
+        """
+        Stop the profiler, store its report if the upload produced a song (and
+        actually ran under the profiler), and release the gate
+        
+        Args:
+            profiler: Profiler returned by begin()
+            song_id: ID of the stored song (None if the upload failed)
+        """
+        try:
+            profiler.stop()
+            if song_id is not None and profiler.samples > 0:
+                save_report(song_id, profiler.report())
+        finally:
+            with self._lock:
+                self._active = False
+
+
+def save_report(song_id: int, report: Dict):
+    """Write a profile report to PROFILE_DIR/{song_id}.json"""
+    PROFILE_DIR.mkdir(exist_ok=True)
+    report = {"song_id": song_id, "created_at": datetime.now(timezone.utc).isoformat(), **report}
+    (PROFILE_DIR / f"{song_id}.json").write_text(json.dumps(report, indent=2))
+    print(f"🔬 Stored profile for song {song_id} ({report['samples']} samples)")
+
+
+def load_report(song_id: int) -> Optional[Dict]:
+    """Load a stored profile report, or None if there is none"""
+    path = PROFILE_DIR / f"{song_id}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def list_reports() -> List[int]:
+    """Song IDs that have a stored profile report, newest first"""
+    if not PROFILE_DIR.exists():
+        return []
+    paths = sorted(PROFILE_DIR.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    return [int(path.stem) for path in paths if path.stem.isdigit()]
+
+
+# Global gate shared by all upload endpoints
+profile_gate = ProfileGate()
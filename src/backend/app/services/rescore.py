@@ -0,0 +1,213 @@
+"""
+Library re-score service
+Re-predicts every song from its stored segment features with batched inference,
+so a new model can be applied without decoding any audio
+
+Usage (offline):
+    python -m app.services.rescore [--model path/to/model.pkl]
+"""
+
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from sqlalchemy import func, select, update
+
+from app.config import GENRE_ORDER, RESCORE_BATCH_SONGS
+from app.database import SessionLocal
+from app.models.song import Song
+from app.models.song_features import SongFeatures
+from app.services.feature_store import update_song_probabilities
+from app.services.segment_features import stack_features
+from app.services.song_store import prediction_columns
+from app.services.song_events import publish_library_reset
+
+
+def rescore_library(
+    predictor,
+    batch_songs: int = RESCORE_BATCH_SONGS,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Re-predict all songs that have stored segment features
+    
+    Args:
+        predictor: GenrePredictor to score with
+        batch_songs: Songs loaded and scored per step
+        on_progress: Called with (songs_rescored, genres_changed) after each step
+    
+    Returns:
+        Dict with rescored, changed (predicted genre differs) and missing
+        (songs without stored features, which need a full reprocess)
+    """
+    db = SessionLocal()
+    rescored = changed = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.execute(
+                select(SongFeatures)
+                .where(SongFeatures.song_id > last_id, SongFeatures.num_segments > 0)
+                .order_by(SongFeatures.song_id)
+                .limit(batch_songs)
+            ).scalars().all()
+            if not rows:
+                break
+            last_id = rows[-1].song_id
+            
+            # One model pass over every segment of every song in the step
+            features, counts = stack_features(rows, predictor.feature_columns)
+            probabilities = predictor.predict_proba_batch(features)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            song_probabilities = np.add.reduceat(probabilities, starts, axis=0) / counts[:, None]
+            
+            top = song_probabilities.argmax(axis=1)
+            genres = predictor.label_encoder.inverse_transform(top)
+            previous = dict(db.execute(
+                select(Song.id, Song.predicted_genre).where(Song.id.in_([row.song_id for row in rows]))
+            ).all())
+            
+            updates = []
+            for row, genre, probs, best in zip(rows, genres, song_probabilities, top):
+                if row.song_id not in previous:
+                    continue
+                changed += previous[row.song_id] != genre
+                updates.append({'id': row.song_id, **prediction_columns(predictor, str(genre), probs[best], probs)})
+            
+            if updates:
+                db.execute(update(Song), updates)
+            db.commit()
+            update_song_probabilities(
+                [values['id'] for values in updates],
+                [[values[f'prob_{genre}'] for genre in GENRE_ORDER] for values in updates]
+            )
+            rescored += len(updates)
+            
+            if on_progress is not None:
+                on_progress(rescored, changed)
+        
+        with_features = select(SongFeatures.song_id).where(SongFeatures.num_segments > 0)
+        missing = db.scalar(select(func.count(Song.id)).where(Song.id.not_in(with_features)))
+        return {'rescored': rescored, 'changed': changed, 'missing': missing}
+    
+    finally:
+        db.close()
+
+
+class RescoreJob:
+    """
+    A background library re-score
+    """
+    
+    def __init__(self, model_path: Optional[str]):
+        """Initialize a running job"""
+        self.id = uuid.uuid4().hex
+        self.model_path = model_path
+        self.status = 'running'
+        self.total: Optional[int] = None
+        self.rescored = 0
+        self.changed = 0
+        self.missing: Optional[int] = None
+        self.error: Optional[str] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+    
+    def to_dict(self) -> Dict:
+        """JSON-friendly status"""
+        return {
+            'id': self.id,
+            'model_path': self.model_path,
+            'status': self.status,
+            'total': self.total,
+            'rescored': self.rescored,
+            'changed': self.changed,
+            'missing': self.missing,
+            'error': self.error,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+_job: Optional[RescoreJob] = None
+_job_lock = threading.Lock()
+
+
+def start_rescore(model_path: Optional[str] = None) -> Optional[RescoreJob]:
+    """
+    Start re-scoring the library on a background thread
+    
+    Args:
+        model_path: Model package to score with (default: the serving model)
+    
+    Returns:
+        The running RescoreJob, or None if one is already running
+    """
+    global _job
+    with _job_lock:
+        if _job is not None and _job.status == 'running':
+            return None
+        _job = RescoreJob(model_path)
+    
+    threading.Thread(target=_run, args=(_job,), name="rescore", daemon=True).start()
+    return _job
+
+
+def get_rescore() -> Optional[RescoreJob]:
+    """The current or most recent re-score job"""
+    return _job
+
+
+def _run(job: RescoreJob):
+    """Load the model and re-score, recording progress on the job"""
+    from app.services.predictor import GenrePredictor, model_registry
+    
+    try:
+        predictor = GenrePredictor(Path(job.model_path)) if job.model_path else model_registry.active
+        
+        db = SessionLocal()
+        try:
+            job.total = db.scalar(select(func.count()).select_from(SongFeatures).where(SongFeatures.num_segments > 0))
+        finally:
+            db.close()
+        
+        print(f"🔁 Re-scoring {job.total} songs")
+        
+        def on_progress(rescored: int, changed: int):
+            job.rescored, job.changed = rescored, changed
+        
+        result = rescore_library(predictor, on_progress=on_progress)
+        job.rescored, job.changed, job.missing = result['rescored'], result['changed'], result['missing']
+        job.status = 'completed'
+        if job.rescored:
+            publish_library_reset('rescored')  # positions moved
+        print(f"✅ Re-scored {job.rescored} songs ({job.changed} changed genre, {job.missing} without stored features)")
+    
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+        print(f"❌ Re-score failed: {e}")
+    
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description="Re-score all songs from stored segment features")
+    parser.add_argument("--model", help="Model package (default: MODEL_PATH)")
+    args = parser.parse_args()
+    
+    from app.database import create_tables
+    create_tables()
+    
+    start = time.perf_counter()
+    job = start_rescore(args.model)
+    while job.status == 'running':
+        time.sleep(1)
+    print(job.to_dict())
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
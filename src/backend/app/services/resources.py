@@ -0,0 +1,212 @@
+"""
+CPU thread budget service
+Splits the CPUs available to this container between server workers and their
+classify jobs, and caps the threads torch, BLAS (numpy/scipy/librosa) and numba
+may start so concurrent jobs don't oversubscribe the cores
+"""
+
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import WEB_WORKERS, CLASSIFY_WORKERS, CPU_LIMIT, THREADS_PER_JOB
+
+# Read by the native libraries when they are first loaded
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "NUMBA_NUM_THREADS",
+)
+
+_plan: Optional[Dict] = None
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process with this ID exists (e.g. the owner of a pin or batch file)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    CPU quota of this process's cgroup (v2 cpu.max or v1 cfs quota)
+    
+    Returns:
+        Number of CPUs the quota allows, or None if unlimited or unknown
+    """
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    
+    return None
+
+
+def available_cpus() -> Dict:
+    """
+    CPUs this process may use: the smallest of the CPU count, the affinity mask,
+    the cgroup quota and CPU_LIMIT
+    
+    Returns:
+        Dict with each source and the resulting 'cpus' (at least 1)
+    """
+    try:
+        affinity = len(os.sched_getaffinity(0))
+    except AttributeError:
+        affinity = None
+    
+    sources = {
+        "cpu_count": os.cpu_count(),
+        "affinity": affinity,
+        "cgroup_quota": cgroup_cpu_limit(),
+        "cpu_limit": float(CPU_LIMIT) if CPU_LIMIT else None,
+    }
+    limits = [value for value in sources.values() if value]
+    sources["cpus"] = max(1, math.floor(min(limits))) if limits else 1
+    return sources
+
+
+def plan_thread_budget() -> Dict:
+    """
+    Divide the available CPUs between server workers and concurrent classify jobs
+    
+    Returns:
+        Dict describing the budget; 'threads_per_job' is applied to torch, BLAS and numba
+    """
+    cpus = available_cpus()
+    per_worker = max(1, cpus["cpus"] // max(WEB_WORKERS, 1))
+    threads_per_job = int(THREADS_PER_JOB) if THREADS_PER_JOB else max(1, per_worker // max(CLASSIFY_WORKERS, 1))
+    
+    return {
+        **cpus,
+        "web_workers": WEB_WORKERS,
+        "cpus_per_worker": per_worker,
+        "classify_workers": CLASSIFY_WORKERS,
+        "threads_per_job": threads_per_job,
+    }
+
+
+def apply_thread_budget() -> Dict:
+    """
+    Apply the thread budget to this process
+    
+    Call once at startup before numpy/torch/numba are imported (so the
+    environment variables take effect), and again in every forked worker;
+    libraries that are already loaded are limited at runtime. Set
+    THREADS_PER_JOB to override the computed thread count.
+    
+    Returns:
+        The applied plan
+    """
+    global _plan
+    plan = plan_thread_budget()
+    threads = plan["threads_per_job"]
+    
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+    
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # only settable before the first parallel op
+    
+    if "numpy" in sys.modules:
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=threads)
+        except ImportError:
+            pass
+    
+    _plan = plan
+    return plan
+
+
+def init_job_thread():
+    """
+    Thread initializer for the classify pool
+    
+    numba.set_num_threads() only applies to the calling thread, so it must run
+    in each pool thread that executes numba code (NUMBA_NUM_THREADS, set by
+    apply_thread_budget, is only the upper bound and only if set before import).
+    """
+    plan = _plan or plan_thread_budget()
+    try:
+        import numba
+    except ImportError:
+        return
+    numba.set_num_threads(min(plan["threads_per_job"], numba.config.NUMBA_NUM_THREADS))
+
+
+def thread_report() -> Dict:
+    """
+    Planned budget and the settings each library actually uses in this process
+    
+    Returns:
+        Dict for the diagnostic endpoint
+    """
+    report = {
+        "pid": os.getpid(),
+        "plan": _plan,
+        "env": {name: os.environ.get(name) for name in THREAD_ENV_VARS},
+        "torch": None,
+        "numba": None,
+        "blas": None,
+        "pools": None,
+    }
+    
+    if "torch" in sys.modules:
+        import torch
+        report["torch"] = {
+            "num_threads": torch.get_num_threads(),
+            "num_interop_threads": torch.get_num_interop_threads(),
+        }
+    
+    if "numba" in sys.modules:
+        import numba
+        report["numba"] = {
+            "num_threads": numba.get_num_threads(),
+            "threading_layer": numba.config.THREADING_LAYER,
+        }
+    
+    try:
+        from threadpoolctl import threadpool_info
+        report["blas"] = [
+            {key: info.get(key) for key in ("internal_api", "prefix", "num_threads", "version")}
+            for info in threadpool_info()
+        ]
+    except ImportError:
+        pass
+    
+    if "app.services.youtube_ingest" in sys.modules:
+        from app.services.youtube_ingest import download_executor, classify_executor
+        report["pools"] = {
+            "download": download_executor._max_workers,
+            "classify": classify_executor._max_workers,
+        }
+    
+    return report
@@ -0,0 +1,72 @@
+"""
+Segment feature persistence service
+Encodes the per-segment feature vectors of a prediction for storage and
+decodes them back into arrays for re-scoring
+"""
+
+from typing import List, Sequence, Tuple
+import numpy as np
+
+from app.models.song_features import SongFeatures
+from app.services.audio_processor import FEATURE_NAMES, column_index
+
+FEATURE_LAYOUT = 'gtzan58-v1'  # bump if FEATURE_NAMES changes
+
+_DTYPE = np.dtype('<f4')
+
+
+def build_song_features(song_id: int, segments: Sequence[Tuple[float, np.ndarray]]) -> SongFeatures:
+    """
+    Create a SongFeatures row from the segments collected during prediction
+    
+    Args:
+        song_id: ID of the (flushed) Song
+        segments: (offset_seconds, feature_row) per analyzed segment, rows in FEATURE_NAMES order
+    
+    Returns:
+        Unsaved SongFeatures instance
+    """
+    offsets = np.array([offset for offset, _ in segments], dtype=_DTYPE)
+    matrix = np.array([row for _, row in segments], dtype=_DTYPE).reshape(len(segments), len(FEATURE_NAMES))
+    
+    return SongFeatures(
+        song_id=song_id,
+        layout=FEATURE_LAYOUT,
+        num_segments=len(segments),
+        offsets=offsets.tobytes(),
+        features=matrix.tobytes()
+    )
+
+
+def decode_features(row: SongFeatures) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode a stored row
+    
+    Returns:
+        Tuple of (offsets (n,), features (n, 58) in FEATURE_NAMES order)
+    """
+    if row.layout != FEATURE_LAYOUT:
+        raise Exception(f"Unsupported feature layout for song {row.song_id}: {row.layout}")
+    
+    offsets = np.frombuffer(row.offsets, dtype=_DTYPE)
+    features = np.frombuffer(row.features, dtype=_DTYPE).reshape(row.num_segments, len(FEATURE_NAMES))
+    return offsets, features
+
+
+def stack_features(rows: List[SongFeatures], feature_columns: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stack the segments of many songs into one model-ordered block
+    
+    Args:
+        rows: Stored rows
+        feature_columns: Target model's feature column order
+    
+    Returns:
+        Tuple of (features (total_segments, n_columns) float64, per-row segment counts)
+    """
+    index = column_index(feature_columns)
+    blocks = [decode_features(row)[1] for row in rows]
+    counts = np.array([len(block) for block in blocks])
+    if not blocks:
+        return np.empty((0, len(index))), counts
+    return np.concatenate(blocks)[:, index].astype(np.float64), counts
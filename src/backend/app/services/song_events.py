@@ -0,0 +1,323 @@
+"""
+Song event feed
+Publishes compact library change events (song added/deleted, processing
+status) to server-sent event subscribers of every server process, with a
+bounded replay buffer so reconnecting clients can catch up without reloading
+the whole library
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import SONG_EVENT_BUFFER, SONG_EVENT_QUEUE_SIZE, SONG_EVENT_LOG, SONG_EVENT_POLL
+from app.services.song_store import song_row
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No cross-process locking (single server process only)
+
+
+class SongEvent:
+    """One published event"""
+    
+    __slots__ = ('id', 'type', 'data', 'row')
+    
+    def __init__(self, event_id: int, event_type: str, data: Dict, row: Optional[tuple] = None):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.row = row  # full SONG_COLUMNS row for in-process listeners (not sent to clients)
+    
+    def to_sse(self) -> str:
+        """Encode as a server-sent event frame"""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, separators=(',', ':'))}\n\n"
+    
+    def to_log(self) -> str:
+        """Encode as an event log line"""
+        return json.dumps({'id': self.id, 'type': self.type, 'data': self.data}, separators=(',', ':')) + "\n"
+
+
+class Subscription:
+    """
+    A subscriber's queue of pending events
+    
+    If the client reads too slowly and the queue fills up, the subscription is
+    marked overflowed; the client should reconnect with its last event ID and
+    replay from the buffer.
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+    
+    def _put(self, event: Optional[SongEvent]):
+        """Enqueue on the subscriber's loop (None wakes a reader to notice overflow)"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._overflow()
+    
+    def _overflow(self):
+        """Mark overflowed and wake the reader (also used when the bus missed events)"""
+        if self.overflowed:
+            return
+        self.overflowed = True
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class SongEventBus:
+    """
+    Fan-out of song events to the subscribers of every server process
+    
+    publish() may be called from any thread (the classify workers store songs
+    outside the event loop). Events are appended under an flock to a log file
+    shared by all server processes, which gives them one increasing ID order
+    (kept across restarts); each process reads the log to feed its subscribers
+    and keeps the last `buffer_size` events for replay. The log is rewritten
+    with only those events once it holds twice as many.
+    """
+    
+    def __init__(
+        self,
+        path: Path = SONG_EVENT_LOG,
+        buffer_size: int = SONG_EVENT_BUFFER,
+        queue_size: int = SONG_EVENT_QUEUE_SIZE
+    ):
+        """Initialize a bus on the event log at `path` (created on first publish)"""
+        self.path = path
+        self.queue_size = queue_size
+        self._lock_path = path.with_name(path.name + ".lock")
+        self._buffer: "deque[SongEvent]" = deque(maxlen=buffer_size)
+        self._subscribers: List[Subscription] = []
+        self._listeners: List[Callable[[SongEvent], None]] = []
+        self._last_id = 0
+        self._lock = threading.Lock()
+        # Read position in the log file (identified by inode, replaced when compacted)
+        self._inode: Optional[int] = None
+        self._position = 0
+        self._logged = 0  # events in the log file
+        self._polled = False  # read the log at least once (later ID gaps are missed events)
+        self._tailer: Optional[threading.Thread] = None
+    
+    @property
+    def last_id(self) -> int:
+        """ID of the most recent event (0 before the first)"""
+        return self._last_id
+    
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers"""
+        return len(self._subscribers)
+    
+    @contextmanager
+    def _file_locked(self):
+        """Hold the cross-process log lock (thread lock already held)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def publish(self, event_type: str, data: Dict, row: Optional[tuple] = None) -> SongEvent:
+        """
+        Record an event and deliver it to every subscriber of every server process
+        
+        Args:
+            event_type: Event name (e.g. 'song_added')
+            data: JSON-serializable payload
+            row: Stored song row for this process's listeners such as the song matrix
+        
+        Returns:
+            The published SongEvent
+        """
+        # Publish under the lock so listeners see this process's events in ID order
+        # even when several threads publish at once
+        with self._lock:
+            try:
+                with self._file_locked():
+                    self._poll()
+                    event = SongEvent(self._last_id + 1, event_type, data, row)
+                    with open(self.path, 'a') as log:
+                        log.write(event.to_log())
+                    self._poll()
+                    if self._logged >= 2 * self._buffer.maxlen:
+                        self._compact()
+            except OSError as e:
+                # Listeners still get the event; subscribers miss it
+                print(f"⚠️  Could not log song event '{event_type}': {e}")
+                event = SongEvent(self._last_id, event_type, data, row)
+            
+            for listener in self._listeners:
+                listener(event)
+        return event
+    
+    def _poll(self):
+        """Read events appended to the log since the last call and deliver them (lock held)"""
+        try:
+            with open(self.path, 'rb') as log:
+                inode = os.fstat(log.fileno()).st_ino
+                if inode != self._inode:
+                    # New or compacted log: read it from the start (known events are skipped)
+                    self._inode, self._position, self._logged = inode, 0, 0
+                log.seek(self._position)
+                chunk = log.read()
+        except FileNotFoundError:
+            self._polled = True
+            return
+        
+        # Only complete lines (another process may be mid-append)
+        end = chunk.rfind(b"\n") + 1
+        self._position += end
+        for line in chunk[:end].splitlines():
+            self._logged += 1
+            try:
+                record = json.loads(line)
+                event = SongEvent(record['id'], record['type'], record['data'])
+            except (ValueError, KeyError):
+                continue
+            if event.id <= self._last_id:
+                continue
+            if event.id > self._last_id + 1 and self._polled:
+                # Events were compacted away before this process read them: replay
+                # cannot span the gap, so subscribers reconnect and get a reset
+                self._buffer.clear()
+                for subscription in self._subscribers:
+                    try:
+                        subscription.loop.call_soon_threadsafe(subscription._overflow)
+                    except RuntimeError:
+                        pass
+            
+            self._last_id = event.id
+            self._buffer.append(event)
+            for subscription in self._subscribers:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription._put, event)
+                except RuntimeError:
+                    pass  # Loop already closed
+        self._polled = True
+    
+    def _compact(self):
+        """Rewrite the log with only the buffered events (both locks held, log fully read)"""
+        temp = self.path.with_name(self.path.name + ".tmp")
+        temp.write_text("".join(event.to_log() for event in self._buffer))
+        os.replace(temp, self.path)
+        stat = self.path.stat()
+        self._inode, self._position, self._logged = stat.st_ino, stat.st_size, len(self._buffer)
+    
+    def _tail(self):
+        """Background thread: deliver events published by other processes"""
+        while True:
+            time.sleep(SONG_EVENT_POLL)
+            if self._subscribers:
+                with self._lock:
+                    self._poll()
+    
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[Subscription, List[SongEvent], bool]:
+        """
+        Register a subscriber on the running event loop
+        
+        Args:
+            last_event_id: Last event the client received (None for live events only)
+        
+        Returns:
+            Tuple of (subscription, events to replay first, complete). complete is
+            False when the client missed events no longer buffered (or the ID is
+            not from this log) and must reload the library.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            # Catch up first: the client's ID may come from another process
+            self._poll()
+            if self._tailer is None:
+                self._tailer = threading.Thread(target=self._tail, name="song-events", daemon=True)
+                self._tailer.start()
+            self._subscribers.append(subscription)
+            if last_event_id is None:
+                return subscription, [], True
+            
+            replay = [event for event in self._buffer if event.id > last_event_id]
+            oldest = self._buffer[0].id if self._buffer else self._last_id + 1
+            complete = last_event_id <= self._last_id and last_event_id >= oldest - 1
+        return subscription, (replay if complete else []), complete
+    
+    def add_listener(self, listener: Callable[[SongEvent], None]):
+        """
+        Call listener(event) synchronously on every publish, in the publishing thread
+        
+        Listeners only see events published by this process. They run under the
+        bus lock (in event ID order), so they must be quick and must not publish.
+        """
+        self._listeners.append(listener)
+    
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+
+song_events = SongEventBus()
+
+
+def publish_song_added(song):
+    """
+    Publish a 'song_added' event for a stored Song
+    
+    Args:
+        song: Committed Song row
+    """
+    song_events.publish('song_added', {
+        'id': song.id,
+        'title': song.title,
+        'source': song.source,
+        'genre': song.predicted_genre,
+        'confidence': round(float(song.confidence), 4),
+        'x': round(float(song.cluster_x), 4),
+        'y': round(float(song.cluster_y), 4),
+    }, row=song_row(song))
+
+
+def publish_song_deleted(song_id: int):
+    """Publish a 'song_deleted' event"""
+    song_events.publish('song_deleted', {'id': song_id})
+
+
+def publish_status(source: str, key: str, status: str, song_id: Optional[int] = None, error: Optional[str] = None):
+    """
+    Publish a 'status' event for a song being processed
+    
+    Args:
+        source: 'upload' or 'youtube'
+        key: File name or video ID identifying the job
+        status: downloading, classifying, completed, cached or failed
+        song_id: Stored song ID once known
+        error: Failure message
+    """
+    data = {'source': source, 'key': key, 'status': status}
+    if song_id is not None:
+        data['song_id'] = song_id
+    if error is not None:
+        data['error'] = error
+    song_events.publish('status', data)
+
+
+def publish_library_reset(reason: str):
+    """Publish a 'reset' event telling clients to reload /cluster-data"""
+    song_events.publish('reset', {'reason': reason})
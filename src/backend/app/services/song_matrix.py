@@ -0,0 +1,315 @@
+"""
+In-memory song matrix
+Process-local columnar snapshot of the library (ids, positions, genre indices,
+confidences and the (N, 10) probability matrix in NumPy) that read endpoints
+and analytics query instead of the database, with running statistics kept
+alongside
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.config import GENRE_ORDER, SONG_MATRIX_CHECK, SONG_MATRIX_REFRESH
+from app.models.song import Song
+from app.services.metrics import Gauge
+from app.services.song_events import song_events
+from app.services.song_stats import SongStats
+from app.services.song_store import select_song_rows
+
+GENRE_INDEX = {genre: i for i, genre in enumerate(GENRE_ORDER)}
+
+_INITIAL_CAPACITY = 1024
+
+
+def _epoch(created_at: Optional[datetime]) -> float:
+    """Epoch seconds of a creation time; naive values (SQLite drops the zone) are UTC"""
+    if created_at is None:
+        return time.time()
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+
+class SongMatrix:
+    """
+    Columnar snapshot of every stored song
+    
+    Rows live in preallocated arrays that grow by doubling. Writers (any
+    thread) only append to a small change log; readers fold it into the
+    arrays before querying, so inserts and deletes cost O(1) and never block
+    on a reader. Deletes move the last row into the freed slot, so row order
+    is arbitrary; use newest_first() for the library's display order.
+    """
+    
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        """Initialize an empty, unloaded matrix"""
+        self.size = 0
+        self.version = 0  # incremented whenever the contents change
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+        
+        self._allocate(capacity)
+        self.stats = SongStats()
+        self._index: Dict[int, int] = {}  # song id -> row
+        self._log: deque = deque()  # pending ('insert', row) / ('delete', id)
+        self._stale = False  # reload requested (re-score moved every song)
+        self._lock = threading.Lock()
+        self._order: Optional[np.ndarray] = None
+        self._order_version = -1
+    
+    def _allocate(self, capacity: int):
+        """Create empty column storage"""
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.genres = np.zeros(capacity, dtype=np.int8)  # index into GENRE_ORDER
+        self.confidence = np.zeros(capacity, dtype=np.float64)
+        self.probabilities = np.zeros((capacity, len(GENRE_ORDER)), dtype=np.float64)
+        self.created = np.zeros(capacity, dtype=np.float64)  # epoch seconds, for ordering
+        # Row metadata only needed to serialize full songs
+        self.titles: List[str] = []
+        self.genre_names: List[str] = []
+        self.sources: List[str] = []
+        self.source_urls: List[Optional[str]] = []
+        self.model_versions: List[Optional[str]] = []
+        self.created_at: List = []
+        self.durations: List[Optional[float]] = []
+    
+    def _grow(self):
+        """Double the capacity of the array columns"""
+        capacity = 2 * len(self.ids)
+        for name in ('ids', 'x', 'y', 'genres', 'confidence', 'created'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+        grown = np.zeros((capacity, self.probabilities.shape[1]), dtype=np.float64)
+        grown[:self.size] = self.probabilities[:self.size]
+        self.probabilities = grown
+    
+    def load(self, rows) -> int:
+        """
+        Replace the contents with SONG_COLUMNS rows (e.g. select_song_rows() results)
+        
+        Returns:
+            Number of songs loaded
+        """
+        rows = list(rows)
+        capacity = _INITIAL_CAPACITY
+        while capacity < len(rows):
+            capacity *= 2
+        
+        self.size = 0
+        self._index = {}
+        self._allocate(capacity)
+        self.stats.reset()
+        for row in rows:
+            self._insert(row)
+        
+        self.loaded = True
+        self.loaded_at = self.checked_at = time.monotonic()
+        self.version += 1
+        return self.size
+    
+    def load_sync(self, db) -> int:
+        """Load from a sync Session (startup)"""
+        self.begin_reload()
+        count = self.load(db.execute(select_song_rows()).all())
+        self.apply_pending()
+        return count
+    
+    async def load_async(self, db) -> int:
+        """Load from an AsyncSession"""
+        self.begin_reload()
+        result = await db.execute(select_song_rows())
+        count = self.load(result.all())
+        self.apply_pending()
+        return count
+    
+    def begin_reload(self):
+        """Drop logged changes older than a reload that is about to read the database"""
+        with self._lock:
+            self._log.clear()
+            self._stale = False
+    
+    async def ensure_current(self, db):
+        """
+        Fold logged writes into the arrays, reloading from the database first if
+        never loaded, after a re-score, when another server process changed the
+        library (checked every SONG_MATRIX_CHECK seconds) or every
+        SONG_MATRIX_REFRESH seconds
+        
+        Args:
+            db: AsyncSession used for the check and the reload
+        """
+        now = time.monotonic()
+        reload = not self.loaded or self._stale
+        reload = reload or (SONG_MATRIX_REFRESH and now - self.loaded_at > SONG_MATRIX_REFRESH)
+        if not reload and SONG_MATRIX_CHECK and now - self.checked_at > SONG_MATRIX_CHECK:
+            self.checked_at = now
+            self.apply_pending()
+            reload = await self._changed_elsewhere(db)
+        if reload:
+            count = await self.load_async(db)
+            print(f"🧮 Song matrix loaded: {count} songs")
+        self.apply_pending()
+    
+    async def _changed_elsewhere(self, db) -> bool:
+        """Whether the database's song count or newest ID differs from the matrix"""
+        result = await db.execute(select(func.count(Song.id), func.max(Song.id)))
+        count, newest = result.one()
+        local_newest = int(self.ids[:self.size].max()) if self.size else None
+        return count != self.size or newest != local_newest
+    
+    def record(self, event):
+        """Song event listener: log a write for the next reader (any thread)"""
+        with self._lock:
+            if event.type == 'song_added' and event.row is not None:
+                self._log.append(('insert', event.row))
+            elif event.type == 'song_deleted':
+                self._log.append(('delete', event.data['id']))
+            elif event.type == 'reset':
+                self._stale = True
+    
+    def apply_pending(self):
+        """Apply logged inserts and deletes"""
+        if not self._log:
+            return
+        with self._lock:
+            changes = list(self._log)
+            self._log.clear()
+        
+        for action, value in changes:
+            if action == 'insert':
+                self._delete(value[0])
+                self._insert(value)
+            else:
+                self._delete(value)
+        self.version += 1
+    
+    def _insert(self, row: Tuple):
+        """Append a SONG_COLUMNS row"""
+        if self.size == len(self.ids):
+            self._grow()
+        i = self.size
+        (song_id, title, source, source_url, genre, confidence, model_version, *rest) = row
+        probabilities = rest[:len(GENRE_ORDER)]
+        cluster_x, cluster_y, created_at, duration = rest[len(GENRE_ORDER):]
+        
+        self.ids[i] = song_id
+        self.x[i] = cluster_x
+        self.y[i] = cluster_y
+        self.genres[i] = GENRE_INDEX.get(genre, -1)
+        self.confidence[i] = confidence
+        self.probabilities[i] = probabilities
+        self.created[i] = _epoch(created_at)
+        self.titles.append(title)
+        self.genre_names.append(genre)
+        self.sources.append(source)
+        self.source_urls.append(source_url)
+        self.model_versions.append(model_version)
+        self.created_at.append(created_at)
+        self.durations.append(duration)
+        
+        self._index[song_id] = i
+        self.size += 1
+        self.stats.add(int(self.genres[i]), self.confidence[i], self.probabilities[i], self.created[i])
+    
+    def _delete(self, song_id: int):
+        """Remove a song by moving the last row into its slot"""
+        i = self._index.pop(song_id, None)
+        if i is None:
+            return
+        self.stats.remove(int(self.genres[i]), self.confidence[i], self.probabilities[i], self.created[i])
+        last = self.size - 1
+        if i != last:
+            for column in (self.ids, self.x, self.y, self.genres, self.confidence, self.probabilities, self.created):
+                column[i] = column[last]
+            for column in self._metadata():
+                column[i] = column[last]
+            self._index[int(self.ids[i])] = i
+        for column in self._metadata():
+            column.pop()
+        self.size = last
+    
+    def _metadata(self) -> Tuple[List, ...]:
+        """Per-row Python lists, in insert order"""
+        return (self.titles, self.genre_names, self.sources, self.source_urls, self.model_versions, self.created_at, self.durations)
+    
+    def newest_first(self) -> np.ndarray:
+        """Row indices ordered by creation time, newest first (cached per version)"""
+        if self._order_version != self.version:
+            created = self.created[:self.size]
+            self._order = np.lexsort((-self.ids[:self.size], -created))
+            self._order_version = self.version
+        return self._order
+    
+    def select(
+        self,
+        genre: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        order: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Row indices matching optional filters
+        
+        Args:
+            genre: Predicted genre
+            min_confidence: Minimum confidence
+            order: Row order to filter (default newest_first())
+        
+        Returns:
+            Matching row indices in that order
+        """
+        rows = self.newest_first() if order is None else order
+        mask = np.ones(len(rows), dtype=bool)
+        if genre is not None:
+            mask &= self.genres[rows] == GENRE_INDEX.get(genre, -2)
+        if min_confidence is not None:
+            mask &= self.confidence[rows] >= min_confidence
+        return rows[mask]
+    
+    def rows(self, indices: np.ndarray) -> List[Tuple]:
+        """
+        SONG_COLUMNS tuples (plain Python values) for row indices
+        
+        Args:
+            indices: Row indices, e.g. from select()
+        """
+        positions = indices.tolist()
+        ids = self.ids[indices].tolist()
+        x = self.x[indices].tolist()
+        y = self.y[indices].tolist()
+        confidence = self.confidence[indices].tolist()
+        probabilities = self.probabilities[indices].tolist()
+        return [
+            (
+                ids[k], self.titles[i], self.sources[i], self.source_urls[i],
+                self.genre_names[i], confidence[k], self.model_versions[i],
+                *probabilities[k],
+                x[k], y[k], self.created_at[i], self.durations[i]
+            )
+            for k, i in enumerate(positions)
+        ]
+    
+    def genre_counts(self) -> Dict[str, int]:
+        """Number of songs per predicted genre"""
+        counts = np.bincount(self.genres[:self.size][self.genres[:self.size] >= 0], minlength=len(GENRE_ORDER))
+        return dict(zip(GENRE_ORDER, counts.tolist()))
+
+
+song_matrix = SongMatrix()
+song_events.add_listener(song_matrix.record)
+
+SONG_MATRIX_SIZE = Gauge(
+    "soundscape_song_matrix_rows",
+    "Songs held in the in-memory song matrix",
+    function=lambda: song_matrix.size
+)
@@ -0,0 +1,201 @@
+"""
+Fast song serialization
+Encodes song rows (SONG_COLUMNS tuples from the database or the song matrix)
+straight to JSON bytes without per-row pydantic models, negotiates gzip/brotli
+compression, and caches the encoded /cluster-data body until the library changes
+"""
+
+import gzip
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from app.config import GENRE_ORDER, COMPRESS_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY
+from app.services.cluster_calculator import get_vertex_positions
+from app.services.metrics import Counter
+from app.services.song_matrix import song_matrix
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Optional: pip install brotli
+
+RESPONSE_CACHE = Counter(
+    "soundscape_response_cache_total",
+    "Encoded response cache lookups by outcome (hit, miss)",
+    ["cache", "outcome"]
+)
+
+# Positions of the probability and position columns in SONG_COLUMNS rows
+_PROB_START = 7
+_X = _PROB_START + len(GENRE_ORDER)
+
+
+def song_row_to_dict(row: Tuple) -> Dict:
+    """
+    Build the SongResponse JSON shape from a SONG_COLUMNS row
+    
+    Args:
+        row: Tuple of SONG_COLUMNS values (see app.services.song_store)
+    
+    Returns:
+        Dict with the same keys and nesting as SongResponse
+    """
+    return {
+        'id': row[0],
+        'title': row[1],
+        'source': row[2],
+        'source_url': row[3],
+        'predicted_genre': row[4],
+        'confidence': row[5],
+        'model_version': row[6],
+        'probabilities': dict(zip(GENRE_ORDER, row[_PROB_START:_X])),
+        'position': {'x': row[_X], 'y': row[_X + 1]},
+        'created_at': row[_X + 2],
+        'duration': row[_X + 3],
+    }
+
+
+def dumps(content) -> bytes:
+    """Encode JSON with orjson (datetimes as RFC 3339, UTC as 'Z' like pydantic)"""
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def songs_json(rows: Iterable[Tuple]) -> List[Dict]:
+    """SongResponse-shaped dicts for SONG_COLUMNS rows"""
+    return [song_row_to_dict(row) for row in rows]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best supported content encoding from an Accept-Encoding header
+    
+    Returns:
+        'br', 'gzip', or None for an uncompressed body
+    """
+    if not accept_encoding:
+        return None
+    
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Compress a body with a negotiated encoding (None returns it unchanged)"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def json_response(request: Request, body: bytes, etag: Optional[str] = None, encoded: Optional[Dict] = None) -> Response:
+    """
+    Build a JSON response for an encoded body, compressed when the client accepts it
+    
+    Args:
+        request: Incoming request (Accept-Encoding, If-None-Match)
+        body: Uncompressed JSON bytes
+        etag: Strong validator for the body; enables 304 responses
+        encoded: Cache of compressed variants keyed by encoding, filled on use
+    
+    Returns:
+        Response with Content-Encoding and Vary set as needed
+    """
+    headers = {'Vary': 'Accept-Encoding'}
+    if etag is not None:
+        headers['ETag'] = etag
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers=headers)
+    
+    encoding = negotiate_encoding(request.headers.get('accept-encoding')) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding is not None:
+        if encoded is None:
+            content = compress(body, encoding)
+        else:
+            content = encoded.get(encoding)
+            if content is None:
+                content = encoded[encoding] = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+    else:
+        content = body
+    
+    return Response(content=content, media_type='application/json', headers=headers)
+
+
+class EncodedBodyCache:
+    """
+    Holds one encoded response body (and its compressed variants) for the
+    song matrix version it was built from
+    """
+    
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Label for RESPONSE_CACHE
+        """
+        self.name = name
+        self._entry: Optional[Tuple[int, bytes, str, Dict[str, bytes]]] = None
+    
+    def get(self, version: int) -> Optional[Tuple[bytes, str, Dict[str, bytes]]]:
+        """The cached (body, etag, compressed variants) if built at version, else None"""
+        entry = self._entry
+        if entry is None or entry[0] != version:
+            RESPONSE_CACHE.inc(cache=self.name, outcome='miss')
+            return None
+        RESPONSE_CACHE.inc(cache=self.name, outcome='hit')
+        return entry[1:]
+    
+    def put(self, body: bytes, version: int) -> Tuple[bytes, str, Dict[str, bytes]]:
+        """
+        Cache a body built at a matrix version
+        
+        Returns:
+            (body, etag, compressed variants) to serve
+        """
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        self._entry = (version, body, etag, {})
+        return self._entry[1:]
+
+
+cluster_data_cache = EncodedBodyCache('cluster_data')
+
+
+async def cluster_data_response(request: Request, db) -> Response:
+    """
+    Serve /cluster-data from the song matrix, reusing the encoded body until
+    the library changes
+    
+    Args:
+        request: Incoming request
+        db: AsyncSession (used only when the song matrix must be reloaded)
+    
+    Returns:
+        JSON response with the same content as ClusterDataResponse
+    """
+    await song_matrix.ensure_current(db)
+    cached = cluster_data_cache.get(song_matrix.version)
+    if cached is None:
+        songs = songs_json(song_matrix.rows(song_matrix.newest_first()))
+        body = dumps({'vertices': get_vertex_positions(), 'songs': songs})
+        cached = cluster_data_cache.put(body, song_matrix.version)
+    
+    body, etag, encoded = cached
+    return json_response(request, body, etag=etag, encoded=encoded)
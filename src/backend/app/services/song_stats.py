@@ -0,0 +1,136 @@
+"""
+Running library statistics
+Genre counts, confidence mean and histogram, mean probability vectors and
+per-day buckets, updated in O(1) as songs are added and removed (by the song
+matrix) instead of scanning the library
+"""
+
+from datetime import datetime, timezone
+from typing import Dict
+
+import numpy as np
+
+from app.config import GENRE_ORDER, STATS_CONFIDENCE_BINS
+
+_DAY_SECONDS = 86400
+
+
+class DayBucket:
+    """Aggregates of the songs created on one UTC day"""
+    __slots__ = ('count', 'genre_counts', 'confidence_sum')
+    
+    def __init__(self):
+        """Initialize an empty bucket"""
+        self.count = 0
+        self.genre_counts = np.zeros(len(GENRE_ORDER), dtype=np.int64)
+        self.confidence_sum = 0.0
+
+
+class SongStats:
+    """
+    Running aggregates over a set of songs
+    
+    add() and remove() must be called with the same values for a song; the
+    owner (SongMatrix) passes them from its columns.
+    """
+    
+    def __init__(self, bins: int = STATS_CONFIDENCE_BINS):
+        """Initialize empty aggregates with `bins` equal-width confidence bins over [0, 1]"""
+        self.bins = bins
+        self.reset()
+    
+    def reset(self):
+        """Drop all aggregates (before a reload)"""
+        genres = len(GENRE_ORDER)
+        self.total = 0
+        self.genre_counts = np.zeros(genres, dtype=np.int64)
+        self.genre_confidence_sums = np.zeros(genres, dtype=np.float64)
+        self.confidence_sum = 0.0
+        self.confidence_histogram = np.zeros(self.bins, dtype=np.int64)
+        self.probability_sums = np.zeros(genres, dtype=np.float64)
+        self.days: Dict[int, DayBucket] = {}  # days since the epoch (UTC) -> bucket
+    
+    def _bin(self, confidence: float) -> int:
+        """Histogram bin of a confidence (1.0 falls in the last bin)"""
+        return min(max(int(confidence * self.bins), 0), self.bins - 1)
+    
+    def add(self, genre: int, confidence: float, probabilities: np.ndarray, created: float):
+        """
+        Count a song
+        
+        Args:
+            genre: Index into GENRE_ORDER (-1 for an unknown genre)
+            confidence: Top-genre probability
+            probabilities: 10 probabilities in GENRE_ORDER order
+            created: Creation time in epoch seconds
+        """
+        self._update(genre, confidence, probabilities, created, 1)
+    
+    def remove(self, genre: int, confidence: float, probabilities: np.ndarray, created: float):
+        """Uncount a song previously passed to add() with the same values"""
+        self._update(genre, confidence, probabilities, created, -1)
+    
+    def _update(self, genre: int, confidence: float, probabilities: np.ndarray, created: float, sign: int):
+        """Apply a song to every aggregate with weight sign (+1 or -1)"""
+        confidence = float(confidence)
+        self.total += sign
+        self.confidence_sum += sign * confidence
+        self.confidence_histogram[self._bin(confidence)] += sign
+        self.probability_sums += sign * np.asarray(probabilities, dtype=np.float64)
+        if genre >= 0:
+            self.genre_counts[genre] += sign
+            self.genre_confidence_sums[genre] += sign * confidence
+        
+        day = int(created // _DAY_SECONDS)
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = DayBucket()
+        bucket.count += sign
+        bucket.confidence_sum += sign * confidence
+        if genre >= 0:
+            bucket.genre_counts[genre] += sign
+        if bucket.count <= 0:
+            del self.days[day]
+        
+        if self.total <= 0:
+            # Clear float residue left by adding and subtracting the same values
+            self.confidence_sum = 0.0
+            self.probability_sums[:] = 0.0
+            self.genre_confidence_sums[:] = 0.0
+    
+    def to_dict(self) -> Dict:
+        """
+        JSON-friendly snapshot
+        
+        Returns:
+            Dict with total, per-genre count and mean confidence, overall
+            confidence mean and histogram, mean probabilities, and daily buckets
+            (oldest first)
+        """
+        total = max(self.total, 1)
+        genre_counts = self.genre_counts.tolist()
+        genre_means = (self.genre_confidence_sums / np.maximum(self.genre_counts, 1)).tolist()
+        edges = np.linspace(0.0, 1.0, self.bins + 1).tolist()
+        
+        return {
+            'total': self.total,
+            'genres': {
+                genre: {'count': count, 'mean_confidence': mean if count else None}
+                for genre, count, mean in zip(GENRE_ORDER, genre_counts, genre_means)
+            },
+            'confidence': {
+                'mean': self.confidence_sum / total if self.total else None,
+                'bin_edges': edges,
+                'histogram': self.confidence_histogram.tolist(),
+            },
+            'mean_probabilities': dict(zip(GENRE_ORDER, (self.probability_sums / total).tolist())),
+            'daily': [
+                {
+                    'date': datetime.fromtimestamp(day * _DAY_SECONDS, timezone.utc).date().isoformat(),
+                    'count': bucket.count,
+                    'mean_confidence': bucket.confidence_sum / bucket.count,
+                    'genres': dict(zip(GENRE_ORDER, bucket.genre_counts.tolist())),
+                }
+                for day, bucket in sorted(self.days.items())
+            ],
+        }
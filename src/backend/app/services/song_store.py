@@ -0,0 +1,125 @@
+"""
+Song persistence helpers shared by the upload paths
+"""
+
+from typing import Optional
+import numpy as np
+from sqlalchemy import select, Select
+from sqlalchemy.orm import Session
+
+from app.config import GENRE_ORDER
+from app.models.song import Song
+from app.services.cluster_calculator import calculate_decagon_position
+from app.services.metrics import stage_timer
+
+# Song columns served by the read endpoints, in SongResponse field order
+SONG_COLUMNS = (
+    Song.id,
+    Song.title,
+    Song.source,
+    Song.source_url,
+    Song.predicted_genre,
+    Song.confidence,
+    Song.model_version,
+    *(getattr(Song, f'prob_{genre}') for genre in GENRE_ORDER),
+    Song.cluster_x,
+    Song.cluster_y,
+    Song.created_at,
+    Song.duration,
+)
+
+
+def build_song(
+    predictor,
+    predicted_genre: str,
+    confidence: float,
+    probabilities: np.ndarray,
+    **metadata
+) -> Song:
+    """
+    Create a Song row from a prediction
+    
+    Args:
+        predictor: GenrePredictor that produced the probabilities
+        predicted_genre: Top genre
+        confidence: Probability of the top genre
+        probabilities: Array of 10 probabilities
+        **metadata: Remaining Song columns (title, source, file_path, ...)
+    
+    Returns:
+        Unsaved Song instance
+    """
+    return Song(
+        **prediction_columns(predictor, predicted_genre, confidence, probabilities),
+        processing_status='completed',
+        **metadata
+    )
+
+
+def prediction_columns(
+    predictor,
+    predicted_genre: str,
+    confidence: float,
+    probabilities: np.ndarray
+) -> dict:
+    """
+    Song column values derived from a prediction (genre, probabilities, position)
+    
+    Args:
+        predictor: GenrePredictor that produced the probabilities
+        predicted_genre: Top genre
+        confidence: Probability of the top genre
+        probabilities: Array of 10 probabilities
+    
+    Returns:
+        Dict of Song column names to values
+    """
+    # Calculate position
+    with stage_timer("position"):
+        cluster_x, cluster_y = calculate_decagon_position(probabilities)
+    
+    # Get probability dict
+    prob_dict = predictor.get_probabilities_dict(probabilities)
+    
+    return {
+        'predicted_genre': predicted_genre,
+        'confidence': float(confidence),
+        'model_version': predictor.version,
+        **{f'prob_{genre}': prob_dict[genre] for genre in GENRE_ORDER},
+        'cluster_x': float(cluster_x),
+        'cluster_y': float(cluster_y),
+    }
+
+
+def select_youtube_song(video_id: str) -> Select:
+    """
+    Query for the most recent completed song of a YouTube video ID
+    
+    Usable with both sync and async sessions.
+    """
+    return (
+        select(Song)
+        .where(Song.video_id == video_id, Song.processing_status == 'completed')
+        .order_by(Song.id.desc())
+        .limit(1)
+    )
+
+
+def find_youtube_song(db: Session, video_id: str) -> Optional[Song]:
+    """
+    Find an already-processed song for a YouTube video ID
+    
+    Returns:
+        Most recent completed Song for the video, or None
+    """
+    return db.execute(select_youtube_song(video_id)).scalars().first()
+
+
+def select_song_rows() -> Select:
+    """SELECT of SONG_COLUMNS (add filters/ordering as for select(Song))"""
+    return select(*SONG_COLUMNS)
+
+
+def song_row(song: Song) -> tuple:
+    """SONG_COLUMNS values of a loaded Song, as select_song_rows() would return them"""
+    return tuple(getattr(song, column.key) for column in SONG_COLUMNS)
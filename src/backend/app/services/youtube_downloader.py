@@ -2,12 +2,21 @@
 YouTube audio download service using pytubefix
 """
 
-from pytubefix import YouTube
+from pytubefix import YouTube, Playlist
 from pytubefix.cli import on_progress
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+import re
 import subprocess
-from app.config import UPLOAD_DIR
+import numpy as np
+from app.config import UPLOAD_DIR, SAMPLE_RATE, YOUTUBE_ARCHIVE_MP3
+from app.services.audio_decoder import ffmpeg_decode
+from app.services.metrics import stage_timer
+
+# Background pool for optional archival MP3 encoding
+_archive_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mp3-archive")
 
 
 def download_youtube_audio(url: str) -> Tuple[str, str]:
@@ -21,33 +30,7 @@ def download_youtube_audio(url: str) -> Tuple[str, str]:
         Tuple of (audio_file_path, video_title)
     """
     try:
-        print(f"1️⃣ Creating YouTube object for: {url}")
-        
-        # Create YouTube object with progress callback
-        yt = YouTube(url, on_progress_callback=on_progress)
-        
-        # Get video info
-        video_title = yt.title
-        video_id = yt.video_id
-        print(f"2️⃣ Video: {video_title} (ID: {video_id})")
-        
-        # Get the highest quality audio stream
-        print("3️⃣ Finding best audio stream...")
-        audio_stream = get_best_audio_stream(yt)
-        
-        if not audio_stream:
-            raise Exception("No audio stream available")
-        
-        print(f"4️⃣ Audio quality: {audio_stream.abr}")
-        
-        # Download audio to temp file
-        print("5️⃣ Downloading audio...")
-        temp_filename = f"{video_id}_temp"
-        downloaded_file = audio_stream.download(
-            output_path=str(UPLOAD_DIR),
-            filename=temp_filename
-        )
-        print(f"6️⃣ Downloaded to: {downloaded_file}")
+        downloaded_file, video_title, video_id = download_youtube_stream(url)
         
         # Convert to MP3
         output_path = UPLOAD_DIR / f"{video_id}.mp3"
@@ -71,6 +54,166 @@ def download_youtube_audio(url: str) -> Tuple[str, str]:
         raise Exception(f"YouTube download failed: {str(e)}")
 
 
+def download_youtube_pcm(
+    url: str,
+    archive: bool = YOUTUBE_ARCHIVE_MP3,
+    provider: Optional[Callable] = None
+) -> Tuple[np.ndarray, str, Optional[str], Optional[Future]]:
+    """
+    Download audio from YouTube URL and decode it straight to model-rate PCM
+    
+    The downloaded stream is decoded once by FFmpeg to mono float32 samples at
+    SAMPLE_RATE, skipping the MP3 encode/decode round trip. When archiving is
+    enabled, the MP3 copy is encoded in the background from the original stream.
+    
+    Args:
+        url: YouTube video URL
+        archive: Whether to keep an MP3 copy in UPLOAD_DIR
+        provider: Stream provider replacing pytubefix.YouTube (see get_stream_provider)
+    
+    Returns:
+        Tuple of (samples, video_title, archive_path, archive_future).
+        archive_path and archive_future are None when archiving is disabled.
+    """
+    try:
+        downloaded_file, video_title, video_id = download_youtube_stream(url, provider)
+        y, archive_path, future = decode_downloaded_stream(downloaded_file, video_id, archive)
+        return y, video_title, archive_path, future
+    
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise Exception(f"YouTube download failed: {str(e)}")
+
+
+def get_stream_provider() -> Callable:
+    """
+    Get the class used to resolve videos and their streams
+    
+    Anything called as provider(url, on_progress_callback=...) that returns an
+    object with .title, .video_id and .streams.filter(only_audio=True) works,
+    so tests and offline benchmarks can substitute a local stub.
+    """
+    return YouTube
+
+
+def get_playlist_provider() -> Callable:
+    """Get the class used to expand playlist URLs (provider(url).video_urls)"""
+    return Playlist
+
+
+def expand_playlist(url: str, playlist_provider: Optional[Callable] = None) -> List[str]:
+    """
+    List the video URLs of a YouTube playlist
+    
+    Args:
+        url: Playlist URL
+        playlist_provider: Replacement for pytubefix.Playlist
+    
+    Returns:
+        Video URLs in playlist order
+    """
+    try:
+        playlist = (playlist_provider or get_playlist_provider())(url)
+        return list(playlist.video_urls)
+    except Exception as e:
+        raise Exception(f"Playlist expansion failed: {str(e)}")
+
+
+def decode_downloaded_stream(
+    downloaded_file: str,
+    video_id: str,
+    archive: bool = YOUTUBE_ARCHIVE_MP3
+) -> Tuple[np.ndarray, Optional[str], Optional[Future]]:
+    """
+    Decode a downloaded stream to model-rate PCM and optionally archive it as MP3
+    
+    The temp file is removed once it is no longer needed (after the background
+    MP3 encode when archiving).
+    
+    Args:
+        downloaded_file: Path returned by download_youtube_stream
+        video_id: YouTube video ID (names the archive file)
+        archive: Whether to keep an MP3 copy in UPLOAD_DIR
+    
+    Returns:
+        Tuple of (samples, archive_path, archive_future)
+    """
+    print(f"7️⃣ Decoding to {SAMPLE_RATE} Hz mono PCM")
+    try:
+        y = decode_to_pcm(downloaded_file)
+    except Exception:
+        Path(downloaded_file).unlink(missing_ok=True)
+        raise
+    
+    if not archive:
+        Path(downloaded_file).unlink()
+        print("8️⃣ Cleaned up temp file")
+        return y, None, None
+    
+    output_path = UPLOAD_DIR / f"{video_id}.mp3"
+    print(f"8️⃣ Archiving MP3 in background: {output_path}")
+    future = _archive_executor.submit(_archive_and_cleanup, downloaded_file, str(output_path))
+    
+    print(f"✅ Success! Decoded {len(y) / SAMPLE_RATE:.1f}s of audio")
+    return y, str(output_path), future
+
+
+def download_youtube_stream(url: str, provider: Optional[Callable] = None) -> Tuple[str, str, str]:
+    """
+    Download the best audio stream of a video to a temp file in UPLOAD_DIR
+    
+    Args:
+        url: YouTube video URL
+        provider: Replacement for pytubefix.YouTube (see get_stream_provider)
+    
+    Returns:
+        Tuple of (downloaded_file_path, video_title, video_id)
+    """
+    print(f"1️⃣ Creating YouTube object for: {url}")
+    
+    # Create YouTube object with progress callback
+    yt = (provider or get_stream_provider())(url, on_progress_callback=on_progress)
+    
+    # Get video info
+    video_title = yt.title
+    video_id = yt.video_id
+    print(f"2️⃣ Video: {video_title} (ID: {video_id})")
+    
+    # Get the highest quality audio stream
+    print("3️⃣ Finding best audio stream...")
+    audio_stream = get_best_audio_stream(yt)
+    
+    if not audio_stream:
+        raise Exception("No audio stream available")
+    
+    print(f"4️⃣ Audio quality: {audio_stream.abr}")
+    
+    # Download audio to temp file
+    print("5️⃣ Downloading audio...")
+    temp_filename = f"{video_id}_temp"
+    with stage_timer("download"):
+        downloaded_file = audio_stream.download(
+            output_path=str(UPLOAD_DIR),
+            filename=temp_filename
+        )
+    print(f"6️⃣ Downloaded to: {downloaded_file}")
+    
+    return downloaded_file, video_title, video_id
+
+
+def _archive_and_cleanup(input_file: str, output_file: str):
+    """Encode the archival MP3 (removing a partial one on failure) and remove the downloaded temp file"""
+    try:
+        convert_to_mp3(input_file, output_file)
+    except Exception:
+        Path(output_file).unlink(missing_ok=True)
+        raise
+    finally:
+        Path(input_file).unlink(missing_ok=True)
+
+
 def get_best_audio_stream(yt: YouTube):
     """
     Get the highest quality audio stream
@@ -117,12 +260,13 @@ def convert_to_mp3(input_file: str, output_file: str):
             output_file
         ]
         
-        result = subprocess.run(
-            command,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+        with stage_timer("ffmpeg_convert"):
+            result = subprocess.run(
+                command,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
         print("✅ FFmpeg conversion successful")
     except subprocess.CalledProcessError as e:
         print(f"❌ FFmpeg error: {e.stderr.decode()}")
@@ -131,6 +275,20 @@ def convert_to_mp3(input_file: str, output_file: str):
         raise Exception("FFmpeg not found. Please install FFmpeg: https://ffmpeg.org/download.html")
 
 
+def decode_to_pcm(input_file: str, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode any FFmpeg-readable audio file to mono float32 PCM in a single pass
+    
+    Args:
+        input_file: Path to input audio file
+        sr: Target sample rate
+    
+    Returns:
+        1-D float32 array of samples in [-1, 1]
+    """
+    return ffmpeg_decode(input_file, sr)
+
+
 def validate_youtube_url(url: str) -> bool:
     """
     Validate if URL is a valid YouTube URL
@@ -142,4 +300,47 @@ def validate_youtube_url(url: str) -> bool:
         True if valid YouTube URL, False otherwise
     """
     youtube_domains = ['youtube.com', 'youtu.be', 'www.youtube.com', 'm.youtube.com']
-    return any(domain in url for domain in youtube_domains)
\ No newline at end of file
+    return any(domain in url for domain in youtube_domains)
+
+
+_VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    Extract the 11-character video ID from any supported YouTube URL form
+    
+    Handles watch URLs (www/m/music), youtu.be short links, and
+    /shorts/, /embed/, /v/ and /live/ paths, with or without a scheme.
+    
+    Args:
+        url: YouTube video URL
+    
+    Returns:
+        Video ID, or None if the URL does not identify a single video
+    """
+    url = url.strip()
+    if '://' not in url:
+        url = f"https://{url}"
+    
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    path_parts = [part for part in parsed.path.split('/') if part]
+    
+    candidate = None
+    if host == 'youtu.be':
+        candidate = path_parts[0] if path_parts else None
+    elif host == 'youtube.com' or host.endswith('.youtube.com'):
+        if path_parts[:1] == ['watch']:
+            candidate = parse_qs(parsed.query).get('v', [None])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in ('shorts', 'embed', 'v', 'live'):
+            candidate = path_parts[1]
+    
+    if candidate and _VIDEO_ID_RE.match(candidate):
+        return candidate
+    return None
+
+
+def canonical_youtube_url(video_id: str) -> str:
+    """Build the canonical watch URL for a video ID"""
+    return f"https://www.youtube.com/watch?v={video_id}"
@@ -0,0 +1,471 @@
+"""
+YouTube ingestion pipeline
+Runs downloads and classification in separate bounded pools so network waits
+overlap with CPU-bound feature extraction, for single videos and batches
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import update
+
+from app.config import (
+    SAMPLE_RATE,
+    UPLOAD_DIR,
+    YOUTUBE_DOWNLOAD_CONCURRENCY,
+    CLASSIFY_WORKERS,
+    BATCH_HISTORY_SIZE,
+    BATCH_DIR,
+    BATCH_SAVE_INTERVAL,
+    STORE_SEGMENT_FEATURES
+)
+from app.database import SessionLocal
+from app.models.song import Song
+from app.services.job_coalescer import InFlightJobs, file_lock
+from app.services.metrics import Gauge, SONGS_PROCESSED, stage_timer, run_tracked
+from app.services.resources import init_job_thread, process_alive
+from app.services.predictor import get_predictor
+from app.services.song_store import build_song, find_youtube_song
+from app.services.song_events import publish_song_added, publish_status
+from app.services.segment_features import build_song_features
+from app.services.feature_store import record_song_features
+from app.services.youtube_downloader import (
+    download_youtube_stream,
+    decode_downloaded_stream,
+    canonical_youtube_url,
+    extract_video_id,
+    validate_youtube_url
+)
+
+# Jobs currently downloading/classifying, keyed by video ID (within this process;
+# each job also holds a per-video file lock so other server processes wait for
+# it and then reuse its Song instead of downloading the video again)
+youtube_jobs = InFlightJobs()
+_VIDEO_LOCK_DIR = UPLOAD_DIR / "locks"
+YOUTUBE_JOBS = Gauge(
+    "soundscape_youtube_jobs_in_flight",
+    "Distinct YouTube videos being processed (after coalescing)",
+    function=lambda: len(youtube_jobs)
+)
+
+# Network-bound downloads and CPU-bound decode/classification get separate pools
+# (numpy, librosa and torch release the GIL in their heavy loops)
+download_executor = ThreadPoolExecutor(max_workers=YOUTUBE_DOWNLOAD_CONCURRENCY, thread_name_prefix="yt-download")
+classify_executor = ThreadPoolExecutor(
+    max_workers=CLASSIFY_WORKERS,
+    thread_name_prefix="classify",
+    initializer=init_job_thread
+)
+
+
+async def ingest_youtube_video(
+    url: str,
+    video_id: str,
+    provider: Optional[Callable] = None,
+    on_status: Optional[Callable[[str], None]] = None,
+    start_profiler: Optional[Callable] = None
+) -> int:
+    """
+    Download, classify and store a YouTube video, reusing any stored result
+    
+    Concurrent calls for the same video ID share one job; a job for a video
+    another server process is ingesting waits for it and returns its Song.
+    
+    Args:
+        url: URL as submitted by the client (stored as source_url)
+        video_id: Normalized video ID
+        provider: Replacement for pytubefix.YouTube
+        on_status: Called with 'cached', 'downloading' or 'classifying' as the job advances
+        start_profiler: Returns a SamplingProfiler (or None) to attach to both stages;
+            only called if this call starts the job, not when it joins a running one
+    
+    Returns:
+        ID of the stored Song
+    """
+    def start_job():
+        profiler = start_profiler() if start_profiler is not None else None
+        return _run_pipeline(url, video_id, provider, on_status or (lambda status: None), profiler)
+    
+    return await youtube_jobs.run(video_id, start_job)
+
+
+async def _run_pipeline(
+    url: str,
+    video_id: str,
+    provider: Optional[Callable],
+    on_status: Callable,
+    profiler=None
+) -> int:
+    """Run the download stage then the classify stage in their pools"""
+    async with file_lock(_VIDEO_LOCK_DIR / f"{video_id}.lock"):
+        return await _run_locked_pipeline(url, video_id, provider, on_status, profiler)
+
+
+async def _run_locked_pipeline(
+    url: str,
+    video_id: str,
+    provider: Optional[Callable],
+    on_status: Callable,
+    profiler=None
+) -> int:
+    """_run_pipeline body, run while holding the video's file lock"""
+    profiled = profiler.wrap if profiler is not None else (lambda fn: fn)
+    
+    def set_status(status: str, **details):
+        on_status(status)
+        publish_status('youtube', video_id, status, **details)
+    
+    existing_id = await asyncio.to_thread(_find_existing_id, video_id)
+    if existing_id is not None:
+        SONGS_PROCESSED.inc(source='youtube', status='cached')
+        set_status('cached', song_id=existing_id)
+        return existing_id
+    
+    try:
+        set_status('downloading')
+        downloaded_file, video_title, _ = await run_tracked(
+            download_executor,
+            "download",
+            profiled(download_youtube_stream),
+            canonical_youtube_url(video_id),
+            provider
+        )
+        
+        set_status('classifying')
+        song_id = await run_tracked(
+            classify_executor,
+            "classify",
+            profiled(_classify_and_store),
+            url, video_id, downloaded_file, video_title
+        )
+    except Exception as e:
+        SONGS_PROCESSED.inc(source='youtube', status='failed')
+        publish_status('youtube', video_id, 'failed', error=str(e))
+        raise
+    
+    SONGS_PROCESSED.inc(source='youtube', status='completed')
+    publish_status('youtube', video_id, 'completed', song_id=song_id)
+    return song_id
+
+
+def _find_existing_id(video_id: str) -> Optional[int]:
+    """Look up a stored song ID for the video"""
+    db = SessionLocal()
+    try:
+        song = find_youtube_song(db, video_id)
+        return song.id if song is not None else None
+    finally:
+        db.close()
+
+
+def _check_archive(future, song_id: int, audio_path: str):
+    """Archive encode done-callback: if it failed, stop the song pointing at the missing MP3"""
+    error = future.exception()
+    if error is None:
+        return
+    print(f"❌ MP3 archive of song {song_id} failed: {error}")
+    db = SessionLocal()
+    try:
+        db.execute(update(Song).where(Song.id == song_id, Song.file_path == audio_path).values(file_path=None))
+        db.commit()
+    except Exception as e:
+        print(f"⚠️  Could not clear file_path of song {song_id}: {e}")
+    finally:
+        db.close()
+
+
+def _classify_and_store(url: str, video_id: str, downloaded_file: str, video_title: str) -> int:
+    """
+    Decode a downloaded stream, predict its genre and store the Song
+    
+    Returns:
+        ID of the stored Song
+    """
+    db = SessionLocal()
+    try:
+        # Decode audio straight to model-rate PCM
+        y, audio_path, archive_future = decode_downloaded_stream(downloaded_file, video_id)
+        duration = len(y) / SAMPLE_RATE
+        
+        # Predict genre from multiple segments (adaptive or fixed count, see SEGMENT_SAMPLING)
+        predictor = get_predictor()
+        segments = []
+        predicted_genre, confidence, probabilities = predictor.predict_track_from_array(
+            y,
+            SAMPLE_RATE,
+            segments=segments
+        )
+        
+        # Create database entry
+        song = build_song(
+            predictor,
+            predicted_genre,
+            confidence,
+            probabilities,
+            title=video_title,
+            source='youtube',
+            source_url=url,
+            video_id=video_id,
+            file_path=audio_path,
+            duration=duration
+        )
+        
+        db.add(song)
+        with stage_timer("db_commit"):
+            if STORE_SEGMENT_FEATURES and segments:
+                db.flush()
+                db.add(build_song_features(song.id, segments))
+            db.commit()
+        if archive_future is not None:
+            archive_future.add_done_callback(lambda future, song_id=song.id: _check_archive(future, song_id, audio_path))
+        record_song_features(song, segments)
+        
+        publish_song_added(song)
+        return song.id
+    
+    except Exception:
+        # Remove the archived file if processing failed, waiting for the encode so
+        # it is gone before the video lock is released (the next job reuses the name)
+        if 'archive_future' in locals() and archive_future is not None:
+            wait([archive_future])
+            Path(audio_path).unlink(missing_ok=True)
+        raise
+    
+    finally:
+        db.close()
+
+
+class BatchItem:
+    """
+    Progress of one URL in a batch
+    
+    status moves through queued -> downloading -> classifying -> completed,
+    or ends as 'cached' (already stored) or 'failed'.
+    """
+    
+    def __init__(self, url: str):
+        """Initialize a queued item, failing it up front if the URL is not a video"""
+        self.url = url
+        self.video_id = extract_video_id(url) if validate_youtube_url(url) else None
+        self.status = 'queued'
+        self.song_id: Optional[int] = None
+        self.error: Optional[str] = None
+        
+        if self.video_id is None:
+            self.status = 'failed'
+            self.error = "Could not determine YouTube video ID from URL"
+    
+    @property
+    def finished(self) -> bool:
+        """Whether the item has reached a final status"""
+        return self.status in ('completed', 'cached', 'failed')
+    
+    def to_dict(self) -> Dict:
+        """JSON-friendly state"""
+        return {
+            'url': self.url,
+            'video_id': self.video_id,
+            'status': self.status,
+            'song_id': self.song_id,
+            'error': self.error,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BatchItem":
+        """Restore an item saved with to_dict()"""
+        item = cls.__new__(cls)
+        item.url = data['url']
+        item.video_id = data['video_id']
+        item.status = data['status']
+        item.song_id = data['song_id']
+        item.error = data['error']
+        return item
+
+
+class BatchJob:
+    """
+    A batch of YouTube URLs processed in the background
+    
+    The process running the batch saves its progress to BATCH_DIR so every
+    server process can report it.
+    """
+    
+    def __init__(self, urls: List[str]):
+        """Initialize the batch with one item per URL"""
+        self.id = uuid.uuid4().hex
+        self.items = [BatchItem(url) for url in urls]
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.pid = os.getpid()  # process running the batch
+        self.task: Optional[asyncio.Task] = None
+    
+    @property
+    def status(self) -> str:
+        """'running' until every item has finished, then 'completed'"""
+        return 'running' if self.finished_at is None else 'completed'
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of items per status"""
+        counts: Dict[str, int] = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return counts
+    
+    def to_dict(self) -> Dict:
+        """JSON-friendly state"""
+        return {
+            'id': self.id,
+            'pid': self.pid,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'items': [item.to_dict() for item in self.items],
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BatchJob":
+        """Restore a batch saved with to_dict()"""
+        job = cls.__new__(cls)
+        job.id = data['id']
+        job.pid = data['pid']
+        job.items = [BatchItem.from_dict(item) for item in data['items']]
+        job.created_at = datetime.fromisoformat(data['created_at'])
+        job.finished_at = datetime.fromisoformat(data['finished_at']) if data['finished_at'] else None
+        job.task = None
+        return job
+
+
+# Batches running in this process by ID (others are read from BATCH_DIR)
+_batches: Dict[str, BatchJob] = {}
+
+
+def _batch_path(batch_id: str) -> Path:
+    """Progress file of a batch"""
+    return BATCH_DIR / f"{batch_id}.json"
+
+
+def _write_batch(batch_id: str, data: Dict):
+    """Atomically replace a batch's progress file"""
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    temp = BATCH_DIR / f".{batch_id}.{os.getpid()}.tmp"
+    temp.write_text(json.dumps(data))
+    os.replace(temp, _batch_path(batch_id))
+
+
+def _load_batch(path: Path) -> Optional[BatchJob]:
+    """
+    Read a batch's progress file
+    
+    A batch left running by a process that no longer runs it (a worker was
+    restarted) is reported as finished, with its unfinished items failed.
+    
+    Returns:
+        The BatchJob, or None if the file is missing or unreadable
+    """
+    try:
+        job = BatchJob.from_dict(json.loads(path.read_text()))
+        modified = path.stat().st_mtime
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"⚠️  Could not read batch file {path.name}: {e}")
+        return None
+    
+    orphaned = job.pid == os.getpid() or not process_alive(job.pid)
+    if job.finished_at is None and orphaned:
+        for item in job.items:
+            if not item.finished:
+                item.status = 'failed'
+                item.error = "Server process stopped before this item finished"
+        job.finished_at = datetime.fromtimestamp(modified, timezone.utc)
+    return job
+
+
+def _prune_batches():
+    """Remove the oldest finished batch files beyond BATCH_HISTORY_SIZE (running ones are kept)"""
+    finished = []
+    for path in BATCH_DIR.glob("*.json"):
+        job = _load_batch(path)
+        if job is not None and job.finished_at is not None:
+            finished.append((job.finished_at, path))
+    finished.sort()
+    for _, path in finished[:max(len(finished) - BATCH_HISTORY_SIZE, 0)]:
+        path.unlink(missing_ok=True)
+
+
+async def start_batch(urls: List[str], provider: Optional[Callable] = None) -> BatchJob:
+    """
+    Start processing a batch of YouTube URLs in the background
+    
+    Args:
+        urls: Video URLs (duplicates share one job)
+        provider: Replacement for pytubefix.YouTube
+    
+    Returns:
+        The running BatchJob
+    """
+    job = BatchJob(urls)
+    await asyncio.to_thread(_write_batch, job.id, job.to_dict())
+    _batches[job.id] = job
+    job.task = asyncio.create_task(_run_batch(job, provider))
+    return job
+
+
+async def get_batch(batch_id: str) -> Optional[BatchJob]:
+    """Get a running or recent batch by ID, whichever server process runs it"""
+    job = _batches.get(batch_id)
+    if job is not None:
+        return job
+    if not all(c in '0123456789abcdef' for c in batch_id):
+        return None
+    return await asyncio.to_thread(_load_batch, _batch_path(batch_id))
+
+
+async def _run_batch(job: BatchJob, provider: Optional[Callable]):
+    """Process every item with bounded concurrency"""
+    # Enough items in flight to keep both pools busy without piling up temp files
+    in_flight = asyncio.Semaphore(YOUTUBE_DOWNLOAD_CONCURRENCY + CLASSIFY_WORKERS)
+    print(f"📦 Batch {job.id[:8]}: {len(job.items)} URLs")
+    
+    async def run_item(item: BatchItem):
+        if item.status == 'failed':
+            return
+        
+        async with in_flight:
+            def on_status(status: str):
+                item.status = status
+            
+            try:
+                item.song_id = await ingest_youtube_video(item.url, item.video_id, provider, on_status)
+                if item.status != 'cached':
+                    item.status = 'completed'
+            except Exception as e:
+                item.status = 'failed'
+                item.error = str(e)
+    
+    async def save_progress():
+        saved = None
+        while True:
+            await asyncio.sleep(BATCH_SAVE_INTERVAL)
+            data = job.to_dict()
+            if data != saved:
+                await asyncio.to_thread(_write_batch, job.id, data)
+                saved = data
+    
+    saver = asyncio.create_task(save_progress())
+    try:
+        await asyncio.gather(*(run_item(item) for item in job.items))
+    finally:
+        saver.cancel()
+        job.finished_at = datetime.now(timezone.utc)
+        try:
+            await asyncio.to_thread(_write_batch, job.id, job.to_dict())
+            await asyncio.to_thread(_prune_batches)
+        except OSError as e:
+            print(f"⚠️  Could not save batch {job.id[:8]}: {e}")
+        _batches.pop(job.id, None)
+    print(f"✅ Batch {job.id[:8]} finished: {job.counts()}")
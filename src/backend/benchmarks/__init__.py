@@ -0,0 +1,6 @@
+"""
+Local benchmarks for the backend processing pipeline
+
+Run from the backend directory, e.g. `python -m benchmarks.bench_youtube_decode`.
+No network access or dataset downloads are required.
+"""
@@ -0,0 +1,83 @@
+"""
+Benchmark: adaptive vs. fixed segment sampling
+
+Classifies each track three ways: a dense reference (--reference segments),
+the fixed 5-segment path, and the adaptive sampler. Reports time and segments
+per track and how often each agrees with the reference genre.
+
+Point --audio-dir at real music (e.g. a GTZAN subset) for meaningful agreement
+numbers; without it, synthetic tracks are used (timings only).
+
+Usage:
+    python -m benchmarks.bench_adaptive_sampling [--audio-dir DIR] [--limit 50] [--reference 12]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.config import FIXED_SEGMENTS, SAMPLE_RATE
+from benchmarks.fixtures import synth_music, write_wav
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".au", ".flac", ".ogg"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio-dir", type=Path, help="Directory of audio files (searched recursively)")
+    parser.add_argument("--limit", type=int, default=50, help="Max tracks")
+    parser.add_argument("--reference", type=int, default=12, help="Segments for the reference prediction")
+    args = parser.parse_args()
+    
+    from app.services.predictor import get_predictor
+    predictor = get_predictor()
+    
+    # Count model calls (one per analyzed segment)
+    calls = {"n": 0}
+    predict_vector = predictor.predict_vector
+    
+    def counted(row):
+        calls["n"] += 1
+        return predict_vector(row)
+    
+    predictor.predict_vector = counted
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.audio_dir:
+            paths = sorted(p for p in args.audio_dir.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)[:args.limit]
+        else:
+            paths = [
+                write_wav(Path(tmp) / f"synth_{i}.wav", synth_music(30.0 + 30 * (i % 4), sr=SAMPLE_RATE, seed=i), SAMPLE_RATE)
+                for i in range(min(args.limit, 8))
+            ]
+        
+        modes = {
+            "fixed": lambda y, sr: predictor.predict_multi_segment_from_array(y, sr, num_segments=FIXED_SEGMENTS),
+            "adaptive": lambda y, sr: predictor.predict_adaptive_from_array(y, sr),
+        }
+        stats = {mode: {"seconds": [], "segments": [], "agree": 0} for mode in modes}
+        
+        for path in paths:
+            y, sr = predictor._load_audio(str(path))
+            reference_genre, _, _ = predictor.predict_multi_segment_from_array(y, sr, num_segments=args.reference)
+            
+            for mode, run in modes.items():
+                calls["n"] = 0
+                start = time.perf_counter()
+                genre, _, _ = run(y, sr)
+                stats[mode]["seconds"].append(time.perf_counter() - start)
+                stats[mode]["segments"].append(calls["n"])
+                stats[mode]["agree"] += genre == reference_genre
+    
+    print(f"{len(paths)} tracks, reference = {args.reference} segments")
+    print(f"{'mode':<10} {'ms/track':>10} {'segments':>9} {'min':>4} {'max':>4} {'agreement':>10}")
+    for mode, s in stats.items():
+        print(f"{mode:<10} {1000 * np.mean(s['seconds']):10.1f} {np.mean(s['segments']):9.2f} "
+              f"{min(s['segments']):4d} {max(s['segments']):4d} {s['agree'] / len(paths):10.1%}")
+
+
+if __name__ == "__main__":
+    main()
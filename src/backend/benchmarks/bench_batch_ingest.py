@@ -0,0 +1,81 @@
+"""
+Benchmark: batch YouTube ingestion, sequential vs. pipelined
+
+Runs the download -> decode/classify -> store pipeline over N videos served by
+the offline stub provider (with simulated network latency), first one at a
+time, then through the batch runner with bounded download and classify pools.
+Uses a temporary SQLite database and the real model; no network is needed.
+
+Usage:
+    python -m benchmarks.bench_batch_ingest [--videos 12] [--duration 60] [--latency 1.0]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=12, help="Videos per run")
+    parser.add_argument("--duration", type=float, default=60.0, help="Fixture length in seconds")
+    parser.add_argument("--latency", type=float, default=1.0, help="Simulated download time per video (s)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        
+        # Point the app at a throwaway database before it is imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'bench.db'}"
+        os.environ["YOUTUBE_ARCHIVE_MP3"] = "false"
+        
+        from app.database import create_tables
+        from app.services.youtube_downloader import download_youtube_stream, canonical_youtube_url
+        from app.services import youtube_ingest
+        from benchmarks.fixtures import encode_stream_fixture, synth_music
+        from benchmarks.stub_youtube import make_stub_provider
+        
+        create_tables()
+        youtube_ingest.get_predictor()  # load the model outside the timings
+        
+        # Two disjoint sets of IDs so the second run cannot hit the cache
+        fixtures = [
+            encode_stream_fixture(synth_music(args.duration, sr=48000, seed=i), 48000, work_dir, f"video{i}")
+            for i in range(args.videos)
+        ]
+        sequential_ids = [f"seq{i:08d}" for i in range(args.videos)]
+        batch_ids = [f"bat{i:08d}" for i in range(args.videos)]
+        catalog = {vid: fixtures[i] for ids in (sequential_ids, batch_ids) for i, vid in enumerate(ids)}
+        provider = make_stub_provider(catalog, latency=args.latency)
+        
+        print(f"{args.videos} videos x {args.duration:.0f}s, {args.latency:.1f}s simulated download each")
+        
+        # Sequential: one video at a time, as /youtube did
+        start = time.perf_counter()
+        for vid in sequential_ids:
+            url = canonical_youtube_url(vid)
+            downloaded_file, title, _ = download_youtube_stream(url, provider)
+            youtube_ingest._classify_and_store(url, vid, downloaded_file, title)
+        sequential = time.perf_counter() - start
+        print(f"  sequential  {sequential:7.2f} s   {args.videos / sequential:6.2f} videos/s")
+        
+        # Pipelined batch
+        async def run_batch():
+            job = youtube_ingest.start_batch([canonical_youtube_url(vid) for vid in batch_ids], provider)
+            while job.finished_at is None:
+                await asyncio.sleep(0.5)
+                print(f"    progress: {job.counts()}")
+            return job
+        
+        start = time.perf_counter()
+        job = asyncio.run(run_batch())
+        pipelined = time.perf_counter() - start
+        print(f"  batch       {pipelined:7.2f} s   {args.videos / pipelined:6.2f} videos/s   {job.counts()}")
+        print(f"  speedup: {sequential / pipelined:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
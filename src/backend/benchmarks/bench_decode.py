@@ -0,0 +1,121 @@
+"""
+Benchmark: audio decode backends and resampler qualities against librosa.load
+
+Decodes each file with librosa.load (the previous path) and with every
+decode_audio backend/quality combination, reporting time per file, the
+largest sample difference, and the largest drift of the 58 features of the
+middle segment relative to the librosa.load samples (relative, and in units
+of the model's scaler when the model is available).
+
+Without --audio-dir, stereo 44.1 kHz and 48 kHz synthetic tracks are written as
+WAV and (when libsndfile supports it) MP3. The ffmpeg backend is skipped when
+FFmpeg is not installed.
+
+Usage:
+    python -m benchmarks.bench_decode [--audio-dir DIR] [--limit 10] [--seconds 180]
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from app.config import SAMPLE_RATE
+from app.services.audio_decoder import RESAMPLE_QUALITIES, decode_audio
+from app.services.audio_processor import FEATURE_NAMES, extract_feature_vector
+from benchmarks.fixtures import synth_music
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".au", ".flac", ".ogg"}
+SEGMENT_SAMPLES = 3 * SAMPLE_RATE
+
+
+def write_fixtures(out_dir: Path, seconds: float) -> list:
+    """Stereo music-like tracks at common native rates, as WAV and MP3"""
+    paths = []
+    for sr in (44100, 48000):
+        y = synth_music(seconds, sr=sr, seed=sr)
+        stereo = np.stack([y, np.roll(y, sr // 100)], axis=1)
+        paths.append(out_dir / f"track_{sr}.wav")
+        sf.write(str(paths[-1]), stereo, sr, subtype='PCM_16')
+        if 'MP3' in sf.available_formats():
+            paths.append(out_dir / f"track_{sr}.mp3")
+            sf.write(str(paths[-1]), stereo, sr, format='MP3')
+    return paths
+
+
+def middle_features(y: np.ndarray) -> np.ndarray:
+    """Features of the middle 3-second segment"""
+    start = max(0, len(y) // 2 - SEGMENT_SAMPLES // 2)
+    return extract_feature_vector(y[start:start + SEGMENT_SAMPLES], SAMPLE_RATE).astype(np.float64)
+
+
+def timed(decode, repeats: int):
+    """Median seconds of repeated decodes (after one warm-up) and the last result"""
+    decode()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        y = decode()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), y
+
+
+def load_scale():
+    """Per-feature scaler scale_ in FEATURE_NAMES order, or None without the model"""
+    try:
+        from app.services.predictor import get_predictor
+        predictor = get_predictor()
+    except Exception as e:
+        print(f"⚠️  Model unavailable, reporting relative drift only: {e}")
+        return None
+    scale = np.ones(len(FEATURE_NAMES))
+    scale[predictor.column_index] = predictor.scaler.scale_
+    return scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio-dir", type=Path, help="Directory of audio files (searched recursively)")
+    parser.add_argument("--limit", type=int, default=10, help="Max files")
+    parser.add_argument("--seconds", type=float, default=180.0, help="Length of the synthetic tracks")
+    parser.add_argument("--repeats", type=int, default=3, help="Decodes per file and variant")
+    args = parser.parse_args()
+    
+    backends = ["soundfile"] + (["ffmpeg"] if shutil.which("ffmpeg") else [])
+    variants = {f"{backend}/{quality}": (backend, quality) for backend in backends for quality in RESAMPLE_QUALITIES}
+    scale = load_scale()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.audio_dir:
+            paths = sorted(p for p in args.audio_dir.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)[:args.limit]
+        else:
+            paths = write_fixtures(Path(tmp), args.seconds)
+        
+        print(f"{'file':<22} {'variant':<14} {'ms':>8} {'speedup':>8} {'max |dy|':>10} "
+              f"{'rel drift':>10} {'scaled':>8}  worst feature")
+        for path in paths:
+            reference_seconds, reference = timed(lambda: librosa.load(str(path), sr=SAMPLE_RATE)[0], args.repeats)
+            reference_features = middle_features(reference)
+            print(f"{path.name[:22]:<22} {'librosa.load':<14} {1000 * reference_seconds:8.1f} {1.0:7.2f}x")
+            
+            for name, (backend, quality) in variants.items():
+                seconds, y = timed(lambda: decode_audio(str(path), backend=backend, quality=quality), args.repeats)
+                length = min(len(y), len(reference))
+                sample_diff = np.abs(y[:length] - reference[:length]).max()
+                
+                features = middle_features(y)
+                difference = np.abs(features - reference_features)
+                drift = difference / np.maximum(np.abs(reference_features), 1e-9)
+                worst = int(drift.argmax())
+                scaled = f"{(difference / scale).max():8.3f}" if scale is not None else f"{'-':>8}"
+                print(f"{'':<22} {name:<14} {1000 * seconds:8.1f} {reference_seconds / seconds:7.2f}x "
+                      f"{sample_diff:10.2e} {drift[worst]:10.2e} {scaled}  {FEATURE_NAMES[worst]}")
+
+
+if __name__ == "__main__":
+    main()
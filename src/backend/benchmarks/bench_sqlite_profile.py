@@ -0,0 +1,131 @@
+"""
+Benchmark: concurrent Song writes vs. cluster-data reads, per database profile
+
+For each profile, seeds a temporary SQLite database, then runs writer threads
+inserting Song rows (one commit each, like finished uploads) alongside reader
+threads doing the full /api/cluster-data scan. Reports throughput, latency
+percentiles and 'database is locked' failures.
+
+Usage:
+    python -m benchmarks.bench_sqlite_profile [--seed-rows 5000] [--seconds 10] [--writers 4] [--readers 8]
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import GENRE_ORDER
+from app.database import Base, build_engine
+from app.models.song import Song
+
+
+def random_song(rng: random.Random) -> Song:
+    """Build a Song with random probabilities"""
+    probs = np.array([rng.random() for _ in GENRE_ORDER])
+    probs /= probs.sum()
+    top = int(np.argmax(probs))
+    return Song(
+        title=f"bench-{rng.getrandbits(32):08x}",
+        source='upload',
+        predicted_genre=GENRE_ORDER[top],
+        confidence=float(probs[top]),
+        cluster_x=rng.uniform(-0.8, 0.8),
+        cluster_y=rng.uniform(-0.8, 0.8),
+        **{f"prob_{genre}": float(p) for genre, p in zip(GENRE_ORDER, probs)}
+    )
+
+
+def run_profile(profile: str, work_dir: Path, args) -> dict:
+    """Seed a fresh database and run the mixed workload against it"""
+    url = f"sqlite:///{work_dir / f'{profile}.db'}"
+    engine = build_engine(url, profile)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    
+    rng = random.Random(0)
+    with Session() as db:
+        db.add_all([random_song(rng) for _ in range(args.seed_rows)])
+        db.commit()
+    
+    stop = threading.Event()
+    stats = {"write": [], "read": [], "locked": 0}
+    lock = threading.Lock()
+    
+    def writer(seed: int):
+        local_rng = random.Random(seed)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    db.add(random_song(local_rng))
+                    db.commit()
+                with lock:
+                    stats["write"].append(time.perf_counter() - start)
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+    
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    db.execute(select(Song).order_by(Song.created_at.desc())).scalars().all()
+                with lock:
+                    stats["read"].append(time.perf_counter() - start)
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+    
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    
+    return stats
+
+
+def summarize(name: str, stats: dict, seconds: float):
+    """Print throughput and latency percentiles for one profile"""
+    print(f"  {name}")
+    for kind in ("write", "read"):
+        latencies = np.array(stats[kind]) * 1000
+        if len(latencies) == 0:
+            print(f"    {kind:<5} no successful operations")
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"    {kind:<5} {len(latencies) / seconds:8.1f} ops/s   "
+              f"p50 {p50:7.1f} ms   p95 {p95:7.1f} ms   p99 {p99:7.1f} ms")
+    print(f"    locked errors: {stats['locked']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed-rows", type=int, default=5000, help="Songs in the table before the run")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each run")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer threads")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent cluster-data reader threads")
+    args = parser.parse_args()
+    
+    print(f"{args.seed_rows} seeded rows, {args.writers} writers + {args.readers} readers, {args.seconds:.0f}s per profile")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ("development", "production"):
+            stats = run_profile(profile, Path(tmp), args)
+            summarize(profile, stats, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: per-worker memory with and without a preloaded, shared model
+
+Starts gunicorn (gunicorn.conf.py) with N workers, once with PRELOAD_MODEL=false
+(every worker loads its own model) and once with the model preloaded in the
+master and inherited by forked workers. Reports per-worker RSS and USS (memory
+private to the worker) and total PSS (shared pages split between the processes
+mapping them), read from /proc/<pid>/smaps_rollup, so Linux only.
+
+RSS counts shared pages in full in every worker; USS and total PSS show what
+adding a worker actually costs.
+
+Usage:
+    python -m benchmarks.bench_worker_memory [--workers 1,2,4] [--settle 10]
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """Rss, Pss and private (USS) memory of a process in kB"""
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        values[name] = int(value.split()[0])
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def children(pid: int) -> List[int]:
+    """Direct child PIDs of a process"""
+    pids = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            pids.append(int(stat.parent.name))
+    return pids
+
+
+def wait_healthy(url: str, timeout: float = 300.0):
+    """Poll /health until it answers"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise Exception(f"Server at {url} did not become healthy")
+
+
+def measure(workers: int, preload: bool, work_dir: Path, settle: float) -> Dict:
+    """Start gunicorn, let every worker load, and read memory of the master and workers"""
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{work_dir / f'mem_{workers}_{preload}.db'}",
+        UPLOAD_DIR=str(work_dir / "uploads"),
+        WEB_CONCURRENCY=str(workers),
+        PORT=str(port),
+        PRELOAD_MODEL="true" if preload else "false",
+    )
+    env.pop("ASYNC_DATABASE_URL", None)
+    
+    server = subprocess.Popen(
+        ["gunicorn", "app.main:app", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_healthy(f"http://127.0.0.1:{port}")
+        time.sleep(settle)  # the other workers finish their lifespan startup
+        
+        worker_pids = children(server.pid)
+        master = memory_kb(server.pid)
+        per_worker = [memory_kb(pid) for pid in worker_pids]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    
+    count = max(len(per_worker), 1)
+    return {
+        "workers": len(per_worker),
+        "worker_rss_mb": sum(m["rss"] for m in per_worker) / count / 1024,
+        "worker_uss_mb": sum(m["uss"] for m in per_worker) / count / 1024,
+        "total_pss_mb": (master["pss"] + sum(m["pss"] for m in per_worker)) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--settle", type=float, default=10.0, help="Seconds to wait after the first worker is healthy")
+    args = parser.parse_args()
+    
+    counts = [int(n) for n in args.workers.split(",")]
+    
+    print(f"{'mode':<10} {'workers':>7} {'RSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for preload in (False, True):
+            for workers in counts:
+                result = measure(workers, preload, Path(tmp), args.settle)
+                mode = "preload" if preload else "separate"
+                print(f"{mode:<10} {result['workers']:>7} {result['worker_rss_mb']:>9.0f}MB "
+                      f"{result['worker_uss_mb']:>9.0f}MB {result['total_pss_mb']:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: YouTube audio path, MP3 round trip vs. direct PCM decode
+
+Compares the legacy path (FFmpeg re-encode to 192 kbps 44.1 kHz MP3, then
+librosa decode + resample to 22050 Hz) against a single FFmpeg decode of the
+downloaded stream to mono 22050 Hz float PCM. Uses a local synthetic fixture
+encoded like a YouTube audio-only stream, so no network is needed.
+
+Usage:
+    python -m benchmarks.bench_youtube_decode [--duration 180] [--repeats 3]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+from app.config import SAMPLE_RATE
+from app.services.youtube_downloader import convert_to_mp3, decode_to_pcm
+from benchmarks.fixtures import encode_stream_fixture, synth_music
+
+
+def legacy_path(stream_file: Path, work_dir: Path) -> np.ndarray:
+    """Re-encode to MP3, then decode and resample with librosa"""
+    mp3_path = work_dir / "legacy.mp3"
+    convert_to_mp3(str(stream_file), str(mp3_path))
+    y, _ = librosa.load(str(mp3_path), sr=SAMPLE_RATE)
+    return y
+
+
+def direct_path(stream_file: Path, work_dir: Path) -> np.ndarray:
+    """Decode the stream once to model-rate PCM"""
+    return decode_to_pcm(str(stream_file))
+
+
+def time_path(fn, stream_file: Path, work_dir: Path, repeats: int):
+    """Run fn `repeats` times and return (timings, last_output)"""
+    timings = []
+    y = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        y = fn(stream_file, work_dir)
+        timings.append(time.perf_counter() - start)
+    return timings, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=180.0, help="Fixture length in seconds")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per path")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        stream_file = encode_stream_fixture(synth_music(args.duration, sr=48000), 48000, work_dir)
+        print(f"Fixture: {stream_file.name} ({args.duration:.0f}s)")
+        
+        results = {}
+        for name, fn in [("mp3_roundtrip", legacy_path), ("direct_pcm", direct_path)]:
+            timings, y = time_path(fn, stream_file, work_dir, args.repeats)
+            results[name] = (timings, y)
+            print(f"  {name:<14} mean {np.mean(timings) * 1000:8.1f} ms   "
+                  f"min {np.min(timings) * 1000:8.1f} ms   samples {len(y)}")
+        
+        legacy_mean = np.mean(results["mp3_roundtrip"][0])
+        direct_mean = np.mean(results["direct_pcm"][0])
+        print(f"  speedup: {legacy_mean / direct_mean:.2f}x")
+        
+        # Sanity check: both paths should describe the same signal
+        y_legacy = results["mp3_roundtrip"][1]
+        y_direct = results["direct_pcm"][1]
+        print(f"  duration delta: {abs(len(y_legacy) - len(y_direct)) / SAMPLE_RATE * 1000:.1f} ms   "
+              f"RMS legacy {np.sqrt(np.mean(y_legacy ** 2)):.4f} / direct {np.sqrt(np.mean(y_direct ** 2)):.4f}")
+
+
+if __name__ == "__main__":
+    main()
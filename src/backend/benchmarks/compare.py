@@ -0,0 +1,54 @@
+"""
+Compare two benchmark result files (e.g. from two commits)
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.10]
+
+Exits with status 1 if any benchmark's median slowed down by more than the threshold.
+"""
+
+import argparse
+import sys
+
+from benchmarks.harness import load_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Results JSON of the reference run")
+    parser.add_argument("candidate", help="Results JSON of the run to check")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown of the median")
+    args = parser.parse_args()
+    
+    baseline = load_results(args.baseline)
+    candidate = load_results(args.candidate)
+    print(f"baseline:  {baseline['environment'].get('commit')}  {baseline['environment']['timestamp']}")
+    print(f"candidate: {candidate['environment'].get('commit')}  {candidate['environment']['timestamp']}")
+    print()
+    print(f"{'benchmark':<48} {'baseline ms':>12} {'candidate ms':>13} {'change':>8}")
+    
+    regressions = []
+    names = sorted(set(baseline["benchmarks"]) | set(candidate["benchmarks"]))
+    for name in names:
+        old = baseline["benchmarks"].get(name)
+        new = candidate["benchmarks"].get(name)
+        if old is None or new is None:
+            old_ms = "-" if old is None else f"{old['median_ms']:.2f}"
+            new_ms = "-" if new is None else f"{new['median_ms']:.2f}"
+            print(f"{name:<48} {old_ms:>12} {new_ms:>13} {'n/a':>8}")
+            continue
+        
+        change = new["median_ms"] / old["median_ms"] - 1.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<48} {old['median_ms']:12.2f} {new['median_ms']:13.2f} {change:+8.1%}{flag}")
+    
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Synthetic audio fixtures for benchmarks
+Generates deterministic music-like signals so no dataset download is needed
+"""
+
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+
+def synth_music(duration: float, sr: int = 44100, seed: int = 0) -> np.ndarray:
+    """
+    Generate a music-like test signal: a chord progression, a kick/hat beat and noise
+    
+    Args:
+        duration: Length in seconds
+        sr: Sample rate
+        seed: Random seed for the noise component
+    
+    Returns:
+        Mono float32 signal in [-1, 1]
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sr)
+    t = np.arange(n) / sr
+    
+    # Chord progression, one chord every two seconds
+    chords = [(220.0, 277.18, 329.63), (196.0, 246.94, 293.66),
+              (174.61, 220.0, 261.63), (196.0, 246.94, 311.13)]
+    chord_idx = (t // 2.0).astype(int) % len(chords)
+    y = np.zeros(n)
+    for voice in range(3):
+        freqs = np.array([c[voice] for c in chords])[chord_idx]
+        y += 0.15 * np.sin(2 * np.pi * np.cumsum(freqs) / sr)
+    
+    # Beat pattern at 120 BPM: decaying kick on every beat, hats on off-beats
+    beat_period = 0.5
+    phase = np.mod(t, beat_period)
+    y += 0.5 * np.sin(2 * np.pi * 60 * phase) * np.exp(-phase * 30)
+    off_phase = np.mod(t + beat_period / 2, beat_period)
+    y += 0.1 * rng.standard_normal(n) * np.exp(-off_phase * 80)
+    
+    # Background noise floor
+    y += 0.01 * rng.standard_normal(n)
+    
+    return (y / np.max(np.abs(y)) * 0.9).astype(np.float32)
+
+
+def write_wav(path: Path, y: np.ndarray, sr: int) -> Path:
+    """Write a float signal to a 16-bit WAV file"""
+    sf.write(str(path), y, sr, subtype='PCM_16')
+    return path
+
+
+def encode_stream_fixture(y: np.ndarray, sr: int, out_dir: Path, name: str = "stream") -> Path:
+    """
+    Encode a signal the way YouTube serves audio-only streams (Opus/WebM, or AAC/M4A
+    when the local FFmpeg build lacks libopus)
+    
+    Args:
+        y: Mono signal
+        sr: Sample rate of y
+        out_dir: Directory for the fixture files
+        name: Base filename
+    
+    Returns:
+        Path to the encoded fixture
+    """
+    wav_path = write_wav(out_dir / f"{name}.wav", y, sr)
+    
+    candidates = [
+        (f"{name}.webm", ['-c:a', 'libopus', '-b:a', '160k']),
+        (f"{name}.m4a", ['-c:a', 'aac', '-b:a', '128k']),
+    ]
+    for filename, codec_args in candidates:
+        out_path = out_dir / filename
+        result = subprocess.run(
+            ['ffmpeg', '-nostdin', '-y', '-i', str(wav_path), *codec_args, str(out_path)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        if result.returncode == 0:
+            return out_path
+    
+    raise Exception("FFmpeg could not encode a stream fixture (need libopus or aac)")
+
+
+def synth_tone(duration: float, sr: int = 22050, freq: float = 440.0) -> np.ndarray:
+    """Pure sine tone with a few harmonics"""
+    t = np.arange(int(duration * sr)) / sr
+    y = sum(0.5 / k * np.sin(2 * np.pi * freq * k * t) for k in range(1, 5))
+    return (y / np.max(np.abs(y)) * 0.9).astype(np.float32)
+
+
+def synth_noise(duration: float, sr: int = 22050, seed: int = 0) -> np.ndarray:
+    """White noise"""
+    rng = np.random.default_rng(seed)
+    return (0.3 * rng.standard_normal(int(duration * sr))).astype(np.float32)
+
+
+def synth_beats(duration: float, sr: int = 22050, bpm: float = 120.0) -> np.ndarray:
+    """Kick drum pattern with no tonal content"""
+    t = np.arange(int(duration * sr)) / sr
+    phase = np.mod(t, 60.0 / bpm)
+    y = np.sin(2 * np.pi * 55 * phase) * np.exp(-phase * 25)
+    return (y * 0.9).astype(np.float32)
+
+
+SIGNALS = {
+    "music": synth_music,
+    "tone": lambda duration, sr: synth_tone(duration, sr),
+    "noise": lambda duration, sr: synth_noise(duration, sr),
+    "beats": lambda duration, sr: synth_beats(duration, sr),
+}
+
+
+def random_song_rows(n: int, seed: int = 0) -> list:
+    """
+    Random Song column dicts for bulk inserts
+    
+    Args:
+        n: Number of rows
+        seed: Random seed
+    
+    Returns:
+        List of dicts keyed by Song column name
+    """
+    from app.config import GENRE_ORDER
+    
+    rng = np.random.default_rng(seed)
+    probs = rng.dirichlet(np.ones(len(GENRE_ORDER)), size=n)
+    top = probs.argmax(axis=1)
+    xy = rng.uniform(-0.8, 0.8, size=(n, 2))
+    rows = []
+    for i in range(n):
+        row = {
+            "title": f"bench-{i}",
+            "source": "upload",
+            "duration": 180.0,
+            "predicted_genre": GENRE_ORDER[top[i]],
+            "confidence": float(probs[i, top[i]]),
+            "cluster_x": float(xy[i, 0]),
+            "cluster_y": float(xy[i, 1]),
+            "processing_status": "completed",
+        }
+        row.update({f"prob_{genre}": float(p) for genre, p in zip(GENRE_ORDER, probs[i])})
+        rows.append(row)
+    return rows
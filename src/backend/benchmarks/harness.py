@@ -0,0 +1,86 @@
+"""
+Benchmark timing and result-file helpers
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict
+
+TRACKED_PACKAGES = ["numpy", "scipy", "librosa", "numba", "torch", "scikit-learn", "sqlalchemy", "fastapi", "pydantic"]
+
+
+def measure(fn: Callable[[], object], repeats: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """
+    Time a zero-argument callable
+    
+    Args:
+        fn: Code under test
+        repeats: Timed runs
+        warmup: Untimed runs first (JIT, caches, lazy imports)
+    
+    Returns:
+        Dict of timing statistics in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    return {
+        "repeats": repeats,
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "stdev_ms": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def environment() -> Dict:
+    """Describe the machine, interpreter, packages and commit the results came from"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    packages = {}
+    for name in TRACKED_PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "packages": packages,
+    }
+
+
+def save_results(path: Path, results: Dict[str, Dict]):
+    """Write benchmark results plus environment metadata as JSON"""
+    payload = {"environment": environment(), "benchmarks": results}
+    Path(path).write_text(json.dumps(payload, indent=2))
+    print(f"Results written to {path}")
+
+
+def load_results(path: Path) -> Dict:
+    """Read a results file written by save_results"""
+    return json.loads(Path(path).read_text())
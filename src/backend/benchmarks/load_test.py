@@ -0,0 +1,260 @@
+"""
+Load test: mixed API traffic at configurable concurrency
+
+Starts the app in-process with uvicorn against a temporary SQLite database and
+upload directory (or targets an already running deployment with --url), seeds
+the library, then runs N concurrent clients for a fixed time. Each client picks
+requests from a weighted mix of MP3 uploads, /api/songs paging,
+/api/cluster-data polling and deletes. Reports p50/p95/p99 latency, error
+count and throughput per endpoint.
+
+By default the predictor is replaced with a stub that sleeps for --predict-ms
+and returns random probabilities, so the numbers reflect the web/DB layer;
+pass --real-model to run the trained model on every upload.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 16] [--duration 30] [--mix upload=1,songs=6,cluster=3,delete=1]
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 64
+
+Needs httpx (pip install httpx). Against --url, only songs uploaded by this
+run are deleted.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.fixtures import random_song_rows, synth_music, write_wav
+from benchmarks.harness import save_results
+
+DEFAULT_MIX = "upload=1,songs=6,cluster=3,delete=1"
+ENDPOINTS = ["upload", "songs", "cluster", "delete"]
+
+
+class StubPredictor:
+    """Stand-in for GenrePredictor: fixed latency, random probabilities"""
+    
+    version = "stub"
+    model_path = "stub"
+    
+    def __init__(self, predict_seconds: float):
+        from app.config import GENRE_ORDER
+        self.genres = list(GENRE_ORDER)
+        self.predict_seconds = predict_seconds
+        self._rng = np.random.default_rng(0)
+    
+    def predict_track(self, audio_path: str, segments: Optional[list] = None):
+        """Sleep like a model would, then return a random prediction"""
+        time.sleep(self.predict_seconds)
+        probabilities = self._rng.dirichlet(np.ones(len(self.genres)))
+        top = int(np.argmax(probabilities))
+        return self.genres[top], float(probabilities[top]), probabilities
+    
+    def get_probabilities_dict(self, probabilities: np.ndarray) -> Dict[str, float]:
+        return {genre: float(prob) for genre, prob in zip(self.genres, probabilities)}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse 'upload=1,songs=6,...' into endpoint weights"""
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name} (expected one of {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(work_dir: Path, args) -> str:
+    """
+    Start the app on a background thread against a throwaway database
+    
+    Returns:
+        Base URL of the running server
+    """
+    # Must happen before the app is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'load.db'}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["UPLOAD_DIR"] = str(work_dir / "uploads")
+    os.environ["DATABASE_PROFILE"] = args.db_profile
+    
+    import uvicorn
+    from sqlalchemy import insert
+    from app.database import engine, create_tables
+    from app.models.song import Song
+    from app.services import predictor as predictor_module
+    
+    if not args.real_model:
+        predictor_module.model_registry.activate(StubPredictor(args.predict_ms / 1000))
+    
+    create_tables()
+    if args.seed_rows:
+        with engine.begin() as conn:
+            conn.execute(insert(Song), random_song_rows(args.seed_rows))
+    
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config("app.main:app", host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="load-test-server", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    
+    return f"http://127.0.0.1:{port}"
+
+
+class LoadTest:
+    """Concurrent clients issuing a weighted mix of requests"""
+    
+    def __init__(self, base_url: str, weights: Dict[str, float], upload_file: Path, deletable: List[int]):
+        self.base_url = base_url
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.upload_bytes = upload_file.read_bytes()
+        self.upload_suffix = upload_file.suffix
+        self.deletable = deletable
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.names}
+        self.errors: Dict[str, int] = {name: 0 for name in self.names}
+        self.total: Optional[int] = None
+        self._uploads = 0
+    
+    async def request(self, client, name: str, rng: random.Random):
+        """Issue one request for an endpoint and return the response (None if skipped)"""
+        if name == "upload":
+            self._uploads += 1
+            files = {"file": (f"load_{self._uploads}_{rng.random():.8f}{self.upload_suffix}", self.upload_bytes)}
+            response = await client.post("/api/upload/mp3", files=files)
+            if response.status_code == 200:
+                self.deletable.append(response.json()["id"])
+            return response
+        
+        if name == "songs":
+            pages = max(1, (self.total or 0) // 50)
+            return await client.get("/api/songs", params={"limit": 50, "offset": rng.randrange(pages) * 50})
+        
+        if name == "cluster":
+            return await client.get("/api/cluster-data")
+        
+        if name == "delete":
+            if not self.deletable:
+                return None
+            song_id = self.deletable.pop(rng.randrange(len(self.deletable)))
+            return await client.delete(f"/api/songs/{song_id}")
+        
+        raise ValueError(f"Unknown endpoint: {name}")
+    
+    async def client_loop(self, client, deadline: float, seed: int):
+        """One virtual user: pick, send, record until the deadline"""
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            name = rng.choices(self.names, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await self.request(client, name, rng)
+            except Exception:
+                self.errors[name] += 1
+                continue
+            if response is None:
+                continue
+            self.latencies[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                self.errors[name] += 1
+            elif name == "songs":
+                self.total = response.json()["total"]
+    
+    async def run(self, concurrency: int, duration: float) -> float:
+        """Run all clients; returns elapsed seconds"""
+        import httpx
+        
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=300) as client:
+            self.total = (await client.get("/api/songs", params={"limit": 1})).json()["total"]
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                self.client_loop(client, start + duration, seed) for seed in range(concurrency)
+            ))
+            return time.perf_counter() - start
+    
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        """Per-endpoint latency percentiles (ms), throughput and errors"""
+        results = {}
+        for name in self.names:
+            latencies = np.array(self.latencies[name]) * 1000
+            if len(latencies) == 0:
+                continue
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            results[name] = {
+                "requests": int(len(latencies)),
+                "errors": self.errors[name],
+                "throughput_rps": len(latencies) / elapsed,
+                "p50_ms": float(p50),
+                "median_ms": float(p50),  # lets benchmarks.compare diff two runs
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(latencies.max()),
+            }
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target a running deployment instead of starting the app locally")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Test length in seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="Songs inserted before the run (local only)")
+    parser.add_argument("--track-seconds", type=float, default=30.0, help="Length of the uploaded test file")
+    parser.add_argument("--real-model", action="store_true", help="Use the trained model instead of the stub (local only)")
+    parser.add_argument("--predict-ms", type=float, default=200.0, help="Stub predictor latency per upload")
+    parser.add_argument("--db-profile", default="production", help="DATABASE_PROFILE for the local server")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+    
+    weights = parse_mix(args.mix)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        upload_file = write_wav(work_dir / "upload.wav", synth_music(args.track_seconds, sr=22050), 22050)
+        
+        if args.url:
+            base_url, deletable = args.url.rstrip("/"), []
+        else:
+            base_url = start_local_server(work_dir, args)
+            deletable = list(range(1, args.seed_rows + 1))
+        
+        predictor = "real model" if args.real_model else f"stub predictor ({args.predict_ms:.0f} ms)"
+        print(f"Load test against {base_url}: {args.concurrency} clients for {args.duration:.0f}s, "
+              f"mix {args.mix}" + ("" if args.url else f", {predictor}"))
+        
+        test = LoadTest(base_url, weights, upload_file, deletable)
+        elapsed = asyncio.run(test.run(args.concurrency, args.duration))
+        results = test.report(elapsed)
+    
+    print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in results.items():
+        print(f"{name:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    total = sum(stats["requests"] for stats in results.values())
+    print(f"total: {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+    
+    if args.output:
+        save_results(Path(args.output), {f"load[{name}]": stats for name, stats in results.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark suite for the feature-extraction and inference hot paths
+
+Driven entirely by synthetic audio (tones, noise, beat patterns and a
+music-like mix), so no dataset download is needed. Results are written as
+JSON; compare two runs with `python -m benchmarks.compare`.
+
+Usage:
+    python -m benchmarks.run_suite [--output results.json] [--groups features,predict,...] [--quick]
+
+Groups:
+    features       extract_features (file) and extract_feature_vector (in-memory segment)
+    predict        GenrePredictor.predict (feature dict) and predict_vector (feature row)
+    multi_segment  GenrePredictor.predict_multi_segment (5 segments) and the adaptive
+                   sampler across track lengths
+    position       calculate_decagon_position
+    cluster_data   GET /api/cluster-data at 1k/10k/100k rows
+
+The predictor groups need the trained model at MODEL_PATH and are skipped without it.
+"""
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from benchmarks.fixtures import SIGNALS, random_song_rows, synth_music, write_wav
+from benchmarks.harness import measure, save_results
+
+SR = 22050
+ALL_GROUPS = ["features", "predict", "multi_segment", "position", "cluster_data"]
+
+
+def load_predictor():
+    """Load the real predictor, or None if the model file is missing"""
+    from app.config import MODEL_PATH
+    from app.services.predictor import GenrePredictor
+    
+    if not Path(MODEL_PATH).exists():
+        print(f"  (model not found at {MODEL_PATH}, skipping)")
+        return None
+    return GenrePredictor()
+
+
+def bench_features(work_dir: Path, args) -> Dict[str, Dict]:
+    """Per-signal feature extraction, from a file and from an in-memory segment"""
+    from app.services.audio_processor import extract_features, extract_feature_vector
+    
+    results = {}
+    for name, make_signal in SIGNALS.items():
+        y = make_signal(3.0, SR)
+        path = write_wav(work_dir / f"features_{name}.wav", y, SR)
+        
+        results[f"extract_features[{name}]"] = measure(
+            lambda: extract_features(str(path)), repeats=args.repeats
+        )
+        results[f"extract_features_from_array[{name}]"] = measure(
+            lambda: extract_feature_vector(y, SR), repeats=args.repeats
+        )
+    return results
+
+
+def bench_predict(work_dir: Path, args) -> Dict[str, Dict]:
+    """Scaling + model forward for one segment"""
+    predictor = load_predictor()
+    if predictor is None:
+        return {}
+    
+    from app.services.audio_processor import extract_feature_vector, features_to_dict
+    
+    row = extract_feature_vector(synth_music(3.0, sr=SR), SR)
+    features = features_to_dict(row)
+    return {
+        "predict": measure(lambda: predictor.predict(features), repeats=args.repeats * 10),
+        "predict_vector": measure(lambda: predictor.predict_vector(row), repeats=args.repeats * 10),
+    }
+
+
+def bench_multi_segment(work_dir: Path, args) -> Dict[str, Dict]:
+    """Full file pipeline (decode + segments) across track lengths, fixed and adaptive"""
+    predictor = load_predictor()
+    if predictor is None:
+        return {}
+    
+    results = {}
+    for seconds in args.track_lengths:
+        path = write_wav(work_dir / f"track_{seconds}s.wav", synth_music(seconds, sr=44100, seed=seconds), 44100)
+        results[f"predict_multi_segment[{seconds}s]"] = measure(
+            lambda: predictor.predict_multi_segment(str(path), num_segments=5),
+            repeats=max(1, args.repeats // 2)
+        )
+        results[f"predict_adaptive[{seconds}s]"] = measure(
+            lambda: predictor.predict_adaptive_from_array(*predictor._load_audio(str(path))),
+            repeats=max(1, args.repeats // 2)
+        )
+    return results
+
+
+def bench_position(work_dir: Path, args) -> Dict[str, Dict]:
+    """Decagon position for 1000 probability vectors"""
+    from app.services.cluster_calculator import calculate_decagon_position
+    
+    probabilities = np.random.default_rng(0).dirichlet(np.ones(10), size=1000)
+    
+    def run():
+        for probs in probabilities:
+            calculate_decagon_position(probs)
+    
+    return {"calculate_decagon_position[x1000]": measure(run, repeats=args.repeats)}
+
+
+def bench_cluster_data(work_dir: Path, args) -> Dict[str, Dict]:
+    """GET /api/cluster-data through the ASGI app at several library sizes"""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import delete, insert
+    from app.database import engine, create_tables
+    from app.main import app
+    from app.models.song import Song
+    
+    create_tables()
+    client = TestClient(app)  # no lifespan, so the model is not loaded
+    
+    results = {}
+    for rows in args.rows:
+        with engine.begin() as conn:
+            conn.execute(delete(Song))
+            conn.execute(insert(Song), random_song_rows(rows))
+        
+        def request():
+            response = client.get("/api/cluster-data")
+            response.raise_for_status()
+        
+        results[f"cluster_data[{rows}]"] = measure(request, repeats=3 if rows >= 100000 else args.repeats)
+    return results
+
+
+GROUPS = {
+    "features": bench_features,
+    "predict": bench_predict,
+    "multi_segment": bench_multi_segment,
+    "position": bench_position,
+    "cluster_data": bench_cluster_data,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json", help="Results JSON path")
+    parser.add_argument("--groups", default=",".join(ALL_GROUPS), help="Comma-separated groups to run")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--quick", action="store_true", help="Fewer repeats, shorter tracks, smaller tables")
+    args = parser.parse_args()
+    
+    args.track_lengths = [30, 120, 300]
+    args.rows = [1000, 10000, 100000]
+    if args.quick:
+        args.repeats = 2
+        args.track_lengths = [30, 60]
+        args.rows = [1000, 10000]
+    
+    groups = [group.strip() for group in args.groups.split(",") if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unknown groups: {', '.join(sorted(unknown))}")
+    
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        
+        # Never touch the real database: cluster_data wipes the songs table
+        # (must happen before app imports)
+        os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'bench.db'}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        
+        for group in groups:
+            print(f"[{group}]")
+            group_results = GROUPS[group](work_dir, args)
+            for name, stats in group_results.items():
+                print(f"  {name:<46} median {stats['median_ms']:10.2f} ms   min {stats['min_ms']:10.2f} ms")
+            results.update(group_results)
+    
+    save_results(Path(args.output), results)
+
+
+if __name__ == "__main__":
+    main()
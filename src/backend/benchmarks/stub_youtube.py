@@ -0,0 +1,84 @@
+"""
+Offline stand-ins for pytubefix.YouTube and pytubefix.Playlist
+Serve local fixture files so the YouTube pipeline can run without network access
+
+Usage with the API:
+    app.dependency_overrides[get_stream_provider] = lambda: make_stub_provider(catalog)
+"""
+
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.services.youtube_downloader import extract_video_id
+
+
+class StubStream:
+    """Audio-only stream backed by a local file"""
+    
+    def __init__(self, source: Path, abr: str, latency: float):
+        self.source = source
+        self.abr = abr
+        self.latency = latency
+    
+    def download(self, output_path: str, filename: str) -> str:
+        """Copy the fixture into output_path after simulated network latency"""
+        time.sleep(self.latency)
+        target = Path(output_path) / f"{filename}{self.source.suffix}"
+        shutil.copyfile(self.source, target)
+        return str(target)
+
+
+class StubStreamQuery:
+    """Minimal StreamQuery: filter() returns the audio streams"""
+    
+    def __init__(self, streams: List[StubStream]):
+        self._streams = streams
+    
+    def filter(self, only_audio: bool = False, **kwargs) -> List[StubStream]:
+        return list(self._streams)
+
+
+def make_stub_provider(catalog: Dict[str, Path], latency: float = 0.0, titles: Optional[Dict[str, str]] = None):
+    """
+    Build a pytubefix.YouTube replacement serving fixtures by video ID
+    
+    Args:
+        catalog: Mapping of 11-character video ID to local audio file
+        latency: Seconds each download sleeps, to simulate network time
+        titles: Optional video titles by ID
+    
+    Returns:
+        Class usable as a stream provider
+    """
+    titles = titles or {}
+    
+    class StubYouTube:
+        def __init__(self, url: str, on_progress_callback=None, **kwargs):
+            self.video_id = extract_video_id(url)
+            if self.video_id not in catalog:
+                raise Exception(f"Video unavailable: {url}")
+            self.title = titles.get(self.video_id, f"Stub video {self.video_id}")
+            self.streams = StubStreamQuery([
+                StubStream(catalog[self.video_id], '48kbps', latency),
+                StubStream(catalog[self.video_id], '160kbps', latency),
+            ])
+    
+    return StubYouTube
+
+
+def make_stub_playlist_provider(playlists: Dict[str, List[str]]):
+    """
+    Build a pytubefix.Playlist replacement
+    
+    Args:
+        playlists: Mapping of playlist URL to its video URLs
+    """
+    class StubPlaylist:
+        def __init__(self, url: str, **kwargs):
+            if url not in playlists:
+                raise Exception(f"Playlist unavailable: {url}")
+            self.video_urls = list(playlists[url])
+    
+    return StubPlaylist
@@ -0,0 +1,136 @@
+"""
+Validation: exact and fast HPSS features against librosa.effects.hpss
+
+For each 3-second segment, computes harmony/perceptr mean and variance with
+librosa.effects.hpss (the training pipeline), hpss_statistics(mode='exact')
+and hpss_statistics(mode='fast'). Reports time per segment, the largest
+relative drift of each feature, the drift in units of the model's scaler
+(how far the model input moves) and, when the model is available, how often
+the predicted genre changes once the fast values are substituted.
+
+Point --audio-dir at real music for meaningful numbers; without it, the
+synthetic benchmark signals are used.
+
+Usage:
+    python -m benchmarks.validate_hpss [--audio-dir DIR] [--limit 20] [--kernel 17]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+from app.config import SAMPLE_RATE
+from app.services import audio_processor
+from app.services.audio_processor import hpss_statistics
+from benchmarks.fixtures import SIGNALS
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".au", ".flac", ".ogg"}
+HPSS_FEATURES = ("harmony_mean", "harmony_var", "perceptr_mean", "perceptr_var")
+
+
+def librosa_statistics(y: np.ndarray) -> dict:
+    """HPSS features exactly as the training pipeline computes them"""
+    y_harm, y_perc = librosa.effects.hpss(y)
+    return {
+        "harmony_mean": np.mean(y_harm),
+        "harmony_var": np.var(y_harm),
+        "perceptr_mean": np.mean(y_perc),
+        "perceptr_var": np.var(y_perc),
+    }
+
+
+def load_segments(audio_dir: Path, limit: int) -> list:
+    """(name, 3-second segment) pairs from the middle of each file, or the synthetic signals"""
+    segments = []
+    if audio_dir:
+        paths = sorted(p for p in audio_dir.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)[:limit]
+        for path in paths:
+            duration = librosa.get_duration(path=str(path))
+            y, _ = librosa.load(str(path), sr=SAMPLE_RATE, mono=True, offset=max(0.0, duration / 2 - 1.5), duration=3)
+            segments.append((path.name, y))
+    else:
+        for name, make in SIGNALS.items():
+            segments.append((name, make(3.0, SAMPLE_RATE)))
+    return segments
+
+
+def load_model():
+    """The serving model, or None when it cannot be loaded here"""
+    try:
+        from app.services.predictor import get_predictor
+        return get_predictor()
+    except Exception as e:
+        print(f"⚠️  Model unavailable, skipping scaler drift and agreement: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio-dir", type=Path, help="Directory of audio files (searched recursively)")
+    parser.add_argument("--limit", type=int, default=20, help="Max files")
+    parser.add_argument("--kernel", type=int, help="Median filter length for fast mode (default HPSS_FAST_KERNEL)")
+    args = parser.parse_args()
+    
+    if args.kernel:
+        audio_processor.HPSS_FAST_KERNEL = args.kernel
+    
+    segments = load_segments(args.audio_dir, args.limit)
+    methods = {
+        "librosa": librosa_statistics,
+        "exact": lambda y: hpss_statistics(y, mode="exact"),
+        "fast": lambda y: hpss_statistics(y, mode="fast"),
+    }
+    
+    seconds = {name: [] for name in methods}
+    values = {name: [] for name in methods}
+    for _, y in segments:
+        for name, run in methods.items():
+            start = time.perf_counter()
+            values[name].append(run(y))
+            seconds[name].append(time.perf_counter() - start)
+    
+    print(f"{len(segments)} segments, fast kernel = {audio_processor.HPSS_FAST_KERNEL}")
+    print(f"{'method':<8} {'ms/segment':>11} {'speedup':>8}")
+    for name in methods:
+        ms = 1000 * np.median(seconds[name])
+        print(f"{name:<8} {ms:11.1f} {np.median(seconds['librosa']) / np.median(seconds[name]):7.1f}x")
+    
+    predictor = load_model()
+    scale = None
+    if predictor is not None:
+        scale = dict(zip(predictor.feature_columns, predictor.scaler.scale_))
+    
+    print()
+    print(f"{'feature':<14} {'exact rel':>10} {'fast rel':>10} {'fast/scale':>11}")
+    for feature in HPSS_FEATURES:
+        reference = np.array([v[feature] for v in values["librosa"]], dtype=np.float64)
+        row = f"{feature:<14}"
+        for name in ("exact", "fast"):
+            current = np.array([v[feature] for v in values[name]], dtype=np.float64)
+            relative = np.abs(current - reference) / np.maximum(np.abs(reference), 1e-12)
+            row += f" {relative.max():10.2e}"
+        if scale is not None and feature in scale:
+            fast = np.array([v[feature] for v in values["fast"]], dtype=np.float64)
+            row += f" {np.abs(fast - reference).max() / scale[feature]:11.3f}"
+        print(row)
+    
+    if predictor is None:
+        return
+    
+    # Substitute the fast values into otherwise identical feature dicts
+    agree = 0
+    for (name, y), fast in zip(segments, values["fast"]):
+        features = predictor._extract_features_from_array(y, SAMPLE_RATE)
+        genre, _, _ = predictor.predict({**features, **hpss_statistics(y, mode="exact")})
+        fast_genre, _, _ = predictor.predict({**features, **fast})
+        agree += genre == fast_genre
+        if genre != fast_genre:
+            print(f"   {name}: {genre} -> {fast_genre}")
+    print(f"\nGenre agreement exact vs fast: {agree}/{len(segments)} ({agree / len(segments):.1%})")
+
+
+if __name__ == "__main__":
+    main()
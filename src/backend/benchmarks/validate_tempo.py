@@ -0,0 +1,131 @@
+"""
+Validation: tempo from the shared onset envelope against librosa.beat.beat_track
+
+Per 3-second segment, times the old tempo + MFCC stages (beat_track and mfcc
+each computing their own mel spectrogram, plus beat-position tracking) against
+the shared log-mel path, and checks the tempo and MFCC values are unchanged.
+
+For each track it also estimates the per-song tempo (TEMPO_SCOPE=song) over
+the fixed segment positions and reports how far it sits from the per-segment
+tempos and, when the model is available, how often the track's genre changes.
+
+Point --audio-dir at real music for meaningful numbers; without it, synthetic
+tracks are used.
+
+Usage:
+    python -m benchmarks.validate_tempo [--audio-dir DIR] [--limit 20] [--segments 5]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+from app.config import SAMPLE_RATE
+from app.services.audio_processor import log_mel_spectrogram, segment_tempogram, estimate_tempo
+from benchmarks.fixtures import synth_music, write_wav
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".au", ".flac", ".ogg"}
+SEGMENT_SAMPLES = 3 * SAMPLE_RATE
+
+
+def beat_track_stages(y: np.ndarray, sr: int):
+    """Tempo and MFCCs as computed before (training pipeline)"""
+    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=20)
+    return float(np.atleast_1d(tempo)[0]), mfccs
+
+
+def shared_stages(y: np.ndarray, sr: int):
+    """Tempo and MFCCs from one log-mel spectrogram, no beat tracking"""
+    log_mel = log_mel_spectrogram(y, sr)
+    tempogram = segment_tempogram(log_mel, sr)
+    return estimate_tempo([tempogram], sr), librosa.feature.mfcc(S=log_mel, n_mfcc=20), tempogram
+
+
+def track_segments(y: np.ndarray, count: int) -> list:
+    """Evenly spaced 3-second segments, as the fixed sampler picks them"""
+    if len(y) <= SEGMENT_SAMPLES:
+        return [np.pad(y, (0, SEGMENT_SAMPLES - len(y)))]
+    starts = np.linspace(0, len(y) - SEGMENT_SAMPLES, count).astype(int)
+    return [y[start:start + SEGMENT_SAMPLES] for start in starts]
+
+
+def load_model():
+    """The serving model, or None when it cannot be loaded here"""
+    try:
+        from app.services.predictor import get_predictor
+        return get_predictor()
+    except Exception as e:
+        print(f"⚠️  Model unavailable, skipping genre agreement: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio-dir", type=Path, help="Directory of audio files (searched recursively)")
+    parser.add_argument("--limit", type=int, default=20, help="Max tracks")
+    parser.add_argument("--segments", type=int, default=5, help="Segments per track")
+    args = parser.parse_args()
+    
+    predictor = load_model()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.audio_dir:
+            paths = sorted(p for p in args.audio_dir.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)[:args.limit]
+        else:
+            paths = [
+                write_wav(Path(tmp) / f"synth_{i}.wav", synth_music(30.0, sr=SAMPLE_RATE, seed=i), SAMPLE_RATE)
+                for i in range(min(args.limit, 6))
+            ]
+        tracks = [(path.name, librosa.load(str(path), sr=SAMPLE_RATE)[0]) for path in paths]
+    
+    seconds = {"beat_track": [], "shared": []}
+    tempo_diff, mfcc_diff = [], []
+    song_offsets, genre_changes = [], 0
+    
+    for name, y in tracks:
+        segments = track_segments(y, args.segments)
+        tempograms, segment_tempos = [], []
+        for segment in segments:
+            start = time.perf_counter()
+            old_tempo, old_mfccs = beat_track_stages(segment, SAMPLE_RATE)
+            seconds["beat_track"].append(time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            tempo, mfccs, tempogram = shared_stages(segment, SAMPLE_RATE)
+            seconds["shared"].append(time.perf_counter() - start)
+            
+            tempo_diff.append(abs(tempo - old_tempo))
+            mfcc_diff.append(np.abs(mfccs - old_mfccs).max())
+            tempograms.append(tempogram)
+            segment_tempos.append(tempo)
+        
+        song_tempo = estimate_tempo(tempograms, SAMPLE_RATE)
+        song_offsets.append(np.abs(np.array(segment_tempos) - song_tempo).mean())
+        
+        if predictor is not None:
+            features = [predictor._extract_features_from_array(segment, SAMPLE_RATE) for segment in segments]
+            genre, _, _ = predictor._average([predictor.predict(f)[2] for f in features])
+            song_genre, _, _ = predictor._average([predictor.predict({**f, 'tempo': song_tempo})[2] for f in features])
+            genre_changes += genre != song_genre
+            if genre != song_genre:
+                print(f"   {name}: {genre} -> {song_genre} (song tempo {song_tempo:.1f})")
+    
+    count = len(seconds["shared"])
+    print(f"{len(tracks)} tracks, {count} segments")
+    print(f"{'path':<11} {'ms/segment':>11} {'speedup':>8}")
+    for path, values in seconds.items():
+        print(f"{path:<11} {1000 * np.median(values):11.2f} "
+              f"{np.median(seconds['beat_track']) / np.median(values):7.2f}x")
+    print(f"\nMax |tempo difference|: {max(tempo_diff):.3g} BPM, max |MFCC difference|: {max(mfcc_diff):.3g}")
+    print(f"Per-song tempo: mean |segment tempo - song tempo| = {np.mean(song_offsets):.1f} BPM")
+    if predictor is not None:
+        print(f"Genre changes with TEMPO_SCOPE=song: {genre_changes}/{len(tracks)}")
+
+
+if __name__ == "__main__":
+    main()
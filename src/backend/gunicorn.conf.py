@@ -0,0 +1,44 @@
+"""
+Gunicorn configuration for multi-worker deployments
+
+The app and the model are loaded once in the master and workers are forked
+from it, so model weights are shared between workers instead of loaded N times.
+
+Usage (from src/backend):
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Environment:
+    WEB_CONCURRENCY  number of workers (default 2, exported for the app's CPU budget)
+    PORT             listen port (default 8000)
+    PRELOAD_MODEL    'false' to load the model separately in each worker
+"""
+
+import os
+
+# Exported so app.config (imported after this file) sees the same worker count
+os.environ.setdefault("WEB_CONCURRENCY", "2")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.environ["WEB_CONCURRENCY"])
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 300  # uploads run the full decode + classify pipeline
+
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "true").lower() == "true"
+preload_app = PRELOAD_MODEL
+
+
+def when_ready(server):
+    """Master: load the model after the app is imported, before the workers fork"""
+    if PRELOAD_MODEL:
+        from app.services.predictor import preload_shared_model
+        preload_shared_model()
+
+
+def post_fork(server, worker):
+    """Worker: re-apply the thread budget and warm the inherited model in this process"""
+    from app.services.resources import apply_thread_budget
+    apply_thread_budget()
+    
+    if PRELOAD_MODEL:
+        from app.services.predictor import model_registry
+        model_registry.active.warm_up()